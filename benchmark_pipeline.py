@@ -0,0 +1,193 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import datetime
+import tempfile
+import statistics
+import contextlib
+
+from setup_project_structure import SIZE_DISTRIBUTIONS, generate_corpus
+
+# Версия формата файла с результатами (базовой линией)
+BASELINE_FORMAT_VERSION = 1
+
+# Схема file_info.json, которую нужно положить в рабочую папку для validate_json_file()
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "project_root", "output", "file_info_schema.json")
+
+
+def _entry_points(workers):
+    """
+    Замеряемые шаги в порядке выполнения: [(имя, функция без аргументов), ...].
+    Каждый следующий шаг использует результаты предыдущего, как при ручном запуске скриптов.
+    Модули импортируются здесь, после перехода в рабочую папку.
+    """
+    from serialize_processed_data import process_files, serialize_processed_data
+    from gather_file_info import gather_file_info
+    from validate_file_info import validate_json_file
+    from create_backup import create_backup
+    from restore_backup import restore_backup
+
+    return [
+        ("process_files", lambda: process_files(workers=workers)),
+        ("serialize_processed_data", serialize_processed_data),
+        ("gather_file_info", lambda: gather_file_info(workers=workers)),
+        ("validate_json_file", lambda: validate_json_file(workers=workers)),
+        # Бэкап — подготовка для restore_backup, в результаты не входит
+        (None, lambda: create_backup(full=True)),
+        ("restore_backup", lambda: restore_backup(skip_identical=False)),
+    ]
+
+
+def _reset_outputs(project_root):
+    """
+    Удаляет результаты прошлого прогона, оставляя исходный корпус в data/raw/.
+    """
+    for directory in ("data/processed", "backups"):
+        path = os.path.join(project_root, directory)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    for name in ("processed_data.json", "file_info.json"):
+        path = os.path.join(project_root, "output", name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def run_benchmark(file_count=1000, mean_size=4096, size_distribution="lognormal",
+                  encodings=("utf-8", "iso-8859-1", "cp1251", "ascii"), duplicate_rate=0.0, seed=0,
+                  repeat=3, workers=1, workdir=None):
+    """
+    Генерирует синтетический корпус (см. generate_corpus()) во временной
+    папке (или в workdir) и repeat раз замеряет все шаги от начала до конца.
+    Вывод самих шагов подавляется. Возвращает словарь результатов
+    в формате базовой линии (см. save_baseline()).
+    """
+    base_dir = workdir or tempfile.mkdtemp(prefix="files_benchmark_")
+    previous_dir = os.getcwd()
+    try:
+        os.chdir(base_dir)
+        corpus = generate_corpus("project_root", file_count=file_count, mean_size=mean_size,
+                                 size_distribution=size_distribution, encodings=encodings,
+                                 duplicate_rate=duplicate_rate, seed=seed)
+        shutil.copy(SCHEMA_PATH, os.path.join("project_root", "output"))
+        steps = _entry_points(workers)
+
+        timings = {name: [] for name, _ in steps if name is not None}
+        for _ in range(repeat):
+            _reset_outputs("project_root")
+            for name, func in steps:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    func()
+                    elapsed = time.perf_counter() - start
+                if name is not None:
+                    timings[name].append(elapsed)
+    finally:
+        os.chdir(previous_dir)
+        if workdir is None:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    results = {}
+    for name, runs in timings.items():
+        median = statistics.median(runs)
+        results[name] = {
+            "median_seconds": round(median, 6),
+            "min_seconds": round(min(runs), 6),
+            "runs": [round(run, 6) for run in runs],
+            "files_per_second": round(file_count / median, 1) if median else None,
+            "mb_per_second": round(corpus["total_bytes"] / median / 1e6, 3) if median else None,
+        }
+
+    return {
+        "version": BASELINE_FORMAT_VERSION,
+        "created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus": corpus,
+        "repeat": repeat,
+        "workers": workers,
+        "results": results,
+    }
+
+
+def save_baseline(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+
+def compare_with_baseline(report, baseline, tolerance=0.2):
+    """
+    Сравнивает медианы шагов с базовой линией.
+    Возвращает список регрессий [(шаг, было, стало), ...]:
+    шаги, ставшие медленнее больше чем на tolerance (доля).
+    Сравнение имеет смысл только для одинаковых параметров корпуса.
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if result["median_seconds"] > previous["median_seconds"] * (1 + tolerance):
+            regressions.append((name, previous["median_seconds"], result["median_seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк всех шагов на синтетическом корпусе")
+    parser.add_argument("--files", type=int, default=1000, help="число файлов в корпусе")
+    parser.add_argument("--mean-size", type=int, default=4096, help="средний размер файла в символах")
+    parser.add_argument("--size-distribution", choices=SIZE_DISTRIBUTIONS, default="lognormal",
+                        help="распределение размеров файлов")
+    parser.add_argument("--encodings", default="utf-8,iso-8859-1,cp1251,ascii",
+                        help="кодировки файлов через запятую (по кругу)")
+    parser.add_argument("--dup-rate", type=float, default=0.0, help="доля файлов-дубликатов (0..1)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора корпуса")
+    parser.add_argument("--repeat", type=int, default=3, help="число прогонов (берётся медиана)")
+    parser.add_argument("--workers", type=int, default=1, help="число процессов/потоков для шагов")
+    parser.add_argument("--workdir", help="рабочая папка (по умолчанию временная, удаляется после)")
+    parser.add_argument("--output", help="сохранить результаты как базовую линию в JSON-файл")
+    parser.add_argument("--compare", metavar="BASELINE", help="сравнить с сохранённой базовой линией")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="допустимое замедление относительно базовой линии (доля)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(file_count=args.files, mean_size=args.mean_size,
+                           size_distribution=args.size_distribution,
+                           encodings=tuple(args.encodings.split(",")), duplicate_rate=args.dup_rate,
+                           seed=args.seed, repeat=args.repeat, workers=args.workers, workdir=args.workdir)
+
+    corpus = report["corpus"]
+    print(f"Корпус: {corpus['file_count']} файлов, {corpus['total_bytes'] / 1e6:.1f} МБ, "
+          f"дубликатов: {corpus['duplicates']}")
+    print(f"{'шаг':<26} {'медиана, с':>11} {'мин, с':>9} {'файлов/с':>10} {'МБ/с':>8}")
+    for name, result in report["results"].items():
+        print(f"{name:<26} {result['median_seconds']:>11.4f} {result['min_seconds']:>9.4f} "
+              f"{result['files_per_second'] or 0:>10.1f} {result['mb_per_second'] or 0:>8.2f}")
+
+    if args.output:
+        save_baseline(args.output, report)
+        print(f"Результаты сохранены: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != corpus or baseline.get("workers") != report["workers"]:
+            print("Внимание: параметры корпуса или число workers отличаются от базовой линии")
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"Регрессия: {name}: {before:.4f} с -> {after:.4f} с (+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print("Регрессий относительно базовой линии нет.")
+
+
+if __name__ == "__main__":
+    main()
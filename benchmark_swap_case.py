@@ -0,0 +1,107 @@
+import time
+import argparse
+
+from serialize_processed_data import swap_case, swap_case_bytes
+
+# Образцы текста для замеров: (название, текст, кодировка для байтового пути)
+SAMPLES = [
+    ("ascii", "Hello, this is ASCII text! Line with Numbers 12345.\n", "ascii"),
+    ("latin-1", "Bonjour, c'est du texte en ISO-8859-1! Ça coûte très cher, Straße ÿ.\n", "iso-8859-1"),
+    ("cyrillic", "Привет, это текст в UTF-8! Съешь же ещё этих мягких булок.\n", "utf-8"),
+    ("greek", "ΟΔΥΣΣΕΥΣ και Σωκράτης: ΑΣ ΠΑΜΕ στην αγορά, ᾈ ǅ.\n", "utf-8"),
+]
+
+
+def swap_case_reference(text):
+    """
+    Исходная (эталонная) реализация swap_case: посимвольный генератор.
+    Оставлена для сравнения скорости и проверки эквивалентности.
+    """
+    return "".join(char.lower() if char.isupper() else char.upper() for char in text)
+
+
+def verify():
+    """
+    Проверяет, что swap_case() совпадает с эталоном на каждом символе Unicode
+    и на образцах (в том числе с контекстом финальной сигмы).
+    Возвращает список расхождений (пустой, если всё совпадает).
+    """
+    mismatches = []
+    for code_point in range(0x110000):
+        char = chr(code_point)
+        if swap_case(char) != swap_case_reference(char):
+            mismatches.append(char)
+
+    for name, text, encoding in SAMPLES:
+        if swap_case(text) != swap_case_reference(text):
+            mismatches.append(name)
+        expected = swap_case_reference(text).encode("utf-8")
+        if swap_case_bytes(text.encode(encoding), encoding) != expected:
+            mismatches.append(f"{name} (bytes)")
+    return mismatches
+
+
+def _best_time(func, argument, repeat):
+    """
+    Лучшее из repeat измерений одного вызова func(argument), в секундах.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(argument)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_benchmark(size_chars=1_000_000, repeat=5):
+    """
+    Замеряет эталонную и новую реализацию на текстах размером около size_chars символов.
+    Возвращает список словарей с результатами для каждого образца.
+    """
+    # Прогрев: таблица титульных символов строится один раз при первом вызове
+    swap_case("ǅ")
+
+    results = []
+    for name, sample, encoding in SAMPLES:
+        text = sample * (size_chars // len(sample) + 1)
+        raw_data = text.encode(encoding)
+
+        reference_seconds = _best_time(swap_case_reference, text, repeat)
+        fast_seconds = _best_time(swap_case, text, repeat)
+        bytes_seconds = _best_time(lambda data: swap_case_bytes(data, encoding), raw_data, repeat)
+
+        results.append({
+            "sample": name,
+            "chars": len(text),
+            "reference_seconds": reference_seconds,
+            "swap_case_seconds": fast_seconds,
+            "swap_case_bytes_seconds": bytes_seconds,
+            "speedup": reference_seconds / fast_seconds if fast_seconds else float("inf"),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микро-бенчмарк swap_case против исходной реализации")
+    parser.add_argument("--size", type=int, default=1_000_000, help="размер текста в символах")
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов (берётся лучший)")
+    parser.add_argument("--skip-verify", action="store_true", help="не проверять эквивалентность")
+    args = parser.parse_args()
+
+    if not args.skip_verify:
+        mismatches = verify()
+        if mismatches:
+            print("Расхождения с эталонной реализацией:", mismatches[:20])
+            return
+        print("swap_case() совпадает с эталоном на всём Unicode.")
+
+    print(f"{'образец':<10} {'эталон, с':>10} {'swap_case, с':>13} {'bytes, с':>10} {'ускорение':>10}")
+    for r in run_benchmark(args.size, args.repeat):
+        print(f"{r['sample']:<10} {r['reference_seconds']:>10.4f} {r['swap_case_seconds']:>13.4f} "
+              f"{r['swap_case_bytes_seconds']:>10.4f} {r['speedup']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
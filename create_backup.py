@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import queue
+import zipfile
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from processing_manifest import content_hash
+import stage_metrics
+
+# Имя служебного файла-описи снимка внутри архива
+SNAPSHOT_MEMBER = "__snapshot__.json"
+
+# Версия формата описи снимка
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Сколько прочитанных заранее файлов может ждать записи в архив
+WRITE_QUEUE_SIZE = 16
+
+
+def _list_data_files(data_dir):
+    """
+    Рекурсивно собирает файлы из data/: {относительный путь через '/': os.stat_result}.
+    """
+    files = {}
+    stack = [(data_dir, "")]
+    while stack:
+        current_dir, rel_prefix = stack.pop()
+        with os.scandir(current_dir) as entries:
+            for entry in entries:
+                rel_path = rel_prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path + "/"))
+                elif entry.is_file():
+                    files[rel_path] = entry.stat()
+    return files
+
+
+# backup_<YYYYMMDD>[_<HHMMSS>[_<N>]].zip
+_BACKUP_NAME_RE = re.compile(r"^backup_(\d{8})(?:_(\d{6}))?(?:_(\d+))?\.zip$")
+
+
+def list_backups(backups_dir):
+    """
+    Имена архивов backup_*.zip в backups/ от самого нового к самому старому.
+    Порядок определяется датой, временем и номером из имени (а не сортировкой строк),
+    при равенстве — временем изменения файла. Архивы с нестандартным именем
+    считаются старше датированных и упорядочиваются по времени изменения.
+    """
+    if not os.path.isdir(backups_dir):
+        return []
+
+    def sort_key(backup_file_name):
+        match = _BACKUP_NAME_RE.match(backup_file_name)
+        mtime = os.path.getmtime(os.path.join(backups_dir, backup_file_name))
+        if match is None:
+            return ("", "", 0, mtime)
+        date, time, number = match.groups()
+        return (date, time or "", int(number or 1), mtime)
+
+    backup_files = [f for f in os.listdir(backups_dir) if f.startswith("backup_") and f.endswith(".zip")]
+    return sorted(backup_files, key=sort_key, reverse=True)
+
+
+def read_snapshot(backup_path):
+    """
+    Читает опись снимка из архива. Для архивов старого формата (без описи) — None.
+    """
+    with zipfile.ZipFile(backup_path, mode="r") as zf:
+        if SNAPSHOT_MEMBER not in zf.namelist():
+            return None
+        with zf.open(SNAPSHOT_MEMBER) as f:
+            return json.load(f)
+
+
+def latest_snapshot(backups_dir):
+    """
+    Возвращает (имя архива, опись) последнего снимка в backups/ или (None, None).
+    Архивы старого формата без описи пропускаются.
+    """
+    for backup_file_name in list_backups(backups_dir):
+        snapshot = read_snapshot(os.path.join(backups_dir, backup_file_name))
+        if snapshot is not None:
+            return backup_file_name, snapshot
+    return None, None
+
+
+def _known_contents(backups_dir, parent_name, parent):
+    """
+    Индекс содержимого всей цепочки снимков от parent к первому (по ссылкам "parent"):
+    хэш -> запись с местом хранения (archive, member). При совпадении хэшей
+    берётся запись из более нового снимка. Записи, чей архив уже удалён,
+    пропускаются; цепочка обрывается на отсутствующем архиве или архиве без описи.
+    """
+    known_hashes = {}
+    existing = {}
+    visited = set()
+    snapshot_name, snapshot = parent_name, parent
+    while snapshot is not None and snapshot_name not in visited:
+        visited.add(snapshot_name)
+        for entry in snapshot["files"].values():
+            archive_name = entry["archive"]
+            if archive_name not in existing:
+                existing[archive_name] = os.path.isfile(os.path.join(backups_dir, archive_name))
+            if existing[archive_name]:
+                known_hashes.setdefault(entry["hash"], entry)
+        snapshot_name = snapshot.get("parent")
+        if snapshot_name is None or not os.path.isfile(os.path.join(backups_dir, snapshot_name)):
+            break
+        snapshot = read_snapshot(os.path.join(backups_dir, snapshot_name))
+    return known_hashes
+
+
+def _referenced_archives(backups_dir):
+    """
+    Имена всех архивов, на которые ссылаются описи снимков в backups/
+    (включая уже удалённые архивы): такие имена нельзя занимать новым архивом,
+    иначе старые описи станут указывать на чужое содержимое.
+    """
+    referenced = set()
+    for backup_file_name in list_backups(backups_dir):
+        snapshot = read_snapshot(os.path.join(backups_dir, backup_file_name))
+        if snapshot is None:
+            continue
+        if snapshot.get("parent"):
+            referenced.add(snapshot["parent"])
+        referenced.update(entry["archive"] for entry in snapshot["files"].values())
+    return referenced
+
+
+def _new_backup_name(backups_dir, now, taken=()):
+    """
+    backup_<YYYYMMDD>.zip; если такой уже есть (или имя занято описями
+    снимков — taken) — backup_<YYYYMMDD>_<HHMMSS>.zip, а при повторе
+    в ту же секунду — с порядковым номером. Такие имена
+    при сортировке идут после более ранних снимков того же дня.
+    """
+    candidates = [f"backup_{now.strftime('%Y%m%d')}.zip", f"backup_{now.strftime('%Y%m%d_%H%M%S')}.zip"]
+    number = 2
+    while True:
+        for backup_file_name in candidates:
+            if (backup_file_name not in taken
+                    and not os.path.exists(os.path.join(backups_dir, backup_file_name))):
+                return backup_file_name
+        candidates = [f"backup_{now.strftime('%Y%m%d_%H%M%S')}_{number}.zip"]
+        number += 1
+
+
+def create_backup(full=False, workers=4):
+    """
+    Создаёт инкрементальный снимок папки data/ в backups/backup_<YYYYMMDD>.zip.
+
+    В архив попадает только новое содержимое. Файлы, которые не изменились
+    с прошлого снимка (тот же размер и mtime) или чьё содержимое уже есть
+    в каком-либо из прошлых снимков (тот же хэш), не сжимаются заново:
+    опись снимка (__snapshot__.json) ссылается на архив, где они уже лежат.
+    Поэтому для восстановления нужны все архивы цепочки (см. restore_backup()).
+
+    Хэши считаются в пуле из workers потоков. Сжатие идёт в отдельном
+    потоке записи параллельно с хэшированием: zlib, как и hashlib,
+    отпускает GIL. full=True — полный снимок без ссылок на прошлые.
+    Возвращает путь к созданному архиву (None, если data/ нет).
+    """
+    project_root = "project_root"
+    data_dir = os.path.join(project_root, "data")
+    backups_dir = os.path.join(project_root, "backups")
+
+    if not os.path.isdir(data_dir):
+        print(f"Директория не найдена: {data_dir}")
+        return None
+    os.makedirs(backups_dir, exist_ok=True)
+
+    now = datetime.datetime.now()
+    backup_file_name = _new_backup_name(backups_dir, now, _referenced_archives(backups_dir))
+    backup_path = os.path.join(backups_dir, backup_file_name)
+
+    parent_name, parent = (None, None) if full else latest_snapshot(backups_dir)
+    parent_files = parent["files"] if parent else {}
+    # Индекс содержимого всех прошлых снимков цепочки: хэш -> запись с местом хранения
+    known_hashes = _known_contents(backups_dir, parent_name, parent)
+
+    files = _list_data_files(data_dir)
+    snapshot_files = {}
+    to_hash = []
+    for rel_path, stats in files.items():
+        previous = parent_files.get(rel_path)
+        # Ссылка на прошлый снимок годится, только если архив с содержимым ещё есть
+        known = known_hashes.get(previous["hash"]) if previous else None
+        if (known is not None and previous["size"] == stats.st_size
+                and previous["mtime_ns"] == stats.st_mtime_ns):
+            snapshot_files[rel_path] = dict(previous, archive=known["archive"], member=known["member"])
+        else:
+            to_hash.append(rel_path)
+
+    # Очередь на запись ограничена: хэширование не убегает далеко вперёд сжатия
+    write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    write_errors = []
+
+    def writer():
+        try:
+            with zipfile.ZipFile(backup_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+                while True:
+                    rel_path = write_queue.get()
+                    if rel_path is None:
+                        break
+                    file_path = os.path.join(data_dir, rel_path)
+                    with stage_metrics.measure("zip_write", files[rel_path].st_size):
+                        zf.write(file_path, arcname=rel_path)
+                # Опись пишется последней, когда известны все файлы
+                snapshot = write_queue.get()
+                zf.writestr(SNAPSHOT_MEMBER, json.dumps(snapshot, ensure_ascii=False, indent=4))
+        except Exception as e:
+            write_errors.append(e)
+            # Разблокируем производителя, если он ждёт места в очереди
+            while True:
+                try:
+                    write_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+
+    stored = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = pool.map(lambda rel_path: content_hash(os.path.join(data_dir, rel_path)), to_hash)
+        for rel_path, file_hash in zip(to_hash, hashes):
+            stats = files[rel_path]
+            entry = {"hash": file_hash, "size": stats.st_size, "mtime_ns": stats.st_mtime_ns}
+            known = known_hashes.get(file_hash)
+            if known is not None:
+                entry["archive"] = known["archive"]
+                entry["member"] = known["member"]
+            else:
+                entry["archive"] = backup_file_name
+                entry["member"] = rel_path
+                known_hashes[file_hash] = entry
+                stored += 1
+                if not write_errors:
+                    write_queue.put(rel_path)
+            snapshot_files[rel_path] = entry
+
+    snapshot = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "created": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "parent": parent_name,
+        "files": dict(sorted(snapshot_files.items()))
+    }
+    write_queue.put(None)
+    write_queue.put(snapshot)
+    writer_thread.join()
+
+    if write_errors:
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+        raise write_errors[0]
+
+    print(f"Бэкап создан: {backup_path} (файлов: {len(snapshot_files)}, "
+          f"сохранено новых: {stored}, по ссылке: {len(snapshot_files) - stored})")
+    return backup_path
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Инкрементальный бэкап папки data/ в backups/")
+    parser.add_argument("--full", action="store_true", help="полный снимок без ссылок на прошлые")
+    parser.add_argument("--workers", type=int, default=4, help="число потоков для хэширования")
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    with stage_metrics.instrumented_run("create_backup", args.metrics, args.profile):
+        create_backup(full=args.full, workers=args.workers)
+
+if __name__ == "__main__":
+    cli()
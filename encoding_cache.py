@@ -0,0 +1,109 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Версия формата файла кэша: при несовпадении кэш просто строится заново
+CACHE_FORMAT_VERSION = 1
+
+
+class EncodingCache:
+    """
+    Кэш результатов определения кодировки, сохраняемый на диск между запусками.
+
+    Ключ записи — (полный путь, размер, время изменения в наносекундах),
+    а при use_content_hash=True ещё и хэш первых sample_size байт файла:
+    тогда изменение содержимого без смены размера и mtime тоже будет замечено.
+    Хранится не более max_entries записей, лишние вытесняются по принципу LRU.
+    Методы get()/put() потокобезопасны.
+    """
+    def __init__(self, cache_path, max_entries=100_000, use_content_hash=False, sample_size=4096):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.use_content_hash = use_content_hash
+        self.sample_size = sample_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """
+        Загружает кэш с диска. Повреждённый или устаревший файл игнорируется.
+        """
+        if not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return
+        # Записи сохранены от давно использованных к недавним
+        for key, encoding in data.get("entries", []):
+            self._entries[key] = encoding
+
+    def key(self, file_path):
+        """
+        Строит ключ кэша для файла. Возвращает None, если файл недоступен.
+        """
+        try:
+            stats = os.stat(file_path)
+            parts = [os.path.abspath(file_path), str(stats.st_size), str(stats.st_mtime_ns)]
+            if self.use_content_hash:
+                with open(file_path, "rb") as f:
+                    parts.append(hashlib.blake2b(f.read(self.sample_size), digest_size=16).hexdigest())
+        except OSError:
+            return None
+        return "|".join(parts)
+
+    def get(self, key):
+        """
+        Возвращает кодировку по ключу или None, если записи нет.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            encoding = self._entries.get(key)
+            if encoding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return encoding
+
+    def put(self, key, encoding):
+        """
+        Запоминает кодировку для ключа, вытесняя самые давние записи при переполнении.
+        """
+        if key is None or not encoding:
+            return
+        with self._lock:
+            if self._entries.get(key) != encoding:
+                self._dirty = True
+            self._entries[key] = encoding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._dirty = True
+
+    def save(self):
+        """
+        Сохраняет кэш на диск, если он изменился. Запись атомарная:
+        сначала во временный файл, затем os.replace().
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": CACHE_FORMAT_VERSION, "entries": list(self._entries.items())}
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,294 @@
+import os
+import sys
+import mmap
+import struct
+import argparse
+from array import array
+
+from gather_file_info import FileInfo, FileInfoTable, format_timestamp, parse_timestamp
+from json_records import iter_records
+
+# Бинарный колоночный индекс описи файлов (альтернатива file_info.json).
+#
+# Все числа little-endian. Структура файла:
+#   заголовок    — HEADER_FORMAT: сигнатура, версия, число записей, число строк
+#                  и смещения всех секций от начала файла;
+#   колонки      — int64: размер, ctime, mtime (Unix-timestamp, секунды);
+#                  uint32: номер строки имени и номер строки полного пути;
+#   индексы      — uint32: номера записей, отсортированные по имени (байты UTF-8),
+#                  по размеру и по mtime;
+#   строки       — uint64 смещения (число строк + 1) и общий блок UTF-8.
+#                  Одинаковые строки хранятся один раз (интернирование).
+# Читатель открывает файл через mmap и обращается к колонкам через memoryview,
+# не разбирая файл целиком.
+
+MAGIC = b"FIDX"
+FORMAT_VERSION = 1
+HEADER_FORMAT = "<4sIQQ" + "Q" * 10
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+SECTIONS = ("sizes", "ctimes", "mtimes", "name_ids", "path_ids",
+            "by_name", "by_size", "by_mtime", "string_offsets", "string_data")
+SECTION_TYPECODES = {
+    "sizes": "q", "ctimes": "q", "mtimes": "q",
+    "name_ids": "I", "path_ids": "I",
+    "by_name": "I", "by_size": "I", "by_mtime": "I",
+    "string_offsets": "Q",
+}
+
+
+def _to_little_endian(column):
+    """
+    Возвращает байты массива в порядке little-endian независимо от платформы.
+    """
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_file_index(index_path, table):
+    """
+    Сохраняет FileInfoTable в бинарный индекс index_path.
+    Запись атомарная: сначала во временный файл, затем os.replace().
+    """
+    count = len(table)
+
+    # Интернирование строк: имя и путь ссылаются на номер строки в общей таблице
+    string_ids = {}
+    encoded_strings = []
+
+    def intern(value):
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(encoded_strings)
+            encoded_strings.append(value.encode("utf-8"))
+        return string_id
+
+    name_ids = array("I", (intern(name) for name in table.filenames))
+    path_ids = array("I", (intern(path) for path in table.full_paths))
+
+    string_offsets = array("Q", [0])
+    for encoded in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+
+    records = range(count)
+    columns = {
+        "sizes": array("q", table.file_sizes),
+        "ctimes": array("q", table.creation_timestamps),
+        "mtimes": array("q", table.modified_timestamps),
+        "name_ids": name_ids,
+        "path_ids": path_ids,
+        "by_name": array("I", sorted(records, key=lambda i: encoded_strings[name_ids[i]])),
+        "by_size": array("I", sorted(records, key=lambda i: table.file_sizes[i])),
+        "by_mtime": array("I", sorted(records, key=lambda i: table.modified_timestamps[i])),
+        "string_offsets": string_offsets,
+    }
+
+    blobs = [_to_little_endian(columns[name]) for name in SECTIONS[:-1]]
+    blobs.append(b"".join(encoded_strings))
+
+    offsets = []
+    position = HEADER_SIZE
+    for blob in blobs:
+        # Выравнивание секций по 8 байт, чтобы memoryview.cast() работал с ними напрямую
+        position += -position % 8
+        offsets.append(position)
+        position += len(blob)
+
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, count, len(encoded_strings), *offsets))
+        for offset, blob in zip(offsets, blobs):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(blob)
+    os.replace(tmp_path, index_path)
+
+
+class FileIndex:
+    """
+    Читатель бинарного индекса: файл отображается в память (mmap),
+    поиск по имени, по диапазону размеров и по дате изменения выполняется
+    двоичным поиском по отсортированным индексам без разбора всего файла.
+    Возвращаемые записи — объекты FileInfo.
+    """
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._file = open(index_path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Пустой файл индекса: {index_path}") from None
+        header = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        magic, version, self._count, string_count = header[:4]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Неизвестный формат индекса: {index_path}")
+
+        self._view = memoryview(self._mmap)
+        offsets = dict(zip(SECTIONS, header[4:]))
+        lengths = {name: self._count for name in SECTION_TYPECODES}
+        lengths["string_offsets"] = string_count + 1
+        for name, typecode in SECTION_TYPECODES.items():
+            setattr(self, "_" + name, self._column(offsets[name], typecode, lengths[name]))
+        self._string_data_offset = offsets["string_data"]
+
+    def _column(self, offset, typecode, length):
+        size = length * array(typecode).itemsize
+        raw = self._view[offset:offset + size]
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        # На big-endian платформах колонку приходится скопировать и развернуть
+        column = array(typecode)
+        column.frombytes(raw)
+        column.byteswap()
+        return column
+
+    def close(self):
+        """
+        Освобождает отображение файла в память.
+        """
+        for name in list(SECTION_TYPECODES) + ["view"]:
+            column = getattr(self, "_" + name, None)
+            if isinstance(column, memoryview):
+                column.release()
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _string_bytes(self, string_id):
+        start = self._string_data_offset + self._string_offsets[string_id]
+        end = self._string_data_offset + self._string_offsets[string_id + 1]
+        return self._mmap[start:end]
+
+    def _string(self, string_id):
+        return self._string_bytes(string_id).decode("utf-8")
+
+    def record(self, index):
+        """
+        Запись с номером index в виде FileInfo.
+        """
+        return FileInfo(
+            filename=self._string(self._name_ids[index]),
+            full_path=self._string(self._path_ids[index]),
+            file_size=self._sizes[index],
+            creation_date=format_timestamp(self._ctimes[index]),
+            last_modified=format_timestamp(self._mtimes[index])
+        )
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self.record(index)
+
+    @staticmethod
+    def _lower_bound(order, key, target):
+        """
+        Первая позиция в order, для которой key(order[pos]) >= target (двоичный поиск).
+        """
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if key(order[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, filename):
+        """
+        Все записи с именем filename (имена в разных поддиректориях могут совпадать).
+        """
+        target = filename.encode("utf-8")
+        name_key = lambda index: self._string_bytes(self._name_ids[index])
+        position = self._lower_bound(self._by_name, name_key, target)
+        result = []
+        while position < self._count and name_key(self._by_name[position]) == target:
+            result.append(self.record(self._by_name[position]))
+            position += 1
+        return result
+
+    def _range(self, order, column, low, high):
+        position = 0 if low is None else self._lower_bound(order, column.__getitem__, low)
+        while position < self._count:
+            index = order[position]
+            if high is not None and column[index] > high:
+                break
+            yield self.record(index)
+            position += 1
+
+    def size_range(self, min_size=None, max_size=None):
+        """
+        Записи с размером в диапазоне [min_size, max_size] по возрастанию размера.
+        """
+        return self._range(self._by_size, self._sizes, min_size, max_size)
+
+    def modified_since(self, since):
+        """
+        Записи, изменённые не раньше since (Unix-timestamp или строка "YYYY-MM-DD HH:MM:SS"),
+        по возрастанию даты изменения.
+        """
+        if isinstance(since, str):
+            since = parse_timestamp(since)
+        return self._range(self._by_mtime, self._mtimes, since, None)
+
+
+def build_index_from_json(json_path, index_path):
+    """
+    Строит бинарный индекс из существующего file_info.json(l).
+    Возвращает число записей.
+    """
+    table = FileInfoTable.from_dicts(iter_records(json_path))
+    write_file_index(index_path, table)
+    return len(table)
+
+
+def main():
+    project_root = "project_root"
+    default_json = os.path.join(project_root, "output", "file_info.json")
+    default_index = os.path.join(project_root, "output", "file_info.idx")
+
+    parser = argparse.ArgumentParser(description="Бинарный индекс описи файлов: построение и запросы")
+    parser.add_argument("--index", default=default_index, help="путь к файлу индекса")
+    parser.add_argument("--build", nargs="?", const=default_json, metavar="JSON",
+                        help="построить индекс из file_info.json(l)")
+    parser.add_argument("--find", metavar="NAME", help="найти записи по имени файла")
+    parser.add_argument("--min-size", type=int, help="нижняя граница размера, байт")
+    parser.add_argument("--max-size", type=int, help="верхняя граница размера, байт")
+    parser.add_argument("--modified-since", metavar="DATE", help='"YYYY-MM-DD HH:MM:SS"')
+    args = parser.parse_args()
+
+    if args.build:
+        count = build_index_from_json(args.build, args.index)
+        print(f"Индекс построен: {args.index} (записей: {count})")
+
+    if not os.path.isfile(args.index):
+        print(f"Файл индекса не найден: {args.index}")
+        return
+
+    with FileIndex(args.index) as index:
+        if args.find is not None:
+            results = index.find(args.find)
+        elif args.min_size is not None or args.max_size is not None:
+            results = index.size_range(args.min_size, args.max_size)
+        elif args.modified_since is not None:
+            results = index.modified_since(args.modified_since)
+        else:
+            print(f"Записей в индексе: {len(index)}")
+            return
+        for fi in results:
+            print(fi.filename, fi.full_path, fi.file_size, fi.creation_date, fi.last_modified)
+
+
+if __name__ == "__main__":
+    main()
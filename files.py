@@ -0,0 +1,251 @@
+import os
+import sys
+import shlex
+import argparse
+import importlib
+import traceback
+import contextlib
+
+# Единая точка входа для всех шагов проекта:
+#   python files.py <подкоманда> [аргументы подкоманды]
+# Модуль подкоманды импортируется только при её вызове, поэтому, например,
+# restore не загружает ни chardet, ни jsonschema.
+#
+# Подкоманда -> (модуль, функция запуска из командной строки, описание).
+# Функция принимает список аргументов (как sys.argv[1:]).
+COMMANDS = {
+    "setup": ("setup_project_structure", "cli", "создать структуру project_root/ и примеры файлов"),
+    "process": ("serialize_processed_data", "cli", "обработать data/raw/ и записать processed_data.json"),
+    "gather": ("gather_file_info", "cli", "собрать file_info.json по data/processed/"),
+    "validate": ("validate_file_info", "cli", "проверить file_info.json по схеме"),
+    "report": ("generate_final_report", "main", "сформировать итоговый отчёт"),
+    "backup": ("create_backup", "cli", "инкрементальный бэкап data/"),
+    "restore": ("restore_backup", "cli", "восстановить data/ из бэкапа"),
+    "watch": ("watch_raw", "main", "обрабатывать data/raw/ по мере появления файлов"),
+    "benchmark": ("benchmark_pipeline", "main", "замер производительности на синтетическом корпусе"),
+}
+
+# Строка, которой в пакетном и серверном режимах завершается вывод каждой команды:
+# "@@ exit <код>" — по ней вызывающая сторона отделяет вывод команд друг от друга
+EXIT_MARKER = "@@ exit"
+
+
+def run_command(argv):
+    """
+    Выполняет одну команду в текущем процессе: argv = [подкоманда, аргументы...].
+    Возвращает код завершения (SystemExit от argparse и sys.exit() перехватывается).
+    """
+    if not argv or argv[0] not in COMMANDS:
+        name = argv[0] if argv else ""
+        print(f"Неизвестная подкоманда: {name!r} (доступны: {', '.join(COMMANDS)})", file=sys.stderr)
+        return 2
+    module_name, function_name, _ = COMMANDS[argv[0]]
+    try:
+        function = getattr(importlib.import_module(module_name), function_name)
+        function(argv[1:])
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        raise
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def _run_lines(lines, output):
+    """
+    Выполняет команды из lines (по одной на строку, в синтаксисе оболочки;
+    пустые строки и строки с # пропускаются). После каждой команды в output
+    пишется EXIT_MARKER с кодом. Строка "shutdown" останавливает выполнение.
+    Возвращает (число неудачных команд, была ли команда shutdown).
+    """
+    failed = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line == "shutdown":
+            output.write(f"{EXIT_MARKER} 0\n")
+            output.flush()
+            return failed, True
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            print(f"Не удалось разобрать команду {line!r}: {e}", file=output)
+            code = 2
+        else:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                code = run_command(argv)
+        if code:
+            failed += 1
+        output.write(f"{EXIT_MARKER} {code}\n")
+        output.flush()
+    return failed, False
+
+
+def batch(input_file):
+    """
+    Пакетный режим: команды читаются из input_file (обычно stdin) и выполняются
+    одна за другой в этом же процессе — интерпретатор и уже импортированные
+    модули (chardet, jsonschema и т.д.) загружаются один раз на все команды.
+    Возвращает код завершения: 0, если все команды успешны, иначе 1.
+    """
+    failed, _ = _run_lines(input_file, sys.stdout)
+    return 1 if failed else 0
+
+
+class _SocketOutput:
+    """
+    Текстовый поток поверх сокета соединения (для redirect_stdout).
+    """
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, text):
+        self._wfile.write(text.encode("utf-8"))
+        return len(text)
+
+    def flush(self):
+        self._wfile.flush()
+
+
+def serve(socket_path):
+    """
+    Серверный режим: тёплый процесс принимает команды через Unix-сокет socket_path.
+    Протокол — как в пакетном режиме:
+    клиент шлёт строки с командами, в ответ получает их вывод, завершённый
+    строкой EXIT_MARKER с кодом. Команда "shutdown" останавливает сервер.
+
+    Команды выполняются строго по очереди: все они работают с одним project_root/,
+    а перенаправление stdout действует на весь процесс. Вывод процессов-обработчиков
+    (workers > 1) идёт в stdout сервера, а не клиенту.
+
+    Команды пишут файлы с правами пользователя сервера, поэтому доступ есть
+    только у него: сокет создаётся с правами 0600 (TCP-порта без аутентификации
+    нет намеренно — к нему мог бы подключиться любой локальный пользователь).
+    """
+    import socketserver
+
+    stopped = False
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            nonlocal stopped
+            lines = (line.decode("utf-8") for line in self.rfile)
+            _, shutdown = _run_lines(lines, _SocketOutput(self.wfile))
+            stopped = stopped or shutdown
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    # Сокет сразу создаётся с правами 0600: между bind() и chmod() не должно быть окна
+    previous_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, Handler)
+    finally:
+        os.umask(previous_umask)
+
+    print(f"Сервер команд слушает {socket_path} (команда shutdown или Ctrl+C для выхода)", flush=True)
+    try:
+        with server:
+            while not stopped:
+                server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+    print("Сервер команд остановлен")
+
+
+def call(argv, socket_path):
+    """
+    Клиент серверного режима: отправляет одну команду и печатает её вывод.
+    Возвращает код завершения команды.
+    """
+    import socket
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with connection:
+        connection.connect(socket_path)
+        connection.sendall((shlex.join(argv) + "\n").encode("utf-8"))
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                if line.startswith(EXIT_MARKER + " "):
+                    return int(line[len(EXIT_MARKER):])
+                sys.stdout.write(line)
+    print("Сервер закрыл соединение, не завершив команду", file=sys.stderr)
+    return 1
+
+
+def _add_address_arguments(parser):
+    parser.add_argument("--socket", required=True, help="путь к Unix-сокету")
+
+
+def _parse_mode_args(argv, mode):
+    parser = argparse.ArgumentParser(prog=f"files.py {mode}")
+    if mode == "batch":
+        parser.description = "Выполнить команды из stdin (по одной на строку) в одном процессе"
+        parser.add_argument("--file", help="читать команды из файла вместо stdin")
+    elif mode == "serve":
+        parser.description = "Принимать команды через Unix-сокет в одном тёплом процессе"
+        _add_address_arguments(parser)
+    else:
+        parser.description = "Выполнить команду на запущенном сервере (files.py serve)"
+        _add_address_arguments(parser)
+        parser.add_argument("command", nargs=argparse.REMAINDER, help="подкоманда и её аргументы")
+    return parser.parse_args(argv)
+
+
+def _print_usage():
+    print("Использование: python files.py <подкоманда> [аргументы]\n")
+    print("Подкоманды (--help у каждой — её аргументы):")
+    for name, (_, _, description) in COMMANDS.items():
+        print(f"  {name:<10} {description}")
+    print("\nРежимы одного тёплого процесса:")
+    print(f"  {'batch':<10} выполнить команды из stdin, по одной на строку")
+    print(f"  {'serve':<10} принимать команды через Unix-сокет (доступен только владельцу)")
+    print(f"  {'call':<10} отправить команду серверу")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        _print_usage()
+        return 0 if argv else 2
+
+    mode = argv[0]
+    if mode == "batch":
+        args = _parse_mode_args(argv[1:], mode)
+        if args.file is None:
+            return batch(sys.stdin)
+        with open(args.file, "r", encoding="utf-8") as f:
+            return batch(f)
+    if mode == "serve":
+        args = _parse_mode_args(argv[1:], mode)
+        serve(args.socket)
+        return 0
+    if mode == "call":
+        args = _parse_mode_args(argv[1:], mode)
+        command = args.command[1:] if args.command[:1] == ["--"] else args.command
+        if not command:
+            print("Не указана команда для сервера", file=sys.stderr)
+            return 2
+        return call(command, args.socket)
+
+    # Обычный запуск одной команды: сообщения argparse и коды завершения — как у скриптов
+    if mode not in COMMANDS:
+        print(f"Неизвестная подкоманда: {mode!r}\n", file=sys.stderr)
+        _print_usage()
+        return 2
+    module_name, function_name, _ = COMMANDS[mode]
+    getattr(importlib.import_module(module_name), function_name)(argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,31 @@
 import os
-import json
+import fnmatch
+import argparse
 import datetime
+import functools
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from json_records import OUTPUT_FORMATS, records_path, write_records, iter_records
+import stage_metrics
+from stage_metrics import timed
+
+# Формат дат в file_info.json
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+@functools.lru_cache(maxsize=65536)
+def format_timestamp(timestamp):
+    """
+    Целый Unix-timestamp -> строка даты в формате DATE_FORMAT (локальное время).
+    Результаты кэшируются: у множества файлов совпадают секунды создания/изменения.
+    """
+    return datetime.datetime.fromtimestamp(timestamp).strftime(DATE_FORMAT)
+
+def parse_timestamp(date_string):
+    """
+    Строка даты в формате DATE_FORMAT -> целый Unix-timestamp (обратно к format_timestamp()).
+    """
+    return int(datetime.datetime.strptime(date_string, DATE_FORMAT).timestamp())
 
 class FileInfo:
     """
@@ -10,7 +35,10 @@ class FileInfo:
       - file_size (размер в байтах)
       - creation_date (дата создания в формате ISO-строки)
       - last_modified (дата последнего изменения в формате ISO-строки)
+    __slots__ убирает у каждого объекта собственный __dict__.
     """
+    __slots__ = ("filename", "full_path", "file_size", "creation_date", "last_modified")
+
     def __init__(self, filename, full_path, file_size, creation_date, last_modified):
         self.filename = filename
         self.full_path = full_path
@@ -43,78 +71,290 @@ class FileInfo:
             last_modified=data["last_modified"]
         )
 
-def gather_file_info():
+    @classmethod
+    def from_stat(cls, filename, full_path, stats):
+        """
+        Создание объекта FileInfo по уже полученному os.stat_result.
+        """
+        # Даты создания и изменения (в формате ISO: YYYY-MM-DD HH:MM:SS)
+        # Обратите внимание, что на Windows ctime = время создания,
+        # на Unix-системах ctime — время изменения метаданных.
+        return cls(
+            filename=filename,
+            full_path=full_path,
+            file_size=stats.st_size,
+            creation_date=format_timestamp(int(stats.st_ctime)),
+            last_modified=format_timestamp(int(stats.st_mtime))
+        )
+
+class FileInfoTable:
+    """
+    Компактное колоночное хранилище множества записей FileInfo.
+
+    Имена и пути хранятся в списках, а размеры и даты — в массивах array('q')
+    целыми числами (даты — Unix-timestamp в секундах), без отдельного объекта
+    на каждую запись. Строки дат формируются лениво, только при обращении.
+
+    Совместимость с прежним API: итерация и индексация выдают объекты FileInfo,
+    to_dicts()/from_dicts() — пакетные аналоги FileInfo.to_dict()/from_dict().
+    """
+    def __init__(self):
+        self.filenames = []
+        self.full_paths = []
+        self.file_sizes = array("q")
+        self.creation_timestamps = array("q")
+        self.modified_timestamps = array("q")
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def append(self, filename, full_path, file_size, creation_timestamp, modified_timestamp):
+        """
+        Добавляет запись; даты передаются как целые Unix-timestamp.
+        """
+        self.filenames.append(filename)
+        self.full_paths.append(full_path)
+        self.file_sizes.append(file_size)
+        self.creation_timestamps.append(creation_timestamp)
+        self.modified_timestamps.append(modified_timestamp)
+
+    def append_stat(self, filename, full_path, stats):
+        """
+        Добавляет запись по os.stat_result (аналог FileInfo.from_stat()).
+        """
+        self.append(filename, full_path, stats.st_size, int(stats.st_ctime), int(stats.st_mtime))
+
+    def creation_date(self, index):
+        return format_timestamp(self.creation_timestamps[index])
+
+    def last_modified(self, index):
+        return format_timestamp(self.modified_timestamps[index])
+
+    def __getitem__(self, index):
+        """
+        Возвращает запись с номером index в виде объекта FileInfo.
+        """
+        return FileInfo(
+            filename=self.filenames[index],
+            full_path=self.full_paths[index],
+            file_size=self.file_sizes[index],
+            creation_date=self.creation_date(index),
+            last_modified=self.last_modified(index)
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_dicts(self):
+        """
+        Пакетное преобразование всех записей в список словарей для JSON
+        (тот же формат, что у FileInfo.to_dict()).
+        """
+        return [
+            {
+                "filename": filename,
+                "full_path": full_path,
+                "file_size": file_size,
+                "creation_date": format_timestamp(creation),
+                "last_modified": format_timestamp(modified)
+            }
+            for filename, full_path, file_size, creation, modified in zip(
+                self.filenames, self.full_paths, self.file_sizes,
+                self.creation_timestamps, self.modified_timestamps)
+        ]
+
+    @classmethod
+    def from_dicts(cls, items):
+        """
+        Пакетное восстановление таблицы из словарей (формат FileInfo.to_dict()).
+        items может быть любым итерируемым, в том числе потоковым читателем iter_records().
+        """
+        table = cls()
+        parse = functools.lru_cache(maxsize=65536)(parse_timestamp)
+        for item in items:
+            table.append(item["filename"], item["full_path"], item["file_size"],
+                         parse(item["creation_date"]), parse(item["last_modified"]))
+        return table
+
+    @classmethod
+    def from_file_infos(cls, file_infos):
+        """
+        Строит таблицу из последовательности объектов FileInfo.
+        """
+        return cls.from_dicts([fi.to_dict() for fi in file_infos])
+
+def _matches(name, rel_path, patterns):
+    """
+    Проверяет, подходит ли имя или относительный путь (через '/') под один из glob-шаблонов.
+    """
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern)
+               for pattern in patterns)
+
+@timed("stat")
+def _entry_stat(entry):
+    return entry.stat()
+
+def _walk(directory, rel_prefix="", recursive=True, include=None, exclude=None):
+    """
+    Обходит директорию через os.scandir() без рекурсии Python (стек директорий).
+    Тип записи берётся из DirEntry (без лишнего системного вызова),
+    а stat — из DirEntry.stat() (на Windows он уже есть в результатах обхода).
+    Выдаёт кортежи (имя файла, полный путь, os.stat_result).
+
+    include — glob-шаблоны файлов, которые нужно взять (по умолчанию все);
+    exclude — шаблоны файлов и директорий, которые нужно пропустить.
+    Шаблоны сравниваются и с именем, и с путём относительно корня обхода.
+    """
+    stack = [(directory, rel_prefix)]
+    while stack:
+        current_dir, current_rel = stack.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    rel_path = current_rel + entry.name
+                    if exclude and _matches(entry.name, rel_path, exclude):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append((entry.path, rel_path + "/"))
+                    elif entry.is_file():
+                        if include and not _matches(entry.name, rel_path, include):
+                            continue
+                        yield entry.name, entry.path, _entry_stat(entry)
+        except OSError as e:
+            print(f"Не удалось прочитать директорию {current_dir}: {e}")
+
+def scan_files(directories, recursive=True, include=None, exclude=None, workers=1):
+    """
+    Быстрое сканирование файлов в одной или нескольких директориях.
+    Выдаёт кортежи (имя файла, полный путь, os.stat_result).
+
+    При workers > 1 поддиректории первого уровня каждой директории
+    становятся отдельными «шардами» и обходятся параллельно в пуле потоков
+    (обход упирается в ввод-вывод, особенно на сетевых дисках).
+    """
+    if isinstance(directories, str):
+        directories = [directories]
+
+    if workers <= 1:
+        for directory in directories:
+            yield from _walk(directory, "", recursive, include, exclude)
+        return
+
+    shards = []
+    for directory in directories:
+        # Файлы верхнего уровня выдаём сразу, поддиректории откладываем в шарды
+        for name, full_path, stats in _walk(directory, "", False, include, exclude):
+            yield name, full_path, stats
+        if not recursive:
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if exclude and _matches(entry.name, entry.name, exclude):
+                    continue
+                shards.append((entry.path, entry.name + "/"))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def walk_shard(shard):
+            shard_dir, rel_prefix = shard
+            return list(_walk(shard_dir, rel_prefix, recursive, include, exclude))
+
+        for shard_files in pool.map(walk_shard, shards):
+            yield from shard_files
+
+def gather_file_info(recursive=True, include=None, exclude=None, workers=1, output_format="json",
+                     build_index=False):
     """
     Сканируем директорию `data/processed/` и собираем информацию о каждом файле в список объектов FileInfo.
     Затем сериализуем эти данные в JSON-файл `file_info.json`.
+
+    recursive — заходить ли в поддиректории; include/exclude — glob-фильтры;
+    workers — число потоков для параллельного обхода поддиректорий (см. scan_files()).
+    output_format — "json" (массив, по умолчанию) или "jsonl" (`file_info.jsonl`):
+    записи пишутся в файл по мере обхода, без накопления в памяти.
+    build_index — дополнительно сохранить бинарный индекс `file_info.idx` (см. file_index.py)
+    для быстрых запросов по имени, размеру и дате изменения.
     """
     project_root = "project_root"
     processed_dir = os.path.join(project_root, "data", "processed")
-    output_json = os.path.join(project_root, "output", "file_info.json")
-    
-    file_info_list = []
+    output_json = records_path(os.path.join(project_root, "output", "file_info.json"), output_format)
 
     if not os.path.isdir(processed_dir):
         print(f"Директория не найдена: {processed_dir}")
         return
 
-    # Обходим все файлы в папке processed
-    for filename in os.listdir(processed_dir):
-        full_path = os.path.join(processed_dir, filename)
-        if os.path.isfile(full_path):
-            stats = os.stat(full_path)
-            
-            # Даты создания и изменения (в формате ISO: YYYY-MM-DD HH:MM:SS)
-            # Обратите внимание, что на Windows ctime = время создания,
-            # на Unix-системах ctime — время изменения метаданных.
-            creation_date = datetime.datetime.fromtimestamp(stats.st_ctime).strftime("%Y-%m-%d %H:%M:%S")
-            last_modified = datetime.datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
-            
-            file_info = FileInfo(
-                filename=filename,
-                full_path=full_path,
-                file_size=stats.st_size,
-                creation_date=creation_date,
-                last_modified=last_modified
-            )
-            file_info_list.append(file_info)
-    
-    # Сериализуем список объектов FileInfo в JSON
-    data_to_serialize = [f.to_dict() for f in file_info_list]
-    
+    # Для индекса записи дополнительно складываются в колоночную таблицу
+    file_info_table = FileInfoTable() if build_index else None
+
+    # Обходим все файлы в папке processed (один stat на файл через DirEntry)
+    # и сразу сериализуем каждую запись (тот же формат, что и FileInfo.to_dict())
+    def records():
+        for filename, full_path, stats in scan_files(processed_dir, recursive, include, exclude, workers):
+            if file_info_table is not None:
+                file_info_table.append_stat(filename, full_path, stats)
+            yield FileInfo.from_stat(filename, full_path, stats).to_dict()
+
     # Сохраняем в файл
     os.makedirs(os.path.dirname(output_json), exist_ok=True)
-    with open(output_json, "w", encoding="utf-8") as jf:
-        json.dump(data_to_serialize, jf, ensure_ascii=False, indent=4)
+    write_records(output_json, records(), output_format)
     
     print(f"Файл с информацией о файлах создан: {output_json}")
 
-def restore_file_info():
+    if file_info_table is not None:
+        # Импорт здесь: file_index сам импортирует FileInfo из этого модуля
+        from file_index import write_file_index
+        index_path = os.path.join(project_root, "output", "file_info.idx")
+        with stage_metrics.measure("write_index"):
+            write_file_index(index_path, file_info_table)
+        print(f"Бинарный индекс создан: {index_path}")
+
+def restore_file_info(input_format="json"):
     """
-    Читаем JSON-файл `file_info.json` и восстанавливаем объекты FileInfo.
+    Читаем JSON-файл `file_info.json` (или `file_info.jsonl`) и восстанавливаем объекты FileInfo.
+    Файл читается потоково, по одной записи.
     """
     project_root = "project_root"
-    input_json = os.path.join(project_root, "output", "file_info.json")
+    input_json = records_path(os.path.join(project_root, "output", "file_info.json"), input_format)
     
     if not os.path.isfile(input_json):
         print(f"JSON-файл не найден: {input_json}")
         return
     
-    with open(input_json, "r", encoding="utf-8") as jf:
-        data = json.load(jf)
-    
-    # Восстанавливаем список объектов FileInfo
-    file_info_list = [FileInfo.from_dict(item) for item in data]
+    # Восстанавливаем записи пакетно в колоночную таблицу
+    file_info_table = FileInfoTable.from_dicts(iter_records(input_json, input_format))
     
     print("Десериализация прошла успешно. Содержимое объектов FileInfo:")
-    for fi in file_info_list:
+    for fi in file_info_table:
         print(fi.filename, fi.full_path, fi.file_size, fi.creation_date, fi.last_modified)
 
-def main():
+def main(recursive=True, include=None, exclude=None, workers=1, output_format="json", build_index=False):
     # Собираем информацию и сериализуем
-    gather_file_info()
+    gather_file_info(recursive=recursive, include=include, exclude=exclude, workers=workers,
+                     output_format=output_format, build_index=build_index)
     # Проверяем, что данные можно десериализовать обратно
-    restore_file_info()
+    restore_file_info(input_format=output_format)
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Сбор информации о файлах из data/processed/ в file_info.json")
+    parser.add_argument("--no-recursive", action="store_true", help="не заходить в поддиректории")
+    parser.add_argument("--include", action="append", help="glob-шаблон файлов для включения (можно несколько)")
+    parser.add_argument("--exclude", action="append", help="glob-шаблон файлов/директорий для исключения")
+    parser.add_argument("--workers", type=int, default=1, help="число потоков для параллельного обхода")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                        help="формат вывода: json (массив) или jsonl (по записи на строку)")
+    parser.add_argument("--index", action="store_true",
+                        help="дополнительно построить бинарный индекс file_info.idx")
+    stage_metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def cli(argv=None):
+    args = _parse_args(argv)
+    with stage_metrics.instrumented_run("gather_file_info", args.metrics, args.profile):
+        main(recursive=not args.no_recursive, include=args.include, exclude=args.exclude, workers=args.workers,
+             output_format=args.format, build_index=args.index)
 
 if __name__ == "__main__":
-    main()
+    cli()
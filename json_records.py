@@ -0,0 +1,229 @@
+import os
+import json
+
+from stage_metrics import timed
+
+# Поддерживаемые форматы файлов с записями:
+#   "json"  — один JSON-массив с отступами (формат по умолчанию, как раньше);
+#   "jsonl" — JSON Lines: одна компактная запись на строку.
+OUTPUT_FORMATS = ("json", "jsonl")
+
+# Размер порции при потоковом чтении JSON-массива
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def records_path(base_path, output_format="json"):
+    """
+    Путь к файлу записей для выбранного формата:
+    'output/file_info.json' -> 'output/file_info.jsonl' для "jsonl".
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода: {output_format}")
+    root, _ = os.path.splitext(base_path)
+    return f"{root}.{output_format}"
+
+
+@timed("json_dump", size=lambda line, record: len(line))
+def _dump_line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+@timed("json_dump", size=lambda item, record: len(item))
+def _dump_item(record):
+    return json.dumps(record, ensure_ascii=False, indent=4)
+
+
+def dump_record(record, output_format="json"):
+    """
+    Текст одной записи в том виде, в каком RecordWriter.write() пишет её в файл
+    (без отступа элемента массива). Позволяет кодировать записи в другом процессе
+    и дописывать готовый текст через RecordWriter.write_dumped().
+    """
+    if output_format == "jsonl":
+        return _dump_line(record)
+    return _dump_item(record)
+
+
+class RecordWriter:
+    """
+    Пошаговая запись файла с записями: write() добавляет одну запись,
+    close() завершает файл. Нужна, когда за один проход заполняются
+    несколько файлов (см. write_records() для одного потока записей).
+
+    Запись идёт во временный файл рядом, close() атомарно заменяет им
+    output_path: читатели видят либо прежний, либо новый файл целиком.
+    abort() (или выход из with по исключению) оставляет прежний файл.
+    """
+    def __init__(self, output_path, output_format="json"):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Неизвестный формат вывода: {output_format}")
+        self.output_format = output_format
+        self.output_path = output_path
+        self.count = 0
+        self._tmp_path = output_path + ".tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        if output_format == "json":
+            self._file.write("[")
+
+    def write(self, record):
+        self.write_dumped(dump_record(record, self.output_format))
+
+    def write_dumped(self, item):
+        """
+        Дописывает запись, уже закодированную dump_record().
+        """
+        if self.output_format == "jsonl":
+            self._file.write(item)
+            self._file.write("\n")
+        else:
+            self._file.write(("\n" if self.count == 0 else ",\n") + "    " + item.replace("\n", "\n    "))
+        self.count += 1
+
+    def wants(self, record):
+        """
+        Будет ли запись записана: всегда да (тот же интерфейс, что у ShardedWriter).
+        """
+        return True
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.output_format == "json":
+            self._file.write("\n]" if self.count else "]")
+        self._file.close()
+        try:
+            os.replace(self._tmp_path, self.output_path)
+        except OSError:
+            os.remove(self._tmp_path)
+            raise
+
+    def abort(self):
+        """
+        Отменяет запись: временный файл удаляется, прежний output_path не меняется.
+        """
+        if self._file.closed:
+            return
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(output_path, records, output_format="json"):
+    """
+    Записывает записи в файл по одной, по мере их поступления из records.
+    Для "json" результат побайтно совпадает с json.dump(list(records), ..., indent=4),
+    но список целиком в памяти не строится. Возвращает число записей.
+    """
+    with RecordWriter(output_path, output_format) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def _iter_json_lines(f):
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Ошибка в строке {line_number}: {e}") from None
+
+
+def _iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """
+    Потоковый разбор JSON-массива верхнего уровня: элементы декодируются
+    по одному через JSONDecoder.raw_decode(), файл читается порциями.
+
+    Если элемент не поместился в буфер, он разбирается заново с начала после
+    дочитывания, поэтому порция при каждой повторной попытке удваивается:
+    общая работа на элемент остаётся линейной по его размеру, даже если это
+    текст в сотни мегабайт.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill(size=chunk_size):
+        nonlocal buffer, position, eof
+        chunk = f.read(size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("Ожидался JSON-массив")
+    position += 1
+
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Неожиданный конец файла внутри массива")
+        char = buffer[position]
+        if char == "]":
+            return
+        if not expect_value:
+            if char != ",":
+                raise ValueError(f"Ожидалась ',' или ']', получено {char!r}")
+            position += 1
+            expect_value = True
+            continue
+
+        read_size = chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    raise
+                fill(read_size)
+                read_size = max(read_size, len(buffer)) * 2
+                continue
+            # Значение у конца буфера могло оборваться (например, число) — дочитываем
+            if end >= len(buffer) and not eof:
+                fill(read_size)
+                read_size = max(read_size, len(buffer)) * 2
+                continue
+            break
+        position = end
+        expect_value = False
+        yield value
+
+
+def iter_records(input_path, input_format=None):
+    """
+    Итератор по записям файла без загрузки его целиком в память.
+    Формат определяется по расширению (.jsonl — JSON Lines), если не указан явно.
+    """
+    if input_format is None:
+        input_format = "jsonl" if input_path.endswith(".jsonl") else "json"
+    if input_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат: {input_format}")
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        if input_format == "jsonl":
+            yield from _iter_json_lines(f)
+        else:
+            yield from _iter_json_array(f)
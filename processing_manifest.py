@@ -0,0 +1,146 @@
+import os
+import json
+import hashlib
+
+from stage_metrics import timed
+
+# Версия формата манифеста: при несовпадении выполняется полная пересборка
+MANIFEST_FORMAT_VERSION = 1
+
+# Размер блока при подсчёте хэша содержимого
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def new_digest():
+    """
+    Пустой хэш в формате content_hash(): для подсчёта по частям
+    по мере чтения файла (см. _stream_one() в serialize_processed_data.py).
+    """
+    return hashlib.blake2b(digest_size=16)
+
+
+@timed("hash", size=lambda result, data: len(data))
+def bytes_hash(data):
+    """
+    Хэш уже прочитанного содержимого — то же значение, что content_hash() для файла.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_state(stats, content_digest):
+    """
+    Состояние исходного файла для ProcessingManifest.record(): размер и mtime
+    из os.stat_result (взятого до чтения) и хэш содержимого.
+    """
+    return {"size": stats.st_size, "mtime_ns": stats.st_mtime_ns, "hash": content_digest}
+
+
+@timed("hash")
+def content_hash(file_path):
+    """
+    Хэш содержимого файла (BLAKE2b), файл читается блоками по HASH_BLOCK_SIZE.
+    """
+    digest = new_digest()
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ProcessingManifest:
+    """
+    Манифест инкрементальной обработки: для каждого исходного файла из data/raw/
+    хранит размер, время изменения (st_mtime_ns), хэш содержимого
+    и имя выходного файла в data/processed/.
+
+    options — параметры запуска, влияющие на содержимое результатов
+    (например, потоковый режим). Если они поменялись, манифест сбрасывается.
+    """
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.options = {}
+        self.files = {}
+        self._load()
+
+    def _load(self):
+        """
+        Загружает манифест с диска. Повреждённый или устаревший файл игнорируется.
+        """
+        if not os.path.isfile(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_FORMAT_VERSION:
+            return
+        self.options = data.get("options", {})
+        self.files = data.get("files", {})
+
+    def reset(self, options):
+        """
+        Забывает все записи (полная пересборка) и запоминает новые параметры.
+        """
+        self.options = dict(options)
+        self.files = {}
+
+    def is_unchanged(self, name, file_path):
+        """
+        Проверяет, изменился ли файл с прошлого запуска.
+        Совпадение размера и mtime считается достаточным; если mtime другой,
+        а размер тот же, сравнивается хэш содержимого (файл могли просто «потрогать»).
+        """
+        entry = self.files.get(name)
+        if entry is None:
+            return False
+        try:
+            stats = os.stat(file_path)
+        except OSError:
+            return False
+        if stats.st_size != entry["size"]:
+            return False
+        if stats.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if content_hash(file_path) != entry["hash"]:
+            return False
+        entry["mtime_ns"] = stats.st_mtime_ns
+        return True
+
+    def record(self, name, file_path, output, state=None):
+        """
+        Запоминает состояние обработанного файла и имя полученного выходного файла.
+        state — состояние, уже полученное при обработке (см. file_state()):
+        тогда файл не читается повторно ради хэша. Без него размер, mtime
+        и хэш берутся с диска.
+        """
+        if state is None:
+            state = file_state(os.stat(file_path), content_hash(file_path))
+        self.files[name] = dict(state, output=output)
+
+    def forget(self, name):
+        """
+        Удаляет запись о файле (он будет обработан заново при следующем запуске).
+        """
+        self.files.pop(name, None)
+
+    def removed(self, current_names):
+        """
+        Возвращает [(имя, запись), ...] для файлов, которых больше нет в data/raw/.
+        """
+        current = set(current_names)
+        return [(name, entry) for name, entry in self.files.items() if name not in current]
+
+    def save(self):
+        """
+        Атомарно сохраняет манифест на диск.
+        """
+        data = {"version": MANIFEST_FORMAT_VERSION, "options": self.options, "files": self.files}
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
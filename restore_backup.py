@@ -1,45 +1,223 @@
 import os
+import zlib
+import fnmatch
 import zipfile
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def restore_backup(backup_file_name=None):
+from create_backup import SNAPSHOT_MEMBER, list_backups, read_snapshot
+from processing_manifest import new_digest
+import stage_metrics
+
+# Размер буфера при потоковом копировании и подсчёте CRC
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def _safe_target(data_dir, rel_path):
+    """
+    Путь для восстановления файла; пути, выходящие за пределы data/, отвергаются.
+    """
+    target = os.path.normpath(os.path.join(data_dir, rel_path))
+    if os.path.commonpath([os.path.abspath(target), os.path.abspath(data_dir)]) != os.path.abspath(data_dir):
+        raise ValueError(f"Недопустимый путь в архиве: {rel_path}")
+    return target
+
+def _selected(rel_path, paths, patterns):
+    """
+    Проверяет, попадает ли файл под фильтры восстановления:
+    paths — файлы или поддеревья относительно data/ ("raw", "raw/example.txt");
+    patterns — glob-шаблоны для относительного пути или имени файла.
+    Пустой фильтр пропускает всё.
+    """
+    if paths and not any(rel_path == path or rel_path.startswith(path + "/")
+                         for path in (p.strip("/") for p in paths)):
+        return False
+    if patterns and not any(fnmatch.fnmatch(rel_path, pattern)
+                            or fnmatch.fnmatch(os.path.basename(rel_path), pattern)
+                            for pattern in patterns):
+        return False
+    return True
+
+def _file_crc32(file_path):
+    crc = 0
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(COPY_BUFFER_SIZE)
+            if not block:
+                return crc
+            crc = zlib.crc32(block, crc)
+
+def _is_identical(target, info):
+    """
+    Совпадает ли файл на диске с членом архива: сначала размер, затем CRC-32.
+    """
+    try:
+        if os.path.getsize(target) != info.file_size:
+            return False
+        return _file_crc32(target) == info.CRC
+    except OSError:
+        return False
+
+def _restore_jobs(backup_file_name, backups_dir):
+    """
+    Список файлов для восстановления:
+    [(относительный путь, имя архива, имя члена архива, ожидаемый хэш), ...].
+    Для инкрементального снимка берётся из описи, для архива старого формата — из оглавления zip
+    (хэша там нет — None).
+    """
+    backup_path = os.path.join(backups_dir, backup_file_name)
+    snapshot = read_snapshot(backup_path)
+    if snapshot is not None:
+        return [(rel_path, entry["archive"], entry["member"], entry["hash"])
+                for rel_path, entry in snapshot["files"].items()]
+
+    with zipfile.ZipFile(backup_path, mode="r") as zf:
+        return [(info.filename, backup_file_name, info.filename, None)
+                for info in zf.infolist()
+                if not info.is_dir() and info.filename != SNAPSHOT_MEMBER]
+
+def restore_backup(backup_file_name=None, paths=None, patterns=None, skip_identical=True, workers=4):
     """
     Распаковывает архив (backup_<YYYYMMDD>.zip) из папки backups/
     обратно в data/, восстанавливая структуру директорий и файлы.
-    
+
     Параметр backup_file_name:
-      - По умолчанию None: берётся самый новый бэкап из backups/.
+      - По умолчанию None: берётся самый новый бэкап из backups/
+        (по дате и времени в имени, см. list_backups()).
       - Или можно указать имя конкретного архива, например "backup_20241228.zip".
+
+    Инкрементальные снимки (с описью __snapshot__.json, см. create_backup.py)
+    восстанавливаются по цепочке: неизменившиеся файлы извлекаются
+    из более ранних архивов, на которые ссылается опись. Хэш извлечённого
+    содержимого сверяется с описью: если архив из цепочки подменён,
+    восстановление прерывается с ошибкой, а не пишет чужие данные.
+
+    Выборочное восстановление:
+      - paths — файлы или поддеревья относительно data/, например ["raw"];
+      - patterns — glob-шаблоны, например ["*.txt"];
+      - skip_identical — не перезаписывать файлы, у которых размер и CRC-32
+        уже совпадают с архивом.
+    Файлы извлекаются в workers потоков (у каждого потока свои дескрипторы архивов),
+    содержимое копируется потоково, порциями по COPY_BUFFER_SIZE, во временный
+    файл рядом, который затем атомарно заменяет целевой (как в RecordWriter):
+    жёсткие ссылки на прежний файл не затрагиваются, а при сбое он остаётся целым.
+    Пути проверяются до начала распаковки; ошибки отдельных файлов
+    (нет члена архива, не совпал хэш) не прерывают остальные, а собираются
+    и выводятся в конце, после чего первая из них выбрасывается.
+    Распаковываются только выбранные члены архива, поэтому восстановить
+    один файл из большого бэкапа можно без полной распаковки.
     """
     project_root = "project_root"
     data_dir = os.path.join(project_root, "data")
     backups_dir = os.path.join(project_root, "backups")
-    
+
     # Если имя архива не указано, поищем самый новый:
     if backup_file_name is None:
-        # Фильтруем только zip-файлы c префиксом "backup_"
-        backup_files = [f for f in os.listdir(backups_dir) 
-                        if f.startswith("backup_") and f.endswith(".zip")]
+        backup_files = list_backups(backups_dir)
         if not backup_files:
             print("Нет доступных бэкапов для восстановления.")
             return
-        
-        # Сортируем по дате из имени файла (или по дате изменения) — здесь по имени
-        backup_files.sort(reverse=True)  # самый новый будет в начале
         backup_file_name = backup_files[0]  # берём первый (самый свежий)
-    
+
     backup_path = os.path.join(backups_dir, backup_file_name)
 
     if not os.path.isfile(backup_path):
         print(f"Файл бэкапа не найден: {backup_path}")
         return
 
-    # Распаковка архива
-    with zipfile.ZipFile(backup_path, mode="r") as zf:
-        # Распаковка прямо в data_dir
-        zf.extractall(path=data_dir)
+    jobs = [job for job in _restore_jobs(backup_file_name, backups_dir)
+            if _selected(job[0], paths, patterns)]
+    # Недопустимый путь обнаруживается до того, как хоть один файл перезаписан
+    targets = {job[0]: _safe_target(data_dir, job[0]) for job in jobs}
 
-    print(f"Бэкап успешно восстановлен из {backup_path} в {data_dir}")
+    # ZipFile не рассчитан на одновременное чтение из разных потоков,
+    # поэтому у каждого потока свой набор открытых архивов
+    local = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
 
-if __name__ == "__main__":
+    def archive(archive_name):
+        archives = getattr(local, "archives", None)
+        if archives is None:
+            archives = local.archives = {}
+        if archive_name not in archives:
+            archive_path = os.path.join(backups_dir, archive_name)
+            if not os.path.isfile(archive_path):
+                raise FileNotFoundError(f"Не найден архив из цепочки снимков: {archive_path}")
+            archives[archive_name] = zipfile.ZipFile(archive_path, mode="r")
+            with opened_lock:
+                opened.append(archives[archive_name])
+        return archives[archive_name]
+
+    def restore_one(job):
+        rel_path, archive_name, member, expected_hash = job
+        target = targets[rel_path]
+        zf = archive(archive_name)
+        info = zf.getinfo(member)
+        if skip_identical and _is_identical(target, info):
+            return False
+        target_dir, target_name = os.path.split(target)
+        os.makedirs(target_dir, exist_ok=True)
+        tmp_path = os.path.join(target_dir, f".{target_name}.restore.tmp")
+        try:
+            with stage_metrics.measure("extract", info.file_size):
+                digest = new_digest()
+                with zf.open(info) as src, open(tmp_path, "wb") as dst:
+                    while True:
+                        block = src.read(COPY_BUFFER_SIZE)
+                        if not block:
+                            break
+                        digest.update(block)
+                        dst.write(block)
+            if expected_hash is not None and digest.hexdigest() != expected_hash:
+                raise ValueError(f"Содержимое {member} в {archive_name} не совпадает с описью снимка "
+                                 f"(файл {rel_path})")
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
+
+    def restore_or_error(job):
+        try:
+            return restore_one(job), None
+        except Exception as e:
+            return False, (job[0], e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(restore_or_error, jobs))
+    finally:
+        for zf in opened:
+            zf.close()
+
+    restored = sum(done for done, _ in results)
+    errors = [error for _, error in results if error is not None]
+    for rel_path, error in errors:
+        print(f"Не удалось восстановить {rel_path}: {error}")
+    if errors:
+        print(f"Бэкап {backup_path} восстановлен частично: восстановлено файлов: {restored}, "
+              f"с ошибками: {len(errors)} (эти файлы оставлены как были)")
+        raise errors[0][1]
+
+    print(f"Бэкап успешно восстановлен из {backup_path} в {data_dir} "
+          f"(восстановлено файлов: {restored}, без изменений: {len(jobs) - restored})")
+
+def cli(argv=None):
     # Вызов без параметров попытается найти и распаковать самый новый backup_*.zip
-    restore_backup()
+    parser = argparse.ArgumentParser(description="Восстановление data/ из бэкапа в backups/")
+    parser.add_argument("backup", nargs="?", help="имя архива (по умолчанию самый новый)")
+    parser.add_argument("--path", action="append", help="файл или поддерево относительно data/ (можно несколько)")
+    parser.add_argument("--pattern", action="append", help="glob-шаблон файлов (можно несколько)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="перезаписывать и файлы, совпадающие с архивом по размеру и CRC")
+    parser.add_argument("--workers", type=int, default=4, help="число потоков распаковки")
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    with stage_metrics.instrumented_run("restore_backup", args.metrics, args.profile):
+        restore_backup(args.backup, paths=args.path, patterns=args.pattern,
+                       skip_identical=not args.overwrite, workers=args.workers)
+
+if __name__ == "__main__":
+    cli()
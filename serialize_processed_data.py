@@ -1,7 +1,20 @@
+import io
 import os
-import json
-import chardet
+import re
+import codecs
+import contextlib
+import shutil
+import argparse
 import datetime
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from encoding_cache import EncodingCache
+from json_records import OUTPUT_FORMATS, RecordWriter, records_path, write_records, iter_records
+from processing_manifest import ProcessingManifest, content_hash, bytes_hash, new_digest, file_state
+import stage_metrics
+from stage_metrics import timed
+from transforms import DEFAULT_TRANSFORMS, available_transforms, register, transform_chain
 
 # Путь к корневой папке проекта
 PROJECT_ROOT = "project_root"
@@ -10,6 +23,32 @@ PROJECT_ROOT = "project_root"
 RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
 PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output")
+PROCESSED_DATA_PATH = os.path.join(OUTPUT_DIR, "processed_data.json")
+CACHE_DIR = os.path.join(PROJECT_ROOT, "cache")
+
+# Файл с кэшем результатов определения кодировок между запусками
+ENCODING_CACHE_PATH = os.path.join(CACHE_DIR, "encoding_cache.json")
+
+# Манифест инкрементальной обработки (что и из какого состояния уже обработано)
+MANIFEST_PATH = os.path.join(CACHE_DIR, "manifest.json")
+
+# Опись обработанных файлов (тот же формат, что у gather_file_info.py)
+FILE_INFO_PATH = os.path.join(OUTPUT_DIR, "file_info.json")
+
+# Хранилище текстов, вынесенных из processed_data.json (режим texts="blob")
+TEXT_STORE_DIR = os.path.join(OUTPUT_DIR, "texts")
+
+# Режимы хранения текстов в processed_data.json:
+#   "inline" — тексты целиком внутри JSON (как раньше);
+#   "blob"   — длинные тексты в сжатом хранилище TEXT_STORE_DIR (см. text_store.py)
+TEXT_MODES = ("inline", "blob")
+
+# Сколько потоков ввода-вывода приходится на один процесс-обработчик
+# в параллельном режиме (чтение/запись файлов ждут диск, а не CPU)
+IO_THREADS_PER_WORKER = 2
+
+# Размер порции (в символах) для потокового режима обработки
+STREAM_CHUNK_SIZE = 1024 * 1024
 
 ###############################################################################
 # Вспомогательная функция для определения кодировки файла
@@ -21,6 +60,52 @@ def detect_encoding(file_path, sample_size=4096):
     """
     with open(file_path, "rb") as f:
         raw_data = f.read(sample_size)
+    return detect_encoding_bytes(raw_data, complete=len(raw_data) < sample_size)
+
+# Метки порядка байтов (BOM) и соответствующие им кодировки.
+# UTF-32 проверяется раньше UTF-16: BOM UTF-32 LE начинается с BOM UTF-16 LE.
+_BOMS = [
+    (codecs.BOM_UTF8, "UTF-8-SIG"),
+    (codecs.BOM_UTF32_LE, "UTF-32"),
+    (codecs.BOM_UTF32_BE, "UTF-32"),
+    (codecs.BOM_UTF16_LE, "UTF-16"),
+    (codecs.BOM_UTF16_BE, "UTF-16"),
+]
+
+def sniff_encoding(raw_data, complete=False):
+    """
+    Дешёвые проверки до вызова chardet:
+    1) BOM в начале данных;
+    2) чисто ASCII-данные;
+    3) строгая проверка UTF-8 (неполный символ в самом конце фрагмента допускается,
+       ведь фрагмент мог обрезать его посередине; complete=True означает,
+       что фрагмент — это весь файл, и тогда такой символ считается ошибкой).
+    Возвращает кодировку или None, если без chardet не обойтись.
+    """
+    for bom, encoding in _BOMS:
+        if raw_data.startswith(bom):
+            return encoding
+    if raw_data.isascii():
+        return "ascii"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(raw_data, final=complete)
+    except UnicodeDecodeError:
+        return None
+    return "utf-8"
+
+@timed("detect_encoding", size=lambda encoding, raw_data, *args: len(raw_data))
+def detect_encoding_bytes(raw_data, complete=False):
+    """
+    То же, что detect_encoding(), но по уже прочитанному фрагменту байтов.
+    Используется в процессах-обработчиках, которым файл передаётся целиком.
+    Сначала пробует sniff_encoding(), chardet вызывается только если он не помог.
+    """
+    encoding = sniff_encoding(raw_data, complete)
+    if encoding:
+        return encoding
+    # Импорт по требованию: chardet загружается долго, а при попаданиях
+    # в кэш кодировок и для ASCII/UTF-8 не нужен вовсе
+    import chardet
     result = chardet.detect(raw_data)
     encoding = result["encoding"]
     # Если chardet не смог уверенно определить, подставим 'utf-8' по умолчанию
@@ -31,18 +116,457 @@ def detect_encoding(file_path, sample_size=4096):
 ###############################################################################
 # Вспомогательная функция для преобразования: upper -> lower, lower -> upper
 ###############################################################################
+# Кодировки, в которых байты 0x00-0x7F означают те же символы, что и в ASCII:
+# для чисто ASCII-данных в них регистр можно менять прямо в байтах
+ASCII_COMPATIBLE_ENCODINGS = frozenset([
+    "ascii", "utf-8", "iso8859-1", "iso8859-5", "iso8859-15",
+    "cp1250", "cp1251", "cp1252", "koi8-r", "mac-cyrillic",
+])
+
+@functools.lru_cache(maxsize=None)
+def _titlecase_pattern():
+    """
+    Регулярное выражение для символов, которые не являются ни заглавными,
+    ни строчными, но имеют заглавную форму (титульные, например 'ǅ').
+    str.swapcase() оставляет их как есть, а swap_case() переводит в upper().
+    Строится один раз при первом обращении.
+    """
+    chars = [char for char in map(chr, range(0x110000))
+             if not char.isupper() and not char.islower() and char.upper() != char]
+    return re.compile("[" + re.escape("".join(chars)) + "]")
+
+@register("swap_case", description="меняет регистр: строчные <-> заглавные")
+@timed("swap_case", size=lambda result, text: len(text))
 def swap_case(text):
     """
     Меняем регистр:
     - заглавные буквы -> строчные
     - строчные -> заглавные
+
+    Работает через встроенный str.swapcase() с двумя поправками,
+    чтобы результат посимвольно совпадал с char.lower()/char.upper():
+    - swapcase() учитывает контекст финальной сигмы ('Σ' -> 'ς'), а посимвольный
+      lower() всегда даёт 'σ'. Других источников 'ς' в результате нет,
+      поэтому достаточно заменить все 'ς' на 'σ';
+    - титульные символы swapcase() не трогает, их переводим в upper() отдельно.
+    """
+    result = text.swapcase()
+    if text.isascii():
+        return result
+    if "\u03c2" in result:
+        result = result.replace("\u03c2", "\u03c3")
+    titlecase = _titlecase_pattern()
+    if titlecase.search(result):
+        result = titlecase.sub(lambda match: match.group().upper(), result)
+    return result
+
+def swap_case_bytes(raw_data, encoding):
+    """
+    То же, что swap_case(), но для байтов в кодировке encoding.
+    Возвращает результат в UTF-8.
+
+    Быстрый путь: чисто ASCII-данные в ASCII-совместимой кодировке
+    обрабатываются bytes.swapcase() без декодирования. Latin-1 и прочие
+    однобайтовые кодировки так обработать нельзя ('ÿ' -> 'Ÿ', 'ß' -> 'SS'
+    выходят за пределы кодировки), поэтому они декодируются и идут через swap_case().
     """
-    return "".join(char.lower() if char.isupper() else char.upper() for char in text)
+    if raw_data.isascii() and codecs.lookup(encoding).name in ASCII_COMPATIBLE_ENCODINGS:
+        return raw_data.swapcase()
+    return swap_case(raw_data.decode(encoding, errors="replace")).encode("utf-8")
 
 ###############################################################################
 # 1. Чтение файлов из data/raw/, преобразование и сохранение в data/processed/
 ###############################################################################
-def process_files():
+def _list_raw_files():
+    """
+    Возвращает имена файлов из data/raw/ (директории пропускаются).
+    """
+    return [filename for filename in os.listdir(RAW_DIR)
+            if os.path.isfile(os.path.join(RAW_DIR, filename))]
+
+def _processed_filename(filename):
+    """
+    Формирует имя выходного файла: example.txt -> example_processed.txt
+    """
+    base, ext = os.path.splitext(filename)
+    return f"{base}_processed{ext}"
+
+@timed("read", size=lambda result, raw_path: len(result[0]))
+def _read_raw(raw_path):
+    """
+    Считывает сырой файл целиком в байтах (этап ввода-вывода).
+    Возвращает (байты, состояние файла для манифеста — см. file_state()):
+    fstat берётся до чтения, хэш — по уже прочитанным байтам,
+    так что для манифеста файл второй раз не читается.
+    """
+    with open(raw_path, "rb") as f:
+        raw_stat = os.fstat(f.fileno())
+        raw_data = f.read()
+    return raw_data, file_state(raw_stat, bytes_hash(raw_data))
+
+def _transform_raw(raw_data, encoding=None, sample_size=4096, transforms=DEFAULT_TRANSFORMS):
+    """
+    CPU-этап: определяет кодировку, декодирует и преобразует содержимое
+    цепочкой transforms (имена из реестра transforms.py, по умолчанию swap_case).
+    Если encoding не передан (нет в кэше), он определяется по первым
+    sample_size байтам — как в detect_encoding().
+    Переводы строк приводятся к '\n' так же, как при чтении в текстовом режиме.
+    Возвращает кортеж (encoding, original_text, processed_text).
+    """
+    if encoding is None:
+        encoding = detect_encoding_bytes(raw_data[:sample_size], complete=len(raw_data) < sample_size)
+    original_text = raw_data.decode(encoding, errors="replace")
+    original_text = original_text.replace("\r\n", "\n").replace("\r", "\n")
+    return encoding, original_text, transform_chain(transforms).apply(original_text)
+
+def _unlink_if_shared(processed_path):
+    """
+    Удаляет выходной файл, если он — жёсткая ссылка, общая с другими
+    (режим дедупликации). Иначе запись "на месте" изменила бы и файлы-дубликаты.
+    """
+    try:
+        if os.stat(processed_path).st_nlink > 1:
+            os.remove(processed_path)
+    except FileNotFoundError:
+        pass
+
+@timed("write", size=lambda result, processed_path, processed_text: len(processed_text))
+def _write_processed(processed_path, processed_text):
+    """
+    Сохраняет обработанное содержимое в UTF-8 (этап ввода-вывода).
+    Возвращает os.stat_result записанного файла: fstat по открытому
+    дескриптору, без отдельного обращения к файлу по пути.
+    """
+    _unlink_if_shared(processed_path)
+    with open(processed_path, "w", encoding="utf-8") as f:
+        f.write(processed_text)
+        f.flush()
+        return os.fstat(f.fileno())
+
+def _process_one(filename, encoding=None, transform=_transform_raw):
+    """
+    Полный цикл для одного файла: чтение -> преобразование -> запись.
+    encoding — кодировка из кэша (None, если её нужно определить).
+    transform позволяет вынести CPU-этап в пул процессов.
+    Возвращает кортеж (запись, кодировка).
+    Ошибка в одном файле не прерывает обработку остальных: она печатается,
+    а вместо записи возвращается (None, None).
+    """
+    raw_path = os.path.join(RAW_DIR, filename)
+    processed_filename = _processed_filename(filename)
+    try:
+        raw_data, raw_state = _read_raw(raw_path)
+        encoding, original_text, processed_text = transform(raw_data, encoding)
+        stats = _write_processed(os.path.join(PROCESSED_DIR, processed_filename), processed_text)
+    except Exception as e:
+        print(f"Ошибка при обработке файла {raw_path}: {e}")
+        return None, None
+
+    return _set_file_stats({
+        "filename": processed_filename,
+        "original_text": original_text,
+        "processed_text": processed_text,
+        "_raw": raw_state
+    }, stats), encoding
+
+class _HashingReader(io.RawIOBase):
+    """
+    Двоичный поток поверх открытого файла, попутно считающий хэш
+    всех прочитанных байтов (для манифеста в потоковом режиме).
+    """
+    def __init__(self, raw_file, digest):
+        self._file = raw_file
+        self.digest = digest
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+def _stream_ascii(src, processed_path, chunk_size, digest):
+    """
+    Потоковая обработка файла, определённого как ASCII: порции читаются
+    из открытого двоичного src и пишутся в байтах через swap_case_bytes(),
+    без декодирования; прочитанные байты попутно добавляются в хэш digest.
+    Переводы строк нормализуются так же, как в текстовом режиме open(),
+    с учётом '\r\n', разрезанного границей порций.
+    Возвращает os.stat_result записанного файла.
+    """
+    newline = os.linesep.encode("ascii")
+    _unlink_if_shared(processed_path)
+    with open(processed_path, "wb") as dst:
+        pending_cr = b""
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            chunk = pending_cr + chunk
+            pending_cr = b"\r" if chunk.endswith(b"\r") else b""
+            if pending_cr:
+                chunk = chunk[:-1]
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            if newline != b"\n":
+                chunk = chunk.replace(b"\n", newline)
+            dst.write(swap_case_bytes(chunk, "ascii"))
+        if pending_cr:
+            dst.write(newline)
+        dst.flush()
+        return os.fstat(dst.fileno())
+
+@timed("stream_file")
+def _stream_one(filename, chunk_size=STREAM_CHUNK_SIZE, encoding=None, transforms=DEFAULT_TRANSFORMS):
+    """
+    Потоковая обработка одного файла: декодирование, преобразование и запись
+    идут порциями по chunk_size символов, поэтому файл целиком в память не попадает.
+    Многобайтовые символы и '\r\n' на границе порций корректно обрабатывает
+    инкрементальный декодер текстового режима open().
+    Порции проходят цепочку transforms; stateful-преобразования получают
+    остаток через flush() в конце файла.
+    Хэш содержимого для манифеста считается по ходу того же чтения.
+    Возвращает кортеж (запись без текстов — только имя файла, кодировка)
+    или (None, None) при ошибке.
+    """
+    raw_path = os.path.join(RAW_DIR, filename)
+    processed_filename = _processed_filename(filename)
+    processed_path = os.path.join(PROCESSED_DIR, processed_filename)
+    digest = new_digest()
+    try:
+        with open(raw_path, "rb") as raw_file:
+            raw_stat = os.fstat(raw_file.fileno())
+            if encoding is None:
+                sample = raw_file.read(4096)
+                raw_file.seek(0)
+                encoding = detect_encoding_bytes(sample, complete=len(sample) < 4096)
+            if transforms == DEFAULT_TRANSFORMS and codecs.lookup(encoding).name == "ascii":
+                stats = _stream_ascii(raw_file, processed_path, chunk_size, digest)
+            else:
+                session = transform_chain(transforms).start()
+                _unlink_if_shared(processed_path)
+                # Текстовый режим поверх подсчёта хэша: декодирование и переводы
+                # строк — как у open(raw_path, "r", encoding=...)
+                src = io.TextIOWrapper(io.BufferedReader(_HashingReader(raw_file, digest)),
+                                       encoding=encoding, errors="replace")
+                with open(processed_path, "w", encoding="utf-8") as dst:
+                    while True:
+                        chunk = src.read(chunk_size)
+                        if not chunk:
+                            break
+                        dst.write(session.feed(chunk))
+                    dst.write(session.flush())
+                    dst.flush()
+                    stats = os.fstat(dst.fileno())
+    except Exception as e:
+        print(f"Ошибка при обработке файла {raw_path}: {e}")
+        return None, None
+
+    return _set_file_stats({
+        "filename": processed_filename,
+        "_raw": file_state(raw_stat, digest.hexdigest())
+    }, stats), encoding
+
+def _iter_parallel(filenames, encodings, workers, io_workers=None, transforms=DEFAULT_TRANSFORMS):
+    """
+    Параллельная обработка: чтение и запись выполняются в пуле потоков,
+    а определение кодировки и преобразование — в пуле из workers процессов.
+    Порядок записей совпадает с порядком filenames (как при обычном запуске).
+    """
+    if io_workers is None:
+        io_workers = workers * IO_THREADS_PER_WORKER
+
+    with ProcessPoolExecutor(max_workers=workers) as cpu_pool, \
+            ThreadPoolExecutor(max_workers=io_workers) as io_pool:
+        def transform(raw_data, encoding):
+            return cpu_pool.submit(_transform_raw, raw_data, encoding, 4096, transforms).result()
+
+        yield from io_pool.map(lambda filename, encoding: _process_one(filename, encoding, transform),
+                               filenames, encodings)
+
+def _iter_parallel_streaming(filenames, encodings, workers, chunk_size, transforms=DEFAULT_TRANSFORMS):
+    """
+    Параллельный потоковый режим: каждый процесс сам читает, преобразует
+    и пишет свой файл порциями, в основной процесс возвращаются только имена.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as cpu_pool:
+        yield from cpu_pool.map(_stream_one, filenames, [chunk_size] * len(filenames), encodings,
+                                [transforms] * len(filenames))
+
+def _group_by_content(filenames, io_workers=IO_THREADS_PER_WORKER):
+    """
+    Хэширует файлы из data/raw/ (в пуле потоков) и возвращает пару словарей:
+    {имя файла: имя первого файла с таким же содержимым} и {имя файла: хэш}.
+    Файлы, которые не удалось прочитать, считаются уникальными (и без хэша).
+    """
+    def file_hash(filename):
+        try:
+            return content_hash(os.path.join(RAW_DIR, filename))
+        except OSError:
+            return None
+
+    first_by_hash = {}
+    primary_of = {}
+    digests = {}
+    with ThreadPoolExecutor(max_workers=io_workers) as pool:
+        for filename, digest in zip(filenames, pool.map(file_hash, filenames)):
+            if digest is None:
+                primary_of[filename] = filename
+            else:
+                primary_of[filename] = first_by_hash.setdefault(digest, filename)
+                digests[filename] = digest
+    return primary_of, digests
+
+def _link_duplicate(primary_record, filename, digest=None):
+    """
+    Создаёт результат для файла-дубликата как жёсткую ссылку на уже записанный
+    результат первого файла с тем же содержимым (если файловая система не умеет
+    жёсткие ссылки — как копию). Возвращает запись дубликата или None при ошибке.
+    digest — хэш содержимого из _group_by_content(): дубликат не читается,
+    для манифеста нужен только его stat.
+    """
+    processed_filename = _processed_filename(filename)
+    source = os.path.join(PROCESSED_DIR, primary_record["filename"])
+    target = os.path.join(PROCESSED_DIR, processed_filename)
+    try:
+        raw_stat = os.stat(os.path.join(RAW_DIR, filename))
+        if os.path.lexists(target):
+            os.remove(target)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+    except OSError as e:
+        print(f"Ошибка при обработке файла {os.path.join(RAW_DIR, filename)}: {e}")
+        return None
+    # Размер и дату дубликата _merge_records() возьмёт с его собственного файла
+    record = dict(primary_record, filename=processed_filename)
+    for key in ("file_size_bytes", "last_modified", "_stat", "_raw"):
+        record.pop(key, None)
+    if digest is not None:
+        record["_raw"] = file_state(raw_stat, digest)
+    return record
+
+def _expand_duplicates(filenames, primary_of, primary_records, digests=None):
+    """
+    Разворачивает записи уникальных файлов (в порядке их первого появления)
+    в записи для всех filenames: дубликаты получают ссылку на результат первого файла.
+    Запись первого файла держится в памяти только до его последнего дубликата.
+    digests — хэши содержимого из _group_by_content() (для манифеста).
+    """
+    last_use = {}
+    for index, filename in enumerate(filenames):
+        last_use[primary_of[filename]] = index
+
+    current = {}
+    for index, filename in enumerate(filenames):
+        primary = primary_of[filename]
+        if primary == filename:
+            record = next(primary_records)
+            current[primary] = record
+        else:
+            record = current.get(primary)
+            if record is not None:
+                record = _link_duplicate(record, filename, (digests or {}).get(filename))
+        if last_use[primary] == index:
+            current.pop(primary, None)
+        yield record
+
+def iter_processed_files(workers=1, io_workers=None, streaming=False, chunk_size=STREAM_CHUNK_SIZE,
+                         cache=None, filenames=None, dedup=False, pipeline=None, with_stat=False,
+                         transforms=DEFAULT_TRANSFORMS, with_raw_state=False):
+    """
+    Генератор-вариант process_files(): записи выдаются по одной по мере обработки,
+    так что в памяти не копится список по всему корпусу.
+
+    При streaming=True файлы обрабатываются порциями по chunk_size символов,
+    а записи содержат только 'filename' (без original_text/processed_text),
+    поэтому пиковая память не зависит ни от размера, ни от числа файлов.
+
+    cache — EncodingCache: для неизменившихся файлов кодировка берётся из него,
+    а новые результаты определения сохраняются в него после обработки.
+
+    filenames — имена файлов из data/raw/ для обработки (по умолчанию все).
+
+    dedup=True — дедупликация по содержимому: входные файлы хэшируются,
+    каждое уникальное содержимое преобразуется один раз, а для побайтно
+    одинаковых файлов результат создаётся жёсткой ссылкой (см. _link_duplicate()).
+    Записи при этом выдаются для каждого имени файла, как и без дедупликации.
+
+    pipeline — StagedPipeline (см. staged_pipeline.py): обработка идёт
+    конвейером asyncio с отдельными этапами чтения, определения кодировки,
+    преобразования, записи и stat; workers и io_workers тогда не используются.
+    Несовместим с streaming.
+
+    transforms — цепочка преобразований из реестра transforms.py,
+    применяемая за один проход по файлу (по умолчанию только swap_case).
+
+    Записи содержат размер и дату изменения результата, полученные
+    при записи (fstat). with_stat=True оставляет в записи и сам
+    os.stat_result под ключом "_stat" — для описи файлов в main().
+    with_raw_state=True оставляет под ключом "_raw" состояние исходного файла
+    (размер, mtime, хэш — см. file_state()), полученное при чтении, — для манифеста.
+    """
+    # Кортеж: цепочка кэшируется по нему, и с ним работает быстрый путь swap_case;
+    # неизвестное имя — ошибка сразу, а не в каждом файле
+    transforms = tuple(transforms)
+    transform_chain(transforms)
+    if filenames is None:
+        filenames = _list_raw_files()
+
+    all_filenames = filenames
+    primary_of = digests = None
+    if dedup:
+        primary_of, digests = _group_by_content(filenames)
+        filenames = [filename for filename in filenames if primary_of[filename] == filename]
+
+    if cache is not None:
+        keys = [cache.key(os.path.join(RAW_DIR, filename)) for filename in filenames]
+        encodings = [cache.get(key) for key in keys]
+    else:
+        keys = encodings = [None] * len(filenames)
+
+    if pipeline is not None and streaming:
+        raise ValueError("Конвейер (pipeline) не поддерживает потоковый режим")
+
+    if pipeline is not None:
+        results = pipeline.run(filenames, encodings, transforms)
+    elif workers > 1 and streaming:
+        results = _iter_parallel_streaming(filenames, encodings, workers, chunk_size, transforms)
+    elif workers > 1:
+        results = _iter_parallel(filenames, encodings, workers, io_workers, transforms)
+    elif streaming:
+        results = (_stream_one(filename, chunk_size, encoding, transforms)
+                   for filename, encoding in zip(filenames, encodings))
+    else:
+        transform = functools.partial(_transform_raw, transforms=transforms)
+        results = (_process_one(filename, encoding, transform)
+                   for filename, encoding in zip(filenames, encodings))
+
+    def primary_records():
+        for key, (record, encoding) in zip(keys, results):
+            if record is not None and cache is not None:
+                cache.put(key, encoding)
+            yield record
+
+    records = primary_records()
+    if primary_of is not None:
+        records = _expand_duplicates(all_filenames, primary_of, records, digests)
+
+    for record in records:
+        if record is not None:
+            if not with_stat:
+                record.pop("_stat", None)
+            if not with_raw_state:
+                record.pop("_raw", None)
+            yield record
+
+    if cache is not None:
+        cache.save()
+
+def process_files(workers=1, io_workers=None, cache=None, dedup=False, transforms=DEFAULT_TRANSFORMS):
     """
     1) Считывает все файлы из data/raw/.
     2) Определяет кодировку и читает исходный текст.
@@ -50,51 +574,22 @@ def process_files():
     4) Сохраняет с суффиксом _processed в data/processed/.
     Возвращает список словарей:
        [ { 'filename': ..., 'original_text': ..., 'processed_text': ... }, ... ]
-    """
-    processed_info = []
 
-    # Получаем список файлов в raw
-    files_in_raw = os.listdir(RAW_DIR)
-    for filename in files_in_raw:
-        raw_path = os.path.join(RAW_DIR, filename)
-        
-        # Пропускаем, если вдруг попадутся не-файлы (директории)
-        if not os.path.isfile(raw_path):
-            continue
-        
-        # Определяем кодировку
-        encoding = detect_encoding(raw_path)
-        
-        # Считываем содержимое
-        with open(raw_path, "r", encoding=encoding, errors="replace") as f:
-            original_text = f.read()
-        
-        # Преобразуем
-        processed_text = swap_case(original_text)
-        
-        # Формируем имя выходного файла
-        base, ext = os.path.splitext(filename)
-        processed_filename = f"{base}_processed{ext}"
-        processed_path = os.path.join(PROCESSED_DIR, processed_filename)
-        
-        # Сохраняем обработанное содержимое
-        # Сохраняем в UTF-8 (или в ту же кодировку, если нужно).
-        with open(processed_path, "w", encoding="utf-8") as f:
-            f.write(processed_text)
-
-        # Сохраняем в список, чтобы потом сериализовать в JSON
-        processed_info.append({
-            "filename": processed_filename,
-            "original_text": original_text,
-            "processed_text": processed_text
-        })
-    
-    return processed_info
+    Параметр workers:
+      - 1 (по умолчанию): файлы обрабатываются последовательно.
+      - >1: параллельный режим с пулом из workers процессов и
+        io_workers потоков ввода-вывода (по умолчанию workers * IO_THREADS_PER_WORKER).
+    cache — необязательный EncodingCache, dedup — дедупликация по содержимому,
+    transforms — цепочка преобразований (см. iter_processed_files()).
+    Файлы, которые не удалось обработать, пропускаются.
+    """
+    return list(iter_processed_files(workers=workers, io_workers=io_workers, cache=cache, dedup=dedup,
+                                     transforms=transforms))
 
 ###############################################################################
 # 2. Сериализация данных в один JSON-файл processed_data.json
 ###############################################################################
-def serialize_processed_data():
+def serialize_processed_data(output_format="json"):
     """
     1) Для всех файлов из data/processed/ собираем сведения:
         - Имя файла
@@ -103,6 +598,8 @@ def serialize_processed_data():
         - Размер файла (байты)
         - Дата последнего изменения (строка в удобном формате)
     2) Записываем итоговый список в output/processed_data.json
+       (или processed_data.jsonl при output_format="jsonl"), по одной записи
+       по мере чтения файлов.
     """
     # Для удобства: повторно вызываем process_files(), чтобы:
     #   - обеспечить чтение новых файлов
@@ -111,8 +608,15 @@ def serialize_processed_data():
     
     # Собираем актуальный список файлов из папки processed
     processed_files = os.listdir(PROCESSED_DIR)
-    data_for_json = []
-    
+    output_file_path = records_path(PROCESSED_DATA_PATH, output_format)
+    write_records(output_file_path, _iter_processed_dir_records(processed_files), output_format)
+
+    print(f"JSON-файл успешно записан: {output_file_path}")
+
+def _iter_processed_dir_records(processed_files):
+    """
+    Генератор записей для serialize_processed_data(): читает файлы из data/processed/ по одному.
+    """
     for filename in processed_files:
         processed_path = os.path.join(PROCESSED_DIR, filename)
         if not os.path.isfile(processed_path):
@@ -131,62 +635,461 @@ def serialize_processed_data():
         # Но мы уже потеряли "original_text" при записи файла, ведь записан только processed_text.
         # Поэтому "original_text" берём из сохранённой структуры process_files() (см. ниже).
         
-        data_for_json.append({
+        yield {
             "filename": filename,
             "processed_text": processed_content,
             "file_size_bytes": file_size,
             "last_modified": modification_time.strftime("%Y-%m-%d %H:%M:%S")
-        })
+        }
 
-    # Запишем всё в JSON
-    output_file_path = os.path.join(OUTPUT_DIR, "processed_data.json")
-    with open(output_file_path, "w", encoding="utf-8") as json_f:
-        json.dump(data_for_json, json_f, ensure_ascii=False, indent=4)
 
-    print(f"JSON-файл успешно записан: {output_file_path}")
+def _set_file_stats(record, file_stat):
+    """
+    Дополняет запись размером и датой изменения по уже полученному os.stat_result.
+    Сам stat_result сохраняется под служебным ключом "_stat" (в JSON не попадает).
+    """
+    modification_time = datetime.datetime.fromtimestamp(file_stat.st_mtime)
+    record["file_size_bytes"] = file_stat.st_size
+    record["last_modified"] = modification_time.strftime("%Y-%m-%d %H:%M:%S")
+    record["_stat"] = file_stat
+    return record
+
+@timed("stat")
+def _add_file_stats(record):
+    """
+    Дополняет запись размером и датой изменения обработанного файла.
+    """
+    processed_path = os.path.join(PROCESSED_DIR, record["filename"])
+    try:
+        return _set_file_stats(record, os.stat(processed_path))
+    except FileNotFoundError:
+        return record
+
+def _load_previous_records(output_file_path, sharded=False):
+    """
+    Загружает записи прошлого запуска из processed_data.json(l) в словарь {filename: запись}.
+    Файл читается потоково, по одной записи; sharded=True — из шардов
+    директории output_file_path (см. sharded_output.py).
+    Если файла нет или он повреждён — возвращает пустой словарь.
+    """
+    if sharded:
+        from sharded_output import load_index, iter_sharded_records
+        if load_index(output_file_path) is None:
+            return {}
+        records = iter_sharded_records(output_file_path)
+    elif os.path.isfile(output_file_path):
+        records = iter_records(output_file_path)
+    else:
+        return {}
+    try:
+        return {record["filename"]: record for record in records}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def _remove_stale_outputs(manifest, filenames):
+    """
+    Удаляет из data/processed/ результаты для исходных файлов, которых больше нет.
+    Возвращает список имён удалённых результатов.
+    """
+    removed = manifest.removed(filenames)
+    for name, entry in removed:
+        processed_path = os.path.join(PROCESSED_DIR, entry["output"])
+        if os.path.isfile(processed_path):
+            os.remove(processed_path)
+        manifest.forget(name)
+    return [entry["output"] for _, entry in removed]
+
+def _merge_records(filenames, reused, processed_records, manifest):
+    """
+    Собирает итоговые записи в порядке filenames: неизменившиеся берутся из reused,
+    остальные — из генератора processed_records (в том же порядке).
+    Манифест обновляется по ходу: успешно обработанные файлы записываются,
+    а неудавшиеся забываются, чтобы в следующий раз обработать их снова.
+    """
+    pending = next(processed_records, None)
+    for filename in filenames:
+        if filename in reused:
+            yield reused[filename]
+            continue
+        processed_filename = _processed_filename(filename)
+        if pending is not None and pending["filename"] == processed_filename:
+            manifest.record(filename, os.path.join(RAW_DIR, filename), processed_filename,
+                            pending.pop("_raw", None))
+            # Обычно размер и дата уже взяты при записи (fstat), stat нужен только дубликатам
+            yield pending if "file_size_bytes" in pending else _add_file_stats(pending)
+            pending = next(processed_records, None)
+        else:
+            manifest.forget(filename)
+
+
+def _with_file_info(records, file_info_writer=None):
+    """
+    Убирает из записей служебный ключ "_stat" перед записью в JSON.
+    С file_info_writer попутно пишет для каждой записи запись описи файлов:
+    os.stat_result берётся из "_stat" (получен при записи файла),
+    stat вызывается только для перенесённых без изменений файлов.
+    Записи, которые file_info_writer не запишет (шард не переписывается,
+    см. ShardedWriter.wants()), пропускаются без stat.
+    """
+    if file_info_writer is not None:
+        # Импорт здесь: опись нужна только в этом режиме
+        from gather_file_info import FileInfo
+
+    for record in records:
+        file_stat = record.pop("_stat", None)
+        if file_info_writer is None or not file_info_writer.wants(record):
+            yield record
+            continue
+        full_path = os.path.join(PROCESSED_DIR, record["filename"])
+        if file_stat is None:
+            try:
+                file_stat = os.stat(full_path)
+            except FileNotFoundError:
+                yield record
+                continue
+        file_info_writer.write(FileInfo.from_stat(record["filename"], full_path, file_stat).to_dict())
+        yield record
+
+
+def _remember_records(records, remembered):
+    """
+    Попутно складывает записанные записи в словарь {filename: запись}
+    (для следующего запуска в том же процессе, см. параметр state в main()).
+    """
+    for record in records:
+        remembered[record["filename"]] = record
+        yield record
+
+
+def _externalize_texts(records, text_store, referenced_blobs):
+    """
+    Выносит длинные тексты записей в хранилище (см. TextStore.externalize())
+    и собирает в referenced_blobs идентификаторы всех использованных текстов,
+    включая тексты перенесённых без изменений записей.
+    """
+    from text_store import blob_ids
+
+    for record in records:
+        text_store.externalize(record)
+        referenced_blobs.update(blob_ids(record))
+        yield record
+
+
+def _print_transform_stats(transforms, in_workers):
+    """
+    Печатает пропускную способность преобразований цепочки в этом процессе.
+    """
+    if in_workers:
+        print("Статистика преобразований копится в процессах-обработчиках (workers > 1) и не собирается")
+        return
+    for row in transform_chain(transforms).report():
+        speed = f"{row['mchars_per_second']:.2f} млн симв./с" if row["mchars_per_second"] else "—"
+        print(f"  {row['transform']:<28} вызовов: {row['calls']:<8} {row['seconds']:.4f} с  {speed}")
 
 
 ###############################################################################
 # Объединяем логику:
 ###############################################################################
-def main():
+def main(workers=1, streaming=False, chunk_size=STREAM_CHUNK_SIZE,
+         use_encoding_cache=True, hash_content=False, full=False, output_format="json", dedup=False,
+         pipeline=False, stage_concurrency=None, queue_size=None, file_info=False,
+         texts="inline", inline_threshold=None, changed_hint=None, transforms=DEFAULT_TRANSFORMS,
+         transform_stats=False, partition=None, shard_count=None, state=None):
     """
     1. Обработка сырых файлов (raw) -> сохранение обработанных (processed).
     2. Сериализация в один JSON-файл в output/.
     
     Чтобы отобразить в JSON ещё и 'original_text', 
     стоит сохранять результаты process_files() и использовать их.
+
+    workers — число процессов для обработки (см. process_files()).
+    streaming, chunk_size — потоковый режим (см. iter_processed_files()):
+    тексты в JSON не попадают, только имя, размер и дата изменения.
+    use_encoding_cache, hash_content — кэш кодировок в ENCODING_CACHE_PATH
+    (hash_content добавляет к ключу хэш начала файла, см. EncodingCache).
+
+    Обработка инкрементальная (см. ProcessingManifest): заново обрабатываются
+    только новые и изменившиеся файлы, результаты удалённых исходников стираются,
+    а записи неизменившихся файлов переносятся из прошлого processed_data.json.
+    full=True — полная пересборка без учёта манифеста.
+    output_format — "json" (массив, по умолчанию) или "jsonl" (JSON Lines).
+    dedup — дедупликация одинаковых входных файлов среди обрабатываемых
+    (см. iter_processed_files()).
+    pipeline=True — обработка конвейером asyncio (см. StagedPipeline):
+    stage_concurrency — {этап: число задач}, queue_size — ёмкость очередей
+    между этапами. Запись JSON идёт параллельно с обработкой.
+    file_info=True — за тот же проход записать и опись файлов file_info.json(l)
+    (как gather_file_info.py, но без повторного обхода data/processed/):
+    размеры и даты берутся из fstat, полученного при записи результата.
+    texts="blob" — тексты длиннее inline_threshold символов выносятся
+    в сжатое хранилище TEXT_STORE_DIR, а в JSON остаётся ссылка
+    (original_text_blob / processed_text_blob); читать такие записи
+    удобно через text_store.iter_records_lazy().
+    changed_hint — множество имён файлов из data/raw/, о которых известно,
+    что они могли измениться (режим наблюдения, см. watch_raw.py): остальные
+    файлы, уже учтённые в манифесте, переносятся без stat и сравнения.
+    transforms — цепочка преобразований из реестра transforms.py;
+    transform_stats=True — напечатать пропускную способность каждого преобразования.
+    partition — вместо одного файла писать шарды с оглавлением в директории
+    output/processed_data/ (и output/file_info/): "hash" — по хэшу имени
+    на shard_count шардов, "date" — по дню изменения (см. sharded_output.py).
+    При инкрементальном запуске переписываются только шарды с изменившимися
+    записями; при workers > 1 шарды пишутся параллельно процессами.
+    state — словарь, который вызывающий передаёт в каждый следующий запуск
+    в том же процессе (режим наблюдения): в нём между запусками живут манифест
+    и записанные записи, поэтому processed_data.json не читается заново
+    и время обновления не растёт с размером корпуса из-за разбора JSON.
+    После ошибки state нужно очистить — тогда всё будет прочитано с диска.
     """
-    # 1) Обрабатываем файлы, получаем список словарей
-    processed_records = process_files()
-    
-    # 2) Преобразуем (дополняем) эти записи информацией о размере/датах и пишем в JSON
-    # Сейчас serialize_processed_data() считывает processed-файлы "с нуля".
-    # Если нужно в итоге *также* включить original_text в JSON, 
-    # давайте совместим подходы:
-    
-    # (a) Собираем данные о размерe и дате модификации
-    results_for_json = []
-    for record in processed_records:
-        # record = {"filename": ..., "original_text": ..., "processed_text": ...}
-        processed_path = os.path.join(PROCESSED_DIR, record["filename"])
-        if os.path.isfile(processed_path):
-            file_stat = os.stat(processed_path)
-            file_size = file_stat.st_size
-            modification_time = datetime.datetime.fromtimestamp(file_stat.st_mtime)
-            # Добавляем поля
-            record["file_size_bytes"] = file_size
-            record["last_modified"] = modification_time.strftime("%Y-%m-%d %H:%M:%S")
-        
-        results_for_json.append(record)
+    transforms = tuple(transforms)
+    transform_chain(transforms)  # неизвестное имя — ошибка сразу, до обработки
+    staged = None
+    if pipeline:
+        # Импорт по требованию: модуль нужен только в режиме конвейера
+        from staged_pipeline import StagedPipeline, DEFAULT_QUEUE_SIZE
+        staged = StagedPipeline(workers=workers, concurrency=stage_concurrency,
+                                queue_size=queue_size or DEFAULT_QUEUE_SIZE)
+
+    cache = None
+    if use_encoding_cache:
+        cache = EncodingCache(ENCODING_CACHE_PATH, use_content_hash=hash_content)
+
+    output_file_path = records_path(PROCESSED_DATA_PATH, output_format)
+    file_info_path = records_path(FILE_INFO_PATH, output_format) if file_info else None
+    if partition is not None:
+        # Импорт по требованию: шарды нужны только в этом режиме
+        from sharded_output import PARTITIONS, DEFAULT_SHARD_COUNT, ShardedWriter, shard_key, sharded_dir, load_index
+        if partition not in PARTITIONS:
+            raise ValueError(f"Неизвестный способ разбиения: {partition}")
+        if partition == "hash" and shard_count is None:
+            shard_count = DEFAULT_SHARD_COUNT
+        output_file_path = sharded_dir(output_file_path)
+        file_info_path = sharded_dir(file_info_path) if file_info else None
+    manifest = (state or {}).get("manifest") or ProcessingManifest(MANIFEST_PATH)
+    text_store = None
+    if texts == "blob":
+        # Импорт по требованию: хранилище нужно только в этом режиме
+        from text_store import TextStore, DEFAULT_INLINE_THRESHOLD
+        if inline_threshold is None:
+            inline_threshold = DEFAULT_INLINE_THRESHOLD
+        text_store = TextStore(TEXT_STORE_DIR, inline_threshold)
+    elif texts != "inline":
+        raise ValueError(f"Неизвестный режим хранения текстов: {texts}")
+
+    # Записи прошлого запуска переносятся как есть, поэтому смена режима
+    # хранения текстов требует полной пересборки
+    options = {"streaming": streaming, "output_format": output_format,
+               "texts": texts, "inline_threshold": inline_threshold, "transforms": list(transforms),
+               "partition": partition, "shard_count": shard_count}
+    if full or manifest.options != options:
+        manifest.reset(options)
+
+    # 1) Определяем, что изменилось с прошлого запуска
+    filenames = _list_raw_files()
+    removed_outputs = _remove_stale_outputs(manifest, filenames)
+    removed_count = len(removed_outputs)
+    if state and state.get("output") == (output_file_path, file_info_path, options):
+        previous_records = state["records"]
+    elif manifest.files:
+        previous_records = _load_previous_records(output_file_path, partition is not None)
+    else:
+        previous_records = {}
+    if state is not None:
+        # Пока запись не завершена, сохранённое состояние недействительно
+        state.clear()
+
+    reused = {}
+    changed = []
+    for filename in filenames:
+        processed_filename = _processed_filename(filename)
+        record = previous_records.get(processed_filename)
+        if (record is not None and changed_hint is not None
+                and filename not in changed_hint and filename in manifest.files):
+            reused[filename] = record
+        elif (record is not None
+                and manifest.is_unchanged(filename, os.path.join(RAW_DIR, filename))
+                and os.path.isfile(os.path.join(PROCESSED_DIR, processed_filename))):
+            reused[filename] = record
+        else:
+            changed.append(filename)
 
-    # (b) Записываем всё в JSON
-    output_file_path = os.path.join(OUTPUT_DIR, "processed_data.json")
-    with open(output_file_path, "w", encoding="utf-8") as json_f:
-        json.dump(results_for_json, json_f, ensure_ascii=False, indent=4)
+    # Шарды, которые придётся переписать: там, где лежали записи изменившихся
+    # и удалённых файлов (при разбиении по дате новый шард известен после обработки)
+    dirty = None
+    if partition is not None and reused:
+        dirty = set()
+        for processed_filename in [_processed_filename(f) for f in changed] + removed_outputs:
+            record = previous_records.get(processed_filename) or {"filename": processed_filename}
+            dirty.add(shard_key(record, partition, shard_count))
+    del previous_records
 
+    if partition is not None:
+        outputs_exist = (load_index(output_file_path) is not None
+                         and (file_info_path is None or load_index(file_info_path) is not None))
+    else:
+        outputs_exist = (os.path.isfile(output_file_path)
+                         and (file_info_path is None or os.path.isfile(file_info_path)))
+    if not changed and not removed_count and outputs_exist:
+        manifest.save()
+        if state is not None:
+            state.update(manifest=manifest,
+                         records={record["filename"]: record for record in reused.values()},
+                         output=(output_file_path, file_info_path, options))
+        print(f"Изменений нет, JSON-файл актуален: {output_file_path}")
+        return
+
+    # 2) Обрабатываем только изменившиеся файлы: записи приходят по одной из генератора
+    processed_records = iter_processed_files(workers=workers, streaming=streaming,
+                                             chunk_size=chunk_size, cache=cache,
+                                             filenames=changed, dedup=dedup, pipeline=staged,
+                                             with_stat=file_info, transforms=transforms,
+                                             with_raw_state=True)
+    if dirty is not None and partition == "date":
+        # Дата изменения результата известна только после записи: записи
+        # изменившихся файлов собираются в память, чтобы заранее знать их шарды
+        processed_records = [record if "file_size_bytes" in record else _add_file_stats(record)
+                             for record in processed_records]
+        dirty.update(shard_key(record, partition, shard_count) for record in processed_records)
+        processed_records = iter(processed_records)
+
+    # 3) Сводим новые записи с перенесёнными и сразу пишем в JSON,
+    # не накапливая весь список в памяти
+    records = _merge_records(filenames, reused, processed_records, manifest)
+    referenced_blobs = set()
+    if text_store is not None:
+        records = _externalize_texts(records, text_store, referenced_blobs)
+    written_records = None
+    if state is not None:
+        # Те же объекты записей: служебные ключи из них удалит _with_file_info()
+        written_records = {}
+        records = _remember_records(records, written_records)
+    if partition is not None:
+        with contextlib.ExitStack() as writers:
+            records_writer = writers.enter_context(
+                ShardedWriter(output_file_path, partition, shard_count, output_format, workers, dirty))
+            file_info_writer = None
+            if file_info:
+                file_info_writer = writers.enter_context(
+                    ShardedWriter(file_info_path, partition, shard_count, output_format, workers, dirty))
+            for record in _with_file_info(records, file_info_writer):
+                records_writer.write(record)
+        if file_info:
+            print(f"Файл с информацией о файлах создан: {file_info_path}")
+    elif file_info:
+        with RecordWriter(file_info_path, output_format) as file_info_writer:
+            write_records(output_file_path, _with_file_info(records, file_info_writer), output_format)
+        print(f"Файл с информацией о файлах создан: {file_info_path}")
+    else:
+        write_records(output_file_path, _with_file_info(records), output_format)
+    if partition is None:
+        # Вывод снова в одном файле: шарды прошлых запусков с --partition устарели
+        from sharded_output import remove_sharded, sharded_dir
+        remove_sharded(sharded_dir(output_file_path))
+        if file_info:
+            remove_sharded(sharded_dir(file_info_path))
+    if text_store is not None:
+        text_store.collect_garbage(referenced_blobs)
+    manifest.save()
+    if state is not None:
+        state.update(manifest=manifest, records=written_records,
+                     output=(output_file_path, file_info_path, options))
+
+    print(f"Обработано файлов: {len(changed)}, без изменений: {len(reused)}, "
+          f"удалено устаревших: {removed_count}")
+    if transform_stats:
+        _print_transform_stats(transforms, workers > 1)
     print(f"JSON-файл успешно записан: {output_file_path}")
 
 
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Обработка файлов из data/raw/ и сериализация в processed_data.json")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="число процессов для обработки (по умолчанию 1 — последовательно)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="обрабатывать файлы порциями, не держа их целиком в памяти")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="размер порции в символах для потокового режима")
+    parser.add_argument("--no-encoding-cache", action="store_true",
+                        help="не использовать кэш определённых кодировок")
+    parser.add_argument("--hash-content", action="store_true",
+                        help="проверять попадания в кэш кодировок по хэшу содержимого")
+    parser.add_argument("--full", action="store_true",
+                        help="полная пересборка: обработать все файлы, игнорируя манифест")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                        help="формат вывода: json (массив) или jsonl (по записи на строку)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="преобразовывать одинаковые по содержимому файлы один раз (жёсткие ссылки)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="обрабатывать конвейером asyncio: чтение, кодировка, преобразование, "
+                             "запись и stat идут параллельно")
+    parser.add_argument("--stage", action="append", default=[], metavar="ЭТАП=N",
+                        help="число одновременных задач на этапе конвейера, например read=8 "
+                             "(этапы: read, detect, transform, write, stat)")
+    parser.add_argument("--queue-size", type=int,
+                        help="ёмкость очередей между этапами конвейера")
+    parser.add_argument("--file-info", action="store_true",
+                        help="за тот же проход записать и file_info.json (без gather_file_info.py)")
+    parser.add_argument("--texts", choices=TEXT_MODES, default="inline",
+                        help="где хранить тексты: inline — в JSON, blob — длинные в сжатом хранилище output/texts/")
+    parser.add_argument("--transform", action="append", metavar="ИМЯ",
+                        help="преобразование текста (можно несколько — применяются по порядку "
+                             "за один проход; по умолчанию swap_case)")
+    parser.add_argument("--list-transforms", action="store_true",
+                        help="показать зарегистрированные преобразования и выйти")
+    parser.add_argument("--transform-stats", action="store_true",
+                        help="напечатать пропускную способность каждого преобразования")
+    parser.add_argument("--inline-threshold", type=int,
+                        help="в режиме blob тексты не длиннее N символов остаются в JSON")
+    parser.add_argument("--partition", choices=("hash", "date"),
+                        help="писать вывод шардами с оглавлением: по хэшу имени файла или по дню изменения")
+    parser.add_argument("--shards", type=int,
+                        help="число шардов при --partition hash (по умолчанию 16)")
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.list_transforms:
+        for name, stateless, description in available_transforms():
+            print(f"{name:<28} {'stateless' if stateless else 'stateful ':<10} {description}")
+        parser.exit()
+    known_transforms = {name for name, _, _ in available_transforms()}
+    for name in args.transform or ():
+        if name not in known_transforms:
+            parser.error(f"неизвестное преобразование: {name} (см. --list-transforms)")
+    if args.shards is not None and (args.partition != "hash" or args.shards < 1):
+        parser.error("--shards задаётся положительным числом вместе с --partition hash")
+    if args.pipeline and args.streaming:
+        parser.error("--pipeline и --streaming нельзя использовать вместе")
+    args.stage_concurrency = {}
+    if args.stage:
+        from staged_pipeline import STAGES
+    for item in args.stage:
+        stage, _, value = item.partition("=")
+        if stage not in STAGES:
+            parser.error(f"неизвестный этап конвейера: {stage} (этапы: {', '.join(STAGES)})")
+        if not value.isdigit() or int(value) < 1:
+            parser.error(f"--stage ожидает ЭТАП=N с положительным N, получено: {item}")
+        args.stage_concurrency[stage] = int(value)
+    return args
+
+
+def cli(argv=None):
+    """
+    Запуск из командной строки (argv — аргументы без имени программы, по умолчанию sys.argv).
+    """
+    args = _parse_args(argv)
+    # Статистика преобразований — за этот запуск, даже если процесс
+    # уже выполнял другие (пакетный режим files.py)
+    transform_chain.cache_clear()
+    with stage_metrics.instrumented_run("serialize_processed_data", args.metrics, args.profile):
+        main(workers=args.workers, streaming=args.streaming, chunk_size=args.chunk_size,
+             use_encoding_cache=not args.no_encoding_cache, hash_content=args.hash_content,
+             full=args.full, output_format=args.format, dedup=args.dedup,
+             pipeline=args.pipeline, stage_concurrency=args.stage_concurrency, queue_size=args.queue_size,
+             file_info=args.file_info, texts=args.texts, inline_threshold=args.inline_threshold,
+             transforms=args.transform or DEFAULT_TRANSFORMS, transform_stats=args.transform_stats,
+             partition=args.partition, shard_count=args.shards)
+
+
 if __name__ == "__main__":
-    main()
+    cli()
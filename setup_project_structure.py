@@ -1,10 +1,98 @@
 import os
+import math
+import random
+import argparse
 import datetime
 
-def main():
-    # 1) Создание структуры директорий
-    project_root = "project_root"
+import stage_metrics
+
+# Алфавиты синтетического корпуса: только символы, представимые в своей кодировке
+CORPUS_ALPHABETS = {
+    "ascii": "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "iso-8859-1": "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZéèàçùâêôüöäßÉÀÇÖÜ",
+    "cp1251": "абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЭЮЯ",
+    "utf-8": "абвгдежзиклмнопрстуфхцчшэюяΑΒΓΔΕΖΗΘαβγδεζηθσςabcdefghijXYZ",
+}
+
+# Распределения размеров файлов синтетического корпуса
+SIZE_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+def _random_size(rng, distribution, mean_size):
+    """
+    Размер очередного файла в символах для выбранного распределения со средним mean_size.
+    """
+    if distribution == "fixed":
+        return mean_size
+    if distribution == "uniform":
+        return rng.randint(1, 2 * mean_size)
+    if distribution == "lognormal":
+        # sigma=1: много мелких файлов и «длинный хвост» крупных, среднее ≈ mean_size
+        sigma = 1.0
+        return max(1, int(rng.lognormvariate(math.log(mean_size) - sigma ** 2 / 2, sigma)))
+    raise ValueError(f"Неизвестное распределение размеров: {distribution}")
+
+def _random_text(rng, alphabet, size):
+    """
+    Текст из «слов» алфавита с пробелами, знаками препинания и переводами строк.
+    """
+    parts = []
+    length = 0
+    while length < size:
+        word = "".join(rng.choices(alphabet, k=rng.randint(1, 10)))
+        separator = rng.choice("    ,.\n")
+        parts.append(word + separator)
+        length += len(word) + 1
+    return "".join(parts)[:size]
+
+def generate_corpus(project_root="project_root", file_count=1000, mean_size=4096, size_distribution="lognormal",
+                    encodings=("utf-8", "iso-8859-1", "cp1251", "ascii"), duplicate_rate=0.0, seed=0):
+    """
+    Генерирует синтетический корпус в <project_root>/data/raw/ для бенчмарков:
+    file_count файлов synthetic_<номер>_<кодировка>.txt, размер (в символах)
+    из распределения size_distribution со средним mean_size, кодировки
+    по кругу из encodings. С вероятностью duplicate_rate файл — побайтная
+    копия одного из уже созданных. При одинаковом seed корпус одинаков.
+    Возвращает словарь с параметрами и итоговым объёмом корпуса.
+    """
+    unknown = [encoding for encoding in encodings if encoding not in CORPUS_ALPHABETS]
+    if unknown:
+        raise ValueError(f"Нет алфавита для кодировок: {', '.join(unknown)}")
+
+    create_directories(project_root)
+    raw_path = os.path.join(project_root, "data", "raw")
+    rng = random.Random(seed)
+
+    written = []
+    total_bytes = 0
+    duplicates = 0
+    for number in range(file_count):
+        encoding = encodings[number % len(encodings)]
+        if written and rng.random() < duplicate_rate:
+            data = rng.choice(written)
+            duplicates += 1
+        else:
+            text = _random_text(rng, CORPUS_ALPHABETS[encoding], _random_size(rng, size_distribution, mean_size))
+            data = text.encode(encoding)
+            written.append(data)
+        with open(os.path.join(raw_path, f"synthetic_{number:07d}_{encoding}.txt"), "wb") as f:
+            f.write(data)
+        total_bytes += len(data)
+
+    return {
+        "file_count": file_count,
+        "mean_size": mean_size,
+        "size_distribution": size_distribution,
+        "encodings": list(encodings),
+        "duplicate_rate": duplicate_rate,
+        "seed": seed,
+        "duplicates": duplicates,
+        "total_bytes": total_bytes,
+    }
 
+def create_directories(project_root="project_root"):
+    """
+    Создаёт структуру директорий проекта; возвращает список созданных путей.
+    """
     directories = [
         os.path.join(project_root, "data", "raw"),
         os.path.join(project_root, "data", "processed"),
@@ -15,6 +103,13 @@ def main():
     
     for directory in directories:
         os.makedirs(directory, exist_ok=True)
+    return directories
+
+def main():
+    # 1) Создание структуры директорий
+    project_root = "project_root"
+
+    directories = create_directories(project_root)
     
     # 2) Создание и запись данных в файлы
     # Папка для сохранения файлов
@@ -66,5 +161,12 @@ def main():
 
     print("Все действия успешно выполнены. Лог записан в", log_file_path)
 
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Создание структуры project_root/ и примеров файлов")
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    with stage_metrics.instrumented_run("setup_project_structure", args.metrics, args.profile):
+        main()
+
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,319 @@
+import os
+import json
+import shutil
+import hashlib
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from json_records import OUTPUT_FORMATS, RecordWriter, dump_record, iter_records
+
+# Секционированный (шардированный) вывод вместо одного большого файла записей.
+#
+# Раскладка: output/processed_data.json -> output/processed_data/
+#   index.json           — оглавление: способ разбиения, формат и список шардов;
+#   shard-<ключ>.json(l) — записи одного шарда в обычном формате json_records.
+#
+# Способы разбиения (partition):
+#   "hash" — по хэшу имени файла на shard_count шардов (ключ "0000".."NNNN");
+#            запись конкретного файла ищется в одном шарде;
+#   "date" — по дате изменения (last_modified, ключ "YYYY-MM-DD");
+#            выборка за период читает только шарды нужных дней.
+PARTITIONS = ("hash", "date")
+
+INDEX_NAME = "index.json"
+INDEX_FORMAT_VERSION = 1
+DEFAULT_SHARD_COUNT = 16
+
+# Ключ шарда для записей без даты изменения
+UNKNOWN_DATE_KEY = "unknown"
+
+# При workers > 1: сколько записей (по всем шардам) копится в памяти,
+# прежде чем пачки отправляются на кодирование в процессы пула
+SHARD_BUFFER_RECORDS = 2000
+
+
+def sharded_dir(output_path):
+    """
+    Директория шардов для пути одиночного файла: output/processed_data.json -> output/processed_data.
+    """
+    return os.path.splitext(output_path)[0]
+
+
+def hash_shard(filename, shard_count):
+    """
+    Ключ шарда для имени файла при разбиении "hash" (стабилен между запусками и платформами).
+    """
+    digest = hashlib.blake2b(filename.encode("utf-8"), digest_size=8).digest()
+    return f"{int.from_bytes(digest, 'little') % shard_count:04d}"
+
+
+def shard_key(record, partition, shard_count=DEFAULT_SHARD_COUNT):
+    """
+    Ключ шарда для записи: по имени файла или по дате изменения.
+    """
+    if partition == "hash":
+        return hash_shard(record["filename"], shard_count)
+    if partition == "date":
+        return record.get("last_modified", "")[:10] or UNKNOWN_DATE_KEY
+    raise ValueError(f"Неизвестный способ разбиения: {partition}")
+
+
+def load_index(output_dir):
+    """
+    Оглавление шардов или None, если его нет или оно повреждено.
+    """
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    if not os.path.isfile(index_path):
+        return None
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_FORMAT_VERSION:
+        return None
+    return index
+
+
+class ShardedWriter:
+    """
+    Запись потока записей в шарды с оглавлением (см. описание раскладки выше).
+
+    dirty — множество ключей шардов, которые нужно переписать (инкрементальный
+    запуск): записи остальных шардов пропускаются, их файлы остаются как есть.
+    None — полная перезапись. Если прошлого оглавления нет или разбиение
+    изменилось, перезаписывается всё.
+
+    workers=1 — записи сразу пишутся в открытые файлы шардов (память не растёт);
+    workers>1 — записи копятся по шардам, и как только их набирается
+    SHARD_BUFFER_RECORDS, пачки каждого шарда кодируются в JSON процессами пула,
+    а готовый текст дописывается в файлы шардов в порядке поступления записей.
+    В работе не больше 2 * workers пачек, так что память ограничена
+    и не зависит от объёма данных.
+
+    Файлы шардов пишутся во временные и заменяются атомарно, оглавление — последним.
+    При ошибке (выход из with по исключению) прежние шарды и оглавление не меняются.
+    """
+    def __init__(self, output_dir, partition="hash", shard_count=DEFAULT_SHARD_COUNT,
+                 output_format="json", workers=1, dirty=None):
+        if partition not in PARTITIONS:
+            raise ValueError(f"Неизвестный способ разбиения: {partition}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Неизвестный формат вывода: {output_format}")
+        self.output_dir = output_dir
+        self.partition = partition
+        self.shard_count = shard_count
+        self.output_format = output_format
+        self.workers = workers
+        self.count = 0
+
+        # Шарды прошлого оглавления: при полной перезаписи ненужные из них удаляются,
+        # даже если прошлое разбиение было другим
+        previous = load_index(output_dir)
+        self._previous_shards = previous["shards"] if previous else {}
+        compatible = previous is not None and (previous.get("partition") == partition
+                                               and previous.get("shard_count") == shard_count
+                                               and previous.get("format") == output_format)
+        self.dirty = dirty if compatible else None
+
+        os.makedirs(output_dir, exist_ok=True)
+        self._writers = {}
+        self._buffers = defaultdict(list)
+        self._buffered = 0
+        self._pool = None
+        # Пачки в работе: (ключ шарда, future с закодированными записями) по порядку
+        self._encoding = deque()
+        self._closed = False
+
+    def _shard_file(self, key):
+        return f"shard-{key}.{self.output_format}"
+
+    def wants(self, record):
+        """
+        Будет ли запись записана (её шард переписывается).
+        """
+        return self.dirty is None or shard_key(record, self.partition, self.shard_count) in self.dirty
+
+    def write(self, record):
+        key = shard_key(record, self.partition, self.shard_count)
+        if self.dirty is not None and key not in self.dirty:
+            return
+        self.count += 1
+        if self.workers > 1:
+            self._buffers[key].append(record)
+            self._buffered += 1
+            if self._buffered >= SHARD_BUFFER_RECORDS:
+                self._flush_buffers()
+            return
+        self._writer(key).write(record)
+
+    def _writer(self, key):
+        writer = self._writers.get(key)
+        if writer is None:
+            tmp_path = os.path.join(self.output_dir, self._shard_file(key) + ".tmp")
+            writer = self._writers[key] = RecordWriter(tmp_path, self.output_format)
+        return writer
+
+    def _flush_buffers(self):
+        """
+        Отправляет накопленные пачки на кодирование в пул (workers > 1).
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        for key, records in self._buffers.items():
+            while len(self._encoding) >= 2 * self.workers:
+                self._write_encoded()
+            self._encoding.append((key, self._pool.submit(_dump_records, records, self.output_format)))
+        self._buffers.clear()
+        self._buffered = 0
+
+    def _write_encoded(self):
+        """
+        Дописывает в шард самую старую закодированную пачку.
+        """
+        key, future = self._encoding.popleft()
+        writer = self._writer(key)
+        for item in future.result():
+            writer.write_dumped(item)
+
+    def _write_shards(self):
+        """
+        Дописывает шарды во временные файлы. Возвращает {ключ: число записей}.
+        """
+        if self._buffers:
+            self._flush_buffers()
+        while self._encoding:
+            self._write_encoded()
+        self._shutdown_pool()
+        counts = {}
+        for key, writer in self._writers.items():
+            writer.close()
+            counts[key] = writer.count
+        return counts
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def close(self):
+        if self._closed:
+            return
+        try:
+            counts = self._write_shards()
+        except BaseException:
+            self.abort()
+            raise
+        self._closed = True
+
+        shards = dict(self._previous_shards)
+        for key, count in counts.items():
+            shard_file = self._shard_file(key)
+            os.replace(os.path.join(self.output_dir, shard_file + ".tmp"), os.path.join(self.output_dir, shard_file))
+            shards[key] = {"file": shard_file, "count": count}
+
+        # Переписанные шарды, в которые не попало ни одной записи, больше не нужны
+        rewritten = set(self._previous_shards) if self.dirty is None else self.dirty
+        for key in rewritten - set(counts):
+            entry = shards.pop(key, None)
+            if entry is not None:
+                shard_path = os.path.join(self.output_dir, entry["file"])
+                if os.path.exists(shard_path):
+                    os.remove(shard_path)
+
+        index = {
+            "version": INDEX_FORMAT_VERSION,
+            "partition": self.partition,
+            "shard_count": self.shard_count,
+            "format": self.output_format,
+            "total": sum(entry["count"] for entry in shards.values()),
+            "shards": dict(sorted(shards.items())),
+        }
+        index_path = os.path.join(self.output_dir, INDEX_NAME)
+        with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=4)
+        os.replace(index_path + ".tmp", index_path)
+
+    def abort(self):
+        """
+        Отменяет запись: временные файлы удаляются, прежние шарды не меняются.
+        """
+        self._closed = True
+        self._encoding.clear()
+        self._buffers.clear()
+        self._shutdown_pool()
+        for writer in self._writers.values():
+            writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _dump_records(records, output_format):
+    """
+    Кодирует пачку записей шарда (выполняется в процессе пула ShardedWriter).
+    """
+    return [dump_record(record, output_format) for record in records]
+
+
+def remove_sharded(output_dir):
+    """
+    Удаляет директорию шардов целиком (при возврате к одиночному файлу,
+    см. main() в serialize_processed_data.py). Директория без оглавления
+    шардами не считается и не трогается. Возвращает True, если удалена.
+    """
+    if not os.path.isfile(os.path.join(output_dir, INDEX_NAME)):
+        return False
+    shutil.rmtree(output_dir)
+    return True
+
+
+def iter_sharded_records(output_dir, shards=None):
+    """
+    Потоковое чтение записей из шардов: всех (по порядку ключей)
+    или только перечисленных в shards. Открываются только нужные файлы.
+    """
+    index = load_index(output_dir)
+    if index is None:
+        raise ValueError(f"Не найдено оглавление шардов: {os.path.join(output_dir, INDEX_NAME)}")
+    keys = index["shards"] if shards is None else [key for key in shards if key in index["shards"]]
+    for key in keys:
+        yield from iter_records(os.path.join(output_dir, index["shards"][key]["file"]), index["format"])
+
+
+def find_records(output_dir, filename):
+    """
+    Записи для файла filename: при разбиении "hash" читается один шард.
+    """
+    index = load_index(output_dir)
+    if index is None:
+        return []
+    shards = None
+    if index["partition"] == "hash":
+        shards = [hash_shard(filename, index["shard_count"])]
+    return [record for record in iter_sharded_records(output_dir, shards) if record["filename"] == filename]
+
+
+def iter_records_between(output_dir, date_from=None, date_to=None):
+    """
+    Записи с датой изменения в [date_from, date_to] (строки "YYYY-MM-DD").
+    При разбиении "date" читаются только шарды этих дней.
+    """
+    index = load_index(output_dir)
+    if index is None:
+        return
+    shards = None
+    if index["partition"] == "date":
+        shards = [key for key in index["shards"]
+                  if key != UNKNOWN_DATE_KEY
+                  and (date_from is None or key >= date_from) and (date_to is None or key <= date_to)]
+    for record in iter_sharded_records(output_dir, shards):
+        day = record.get("last_modified", "")[:10]
+        if day and (date_from is None or day >= date_from) and (date_to is None or day <= date_to):
+            yield record
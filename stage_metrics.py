@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import time
+import random
+import cProfile
+import datetime
+import functools
+import threading
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Windows: пиковую память процесса узнать негде
+    resource = None
+
+# Файл с измерениями запусков; из него generate_final_report.py берёт время шагов
+METRICS_PATH = os.path.join("project_root", "logs", "metrics.json")
+
+# Сколько замеров длительности на этап хранится для перцентилей (reservoir sampling)
+RESERVOIR_SIZE = 10_000
+
+# Версия формата файла измерений
+METRICS_FORMAT_VERSION = 1
+
+
+def _peak_rss_bytes():
+    """
+    Пиковый объём резидентной памяти процесса (ru_maxrss) или None, если недоступен.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _StageStats:
+    __slots__ = ("calls", "total", "max", "bytes", "peak_rss", "samples", "_random")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.peak_rss = None
+        self.samples = []
+        # Фиксированное зерно: одинаковые запуски дают одинаковую выборку
+        self._random = random.Random(0)
+
+    def add(self, seconds, nbytes):
+        self.calls += 1
+        self.total += seconds
+        self.bytes += nbytes
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(seconds)
+        else:
+            position = self._random.randrange(self.calls)
+            if position < RESERVOIR_SIZE:
+                self.samples[position] = seconds
+
+    def summary(self):
+        samples = sorted(self.samples)
+
+        def percentile(fraction):
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000
+
+        return {
+            "calls": self.calls,
+            "total_seconds": round(self.total, 6),
+            "mean_ms": round(self.total / self.calls * 1000, 4) if self.calls else 0.0,
+            "p50_ms": round(percentile(0.50), 4),
+            "p90_ms": round(percentile(0.90), 4),
+            "p99_ms": round(percentile(0.99), 4),
+            "max_ms": round(self.max * 1000, 4),
+            "bytes": self.bytes,
+            "throughput_mb_s": round(self.bytes / self.total / 1e6, 3) if self.total and self.bytes else None,
+            "peak_rss_mb": round(self.peak_rss / 1e6, 1) if self.peak_rss is not None else None,
+        }
+
+
+class StageMetrics:
+    """
+    Сборщик измерений по этапам: число вызовов, суммарное время, перцентили
+    длительности (по выборке до RESERVOIR_SIZE замеров), обработанные байты
+    и пиковая память процесса на момент окончания этапа. Потокобезопасен.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, nbytes=0):
+        peak_rss = _peak_rss_bytes()
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.add(seconds, nbytes)
+            if peak_rss is not None:
+                stats.peak_rss = max(stats.peak_rss or 0, peak_rss)
+
+    def summary(self):
+        with self._lock:
+            stages = {stage: stats.summary() for stage, stats in sorted(self._stages.items())}
+        peak_rss = _peak_rss_bytes()
+        return {
+            "finished": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "wall_seconds": round(time.perf_counter() - self.started, 6),
+            "peak_rss_mb": round(peak_rss / 1e6, 1) if peak_rss is not None else None,
+            "stages": stages,
+        }
+
+
+# Активный сборщик; None — измерения выключены, и обёртки почти ничего не стоят
+_active = None
+
+
+def enable():
+    """
+    Включает измерения в текущем процессе и возвращает новый сборщик.
+    """
+    global _active
+    _active = StageMetrics()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def timed(stage, size=None):
+    """
+    Декоратор: измеряет вызовы функции как этап stage.
+    size(result, *args) возвращает число обработанных байт (или символов).
+    Пока измерения выключены, вызов идёт напрямую.
+    В процессах пула (workers > 1) измерения не собираются — только в основном.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = _active
+            if metrics is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            metrics.record(stage, elapsed, size(result, *args) if size is not None else 0)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def measure(stage, nbytes=0):
+    """
+    Контекстный менеджер для участка кода, который неудобно оборачивать декоратором.
+    """
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    yield
+    metrics.record(stage, time.perf_counter() - start, nbytes)
+
+
+def load_metrics(metrics_path=METRICS_PATH):
+    """
+    Измерения прошлых запусков: {имя запуска: сводка}. Повреждённый файл — пустой словарь.
+    """
+    if not os.path.isfile(metrics_path):
+        return {}
+    try:
+        with open(metrics_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != METRICS_FORMAT_VERSION:
+        return {}
+    return data.get("runs", {})
+
+
+def save_metrics(run_name, summary, metrics_path=METRICS_PATH):
+    """
+    Сохраняет сводку запуска run_name (предыдущая сводка того же запуска заменяется).
+    Запись атомарная: временный файл и os.replace().
+    """
+    runs = load_metrics(metrics_path)
+    runs[run_name] = summary
+    os.makedirs(os.path.dirname(metrics_path) or ".", exist_ok=True)
+    tmp_path = metrics_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": METRICS_FORMAT_VERSION, "runs": runs}, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, metrics_path)
+
+
+@contextlib.contextmanager
+def instrumented_run(run_name, enabled=False, profile_path=None):
+    """
+    Обёртка для запуска скрипта: при enabled=True включает измерения этапов
+    и по завершении сохраняет сводку в METRICS_PATH под именем run_name;
+    при profile_path — дополнительно профилирует запуск через cProfile
+    и сохраняет статистику для pstats / snakeviz.
+    """
+    metrics = enable() if enabled else None
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"Профиль сохранён: {profile_path}")
+        if metrics is not None:
+            disable()
+            save_metrics(run_name, metrics.summary())
+            print(f"Измерения сохранены: {METRICS_PATH}")
+
+
+def add_arguments(parser):
+    """
+    Добавляет в argparse-парсер скрипта флаги --metrics и --profile.
+    """
+    parser.add_argument("--metrics", action="store_true",
+                        help=f"измерять время и объём по этапам и сохранить в {METRICS_PATH}")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="профилировать запуск через cProfile и сохранить статистику в FILE")
@@ -0,0 +1,206 @@
+import os
+import queue
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from transforms import DEFAULT_TRANSFORMS
+from serialize_processed_data import (RAW_DIR, PROCESSED_DIR, detect_encoding_bytes, _processed_filename,
+                                      _read_raw, _transform_raw, _write_processed, _set_file_stats)
+
+# Этапы конвейера обработки в порядке прохождения файла:
+#   read      — чтение исходного файла (ввод-вывод, пул потоков);
+#   detect    — определение кодировки по началу файла (CPU);
+#   transform — декодирование и смена регистра (CPU);
+#   write     — запись результата в data/processed/ (ввод-вывод);
+#   stat      — размер и дата изменения результата в записи (по fstat из write).
+# Последний этап — сериализация — выполняет потребитель записей
+# (write_records() в основном потоке), параллельно с остальными этапами.
+STAGES = ("read", "detect", "transform", "write", "stat")
+CPU_STAGES = ("detect", "transform")
+
+# Число одновременных задач на этапах ввода-вывода по умолчанию.
+# Для CPU-этапов по умолчанию берётся число процессов workers.
+DEFAULT_IO_CONCURRENCY = {"read": 4, "write": 4, "stat": 2}
+
+# Ёмкость очереди между соседними этапами
+DEFAULT_QUEUE_SIZE = 8
+
+# Сколько байт из начала файла используется для определения кодировки
+DETECT_SAMPLE_SIZE = 4096
+
+
+class StagedPipeline:
+    """
+    Конвейер обработки файлов из data/raw/ на asyncio: этапы (STAGES) связаны
+    ограниченными очередями asyncio.Queue, блокирующие вызовы уходят в пулы —
+    ввод-вывод в пул потоков, CPU-этапы в пул из workers процессов
+    (при workers=1 — тоже в потоки). Так диск, процессор и запись JSON
+    заняты одновременно, а не по очереди.
+
+    concurrency — {этап: число одновременных задач}, незаданные берутся
+    по умолчанию. queue_size — ёмкость очередей между этапами: когда
+    следующий этап не успевает, предыдущий ждёт (обратное давление).
+    Всего в работе не больше queue_size * len(STAGES) файлов, поэтому
+    память ограничена независимо от размера корпуса.
+    """
+    def __init__(self, workers=1, concurrency=None, queue_size=DEFAULT_QUEUE_SIZE):
+        unknown = set(concurrency or {}) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Неизвестные этапы конвейера: {', '.join(sorted(unknown))}")
+        self.workers = max(1, workers)
+        self.concurrency = dict(DEFAULT_IO_CONCURRENCY)
+        for stage in CPU_STAGES:
+            self.concurrency[stage] = self.workers
+        self.concurrency.update(concurrency or {})
+        if min(self.concurrency.values()) < 1:
+            raise ValueError("Число задач на этапе должно быть положительным")
+        self.queue_size = max(1, queue_size)
+        self.max_in_flight = self.queue_size * len(STAGES)
+
+    def run(self, filenames, encodings, transforms=DEFAULT_TRANSFORMS):
+        """
+        Обрабатывает filenames (encodings — кодировки из кэша или None)
+        цепочкой преобразований transforms (см. transforms.py).
+        Генератор: выдаёт кортежи (запись, кодировка) в порядке filenames,
+        как и остальные режимы iter_processed_files(); для файлов с ошибкой — (None, None).
+        Записи уже содержат размер и дату изменения результата.
+        Цикл событий работает в отдельном потоке, результаты передаются
+        через ограниченную очередь.
+        """
+        results = queue.Queue(maxsize=self.queue_size)
+        cancelled = threading.Event()
+        errors = []
+
+        def target():
+            try:
+                asyncio.run(self._run(list(filenames), list(encodings), transforms, results, cancelled))
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                results.put(None)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        try:
+            while True:
+                result = results.get()
+                if result is None:
+                    break
+                yield result
+        finally:
+            # Если потребитель остановился раньше — не берём новые файлы
+            # и разгружаем очередь, чтобы конвейер мог завершиться
+            cancelled.set()
+            while thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    async def _run(self, filenames, encodings, transforms, results, cancelled):
+        loop = asyncio.get_running_loop()
+        io_threads = sum(self.concurrency[stage] for stage in STAGES if stage not in CPU_STAGES)
+        cpu_tasks = sum(self.concurrency[stage] for stage in CPU_STAGES)
+
+        with ThreadPoolExecutor(max_workers=io_threads) as io_pool, \
+                (ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1
+                 else ThreadPoolExecutor(max_workers=cpu_tasks)) as cpu_pool, \
+                ThreadPoolExecutor(max_workers=1) as emit_pool:
+
+            def io(func, *args):
+                return loop.run_in_executor(io_pool, func, *args)
+
+            def cpu(func, *args):
+                return loop.run_in_executor(cpu_pool, func, *args)
+
+            async def read(job):
+                job["raw_data"], job["raw_state"] = await io(_read_raw, job["raw_path"])
+
+            async def detect(job):
+                if job["encoding"] is None:
+                    sample = job["raw_data"][:DETECT_SAMPLE_SIZE]
+                    job["encoding"] = await cpu(detect_encoding_bytes, sample,
+                                                len(job["raw_data"]) < DETECT_SAMPLE_SIZE)
+
+            async def transform(job):
+                _, original_text, processed_text = await cpu(_transform_raw, job.pop("raw_data"),
+                                                             job["encoding"], DETECT_SAMPLE_SIZE, transforms)
+                job["record"] = {
+                    "filename": job["processed_filename"],
+                    "original_text": original_text,
+                    "processed_text": processed_text,
+                    "_raw": job.pop("raw_state")
+                }
+
+            async def write(job):
+                job["stat"] = await io(_write_processed, os.path.join(PROCESSED_DIR, job["processed_filename"]),
+                                       job["record"]["processed_text"])
+
+            async def stat(job):
+                _set_file_stats(job["record"], job.pop("stat"))
+
+            handlers = {"read": read, "detect": detect, "transform": transform, "write": write, "stat": stat}
+            queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(STAGES) + 1)]
+            in_flight = asyncio.Semaphore(self.max_in_flight)
+
+            async def feed():
+                for index, (filename, encoding) in enumerate(zip(filenames, encodings)):
+                    await in_flight.acquire()
+                    if cancelled.is_set():
+                        break
+                    await queues[0].put({
+                        "index": index,
+                        "raw_path": os.path.join(RAW_DIR, filename),
+                        "processed_filename": _processed_filename(filename),
+                        "encoding": encoding,
+                        "failed": False
+                    })
+                await queues[0].put(None)
+
+            async def stage(handler, inbox, outbox, concurrency):
+                async def worker():
+                    while True:
+                        job = await inbox.get()
+                        if job is None:
+                            # Сигнал конца нужен и остальным задачам этапа
+                            await inbox.put(None)
+                            return
+                        if not job["failed"]:
+                            try:
+                                await handler(job)
+                            except Exception as e:
+                                # Как и в остальных режимах: ошибка в одном файле
+                                # не прерывает обработку остальных
+                                print(f"Ошибка при обработке файла {job['raw_path']}: {e}")
+                                job["failed"] = True
+                                job.pop("raw_data", None)
+                        await outbox.put(job)
+
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                await outbox.put(None)
+
+            async def collect():
+                # Этапы с несколькими задачами меняют порядок файлов — восстанавливаем его
+                done = {}
+                next_index = 0
+                while True:
+                    job = await queues[-1].get()
+                    if job is None:
+                        return
+                    done[job["index"]] = job
+                    while next_index in done:
+                        job = done.pop(next_index)
+                        next_index += 1
+                        result = (None, None) if job["failed"] else (job["record"], job["encoding"])
+                        await loop.run_in_executor(emit_pool, results.put, result)
+                        in_flight.release()
+
+            tasks = [feed(), collect()]
+            for position, name in enumerate(STAGES):
+                tasks.append(stage(handlers[name], queues[position], queues[position + 1],
+                                   self.concurrency[name]))
+            await asyncio.gather(*tasks)
@@ -0,0 +1,106 @@
+import os
+import zipfile
+
+import pytest
+
+from create_backup import create_backup, list_backups, read_snapshot
+from restore_backup import restore_backup
+
+DATA_DIR = os.path.join("project_root", "data")
+BACKUPS_DIR = os.path.join("project_root", "backups")
+
+
+def _write(rel_path, text):
+    path = os.path.join(DATA_DIR, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _read_data():
+    files = {}
+    for root, _, names in os.walk(DATA_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "r", encoding="utf-8") as f:
+                files[os.path.relpath(path, DATA_DIR).replace(os.sep, "/")] = f.read()
+    return files
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write("raw/a.txt", "первая версия")
+    _write("raw/b.txt", "bbb")
+    _write("processed/a_processed.txt", "ПЕРВАЯ ВЕРСИЯ")
+    return tmp_path
+
+
+def _stored_count(backup_path):
+    with zipfile.ZipFile(backup_path) as zf:
+        return len([name for name in zf.namelist() if name != "__snapshot__.json"])
+
+
+def test_unchanged_and_duplicate_files_are_not_stored_again(project):
+    _write("raw/copy.txt", "bbb")
+    first = create_backup()
+    # Одинаковое содержимое в одном снимке сжимается один раз
+    assert _stored_count(first) == 3
+    second = create_backup()
+    assert _stored_count(second) == 0
+    assert read_snapshot(second)["parent"] == os.path.basename(first)
+    assert list_backups(BACKUPS_DIR) == [os.path.basename(second), os.path.basename(first)]
+
+
+def test_full_backup_stores_everything(project):
+    create_backup()
+    full = create_backup(full=True)
+    assert _stored_count(full) == 3
+    assert read_snapshot(full)["parent"] is None
+
+
+def test_reverted_file_references_older_snapshot(project):
+    create_backup()
+    _write("raw/a.txt", "вторая версия, длиннее")
+    create_backup()
+    _write("raw/a.txt", "первая версия")
+    third = create_backup()
+    assert _stored_count(third) == 0
+    assert read_snapshot(third)["files"]["raw/a.txt"]["archive"] == list_backups(BACKUPS_DIR)[-1]
+
+
+def test_backup_after_deleting_oldest_archive(project):
+    first = create_backup(full=True)
+    _write("raw/a.txt", "вторая версия, длиннее")
+    create_backup()
+    _write("raw/a.txt", "первая версия")
+    expected = _read_data()
+    os.remove(first)
+
+    latest = create_backup()
+    # Имя удалённого архива, на которое ссылаются старые описи, не занимается
+    assert os.path.basename(latest) != os.path.basename(first)
+    snapshot = read_snapshot(latest)
+    assert all(os.path.isfile(os.path.join(BACKUPS_DIR, entry["archive"]))
+               for entry in snapshot["files"].values())
+
+    for rel_path in expected:
+        os.remove(os.path.join(DATA_DIR, rel_path))
+    restore_backup(os.path.basename(latest))
+    assert _read_data() == expected
+
+
+def test_restore_rejects_content_not_matching_snapshot(project):
+    first = create_backup(full=True)
+    _write("raw/b.txt", "bbbb")
+    second = create_backup()
+    # Подменяем содержимое в первом архиве: опись второго снимка ссылается на него
+    with zipfile.ZipFile(first) as zf:
+        members = {name: zf.read(name) for name in zf.namelist()}
+    members["raw/a.txt"] = "чужое содержимое".encode("utf-8")
+    with zipfile.ZipFile(first, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+    with pytest.raises(ValueError):
+        restore_backup(os.path.basename(second), skip_identical=False)
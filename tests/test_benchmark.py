@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from benchmark_pipeline import compare_with_baseline, run_benchmark
+from setup_project_structure import CORPUS_ALPHABETS, SIZE_DISTRIBUTIONS, generate_corpus
+
+
+def _corpus(root):
+    raw_dir = os.path.join(root, "data", "raw")
+    contents = {}
+    for name in sorted(os.listdir(raw_dir)):
+        with open(os.path.join(raw_dir, name), "rb") as f:
+            contents[name] = f.read()
+    return contents
+
+
+@pytest.mark.parametrize("size_distribution", SIZE_DISTRIBUTIONS)
+def test_corpus_is_reproducible(tmp_path, size_distribution):
+    options = {"file_count": 20, "mean_size": 200, "size_distribution": size_distribution}
+    first = generate_corpus(str(tmp_path / "a"), seed=7, **options)
+    second = generate_corpus(str(tmp_path / "b"), seed=7, **options)
+    generate_corpus(str(tmp_path / "c"), seed=8, **options)
+    assert first == second
+    assert _corpus(tmp_path / "a") == _corpus(tmp_path / "b")
+    assert _corpus(tmp_path / "a") != _corpus(tmp_path / "c")
+    assert first["total_bytes"] == sum(len(data) for data in _corpus(tmp_path / "a").values())
+
+
+def test_files_are_valid_in_their_encoding(tmp_path):
+    generate_corpus(str(tmp_path), file_count=len(CORPUS_ALPHABETS) * 3, mean_size=100,
+                    encodings=tuple(CORPUS_ALPHABETS))
+    for name, data in _corpus(tmp_path).items():
+        encoding = name.rsplit("_", 1)[1][:-len(".txt")]
+        assert set(data.decode(encoding)) <= set(CORPUS_ALPHABETS[encoding]) | set("    ,.\n")
+
+
+def test_duplicates(tmp_path):
+    corpus = generate_corpus(str(tmp_path), file_count=50, mean_size=100, duplicate_rate=0.5, seed=3)
+    assert 0 < corpus["duplicates"] < 50
+    assert len(set(_corpus(tmp_path).values())) == 50 - corpus["duplicates"]
+
+
+def test_unknown_encoding_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        generate_corpus(str(tmp_path), encodings=("koi8-r",))
+
+
+def test_compare_with_baseline():
+    baseline = {"results": {"a": {"median_seconds": 1.0}, "b": {"median_seconds": 1.0}}}
+    report = {"results": {"a": {"median_seconds": 1.1}, "b": {"median_seconds": 1.5},
+                          "new": {"median_seconds": 9.0}}}
+    assert compare_with_baseline(report, baseline, tolerance=0.2) == [("b", 1.0, 1.5)]
+
+
+def test_benchmark_runs_every_step(tmp_path):
+    report = run_benchmark(file_count=8, mean_size=100, repeat=1, workdir=str(tmp_path))
+    assert list(report["results"]) == ["process_files", "serialize_processed_data", "gather_file_info",
+                                       "validate_json_file", "restore_backup"]
+    assert all(len(result["runs"]) == 1 for result in report["results"].values())
+    assert report["corpus"]["file_count"] == 8
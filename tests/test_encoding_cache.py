@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from encoding_cache import EncodingCache
+from serialize_processed_data import sniff_encoding
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_entries_survive_save_and_reload(tmp_path):
+    cache_path = str(tmp_path / "cache" / "encoding_cache.json")
+    data_path = str(tmp_path / "a.txt")
+    _write(data_path, b"text")
+
+    cache = EncodingCache(cache_path)
+    key = cache.key(data_path)
+    cache.put(key, "ascii")
+    cache.save()
+
+    reloaded = EncodingCache(cache_path)
+    assert reloaded.get(key) == "ascii"
+    assert reloaded.get(key + "x") is None
+    assert (reloaded.hits, reloaded.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EncodingCache(str(tmp_path / "cache.json"), max_entries=2)
+    cache.put("a", "utf-8")
+    cache.put("b", "cp1251")
+    cache.get("a")
+    cache.put("c", "ascii")
+    assert cache.get("a") == "utf-8"
+    assert cache.get("b") is None
+    assert cache.get("c") == "ascii"
+
+
+def test_content_hash_notices_change_with_same_size_and_mtime(tmp_path):
+    data_path = str(tmp_path / "a.txt")
+    _write(data_path, b"aaaa")
+    stats = os.stat(data_path)
+    plain = EncodingCache(str(tmp_path / "plain.json"))
+    hashed = EncodingCache(str(tmp_path / "hashed.json"), use_content_hash=True)
+    plain_key, hashed_key = plain.key(data_path), hashed.key(data_path)
+
+    _write(data_path, b"bbbb")
+    os.utime(data_path, ns=(stats.st_atime_ns, stats.st_mtime_ns))
+    assert plain.key(data_path) == plain_key
+    assert hashed.key(data_path) != hashed_key
+
+
+def test_missing_file_has_no_key(tmp_path):
+    assert EncodingCache(str(tmp_path / "cache.json")).key(str(tmp_path / "missing.txt")) is None
+
+
+@pytest.mark.parametrize("data, complete, expected", [
+    ("﻿текст".encode("utf-8"), False, "UTF-8-SIG"),
+    ("текст".encode("utf-16"), False, "UTF-16"),
+    ("текст".encode("utf-32"), False, "UTF-32"),
+    (b"plain ascii", False, "ascii"),
+    ("текст".encode("utf-8"), False, "utf-8"),
+    # Фрагмент обрезал последний символ посередине — это всё ещё UTF-8
+    ("текст".encode("utf-8")[:-1], False, "utf-8"),
+    ("текст".encode("utf-8")[:-1], True, None),
+    ("текст".encode("cp1251"), False, None),
+])
+def test_sniff_encoding(data, complete, expected):
+    assert sniff_encoding(data, complete) == expected
@@ -0,0 +1,66 @@
+import pytest
+
+from file_index import FileIndex, build_index_from_json, write_file_index
+from gather_file_info import FileInfoTable, format_timestamp
+from json_records import write_records
+
+BASE_TIME = 1_700_000_000
+
+
+def _table():
+    table = FileInfoTable()
+    # Одинаковые имена в разных директориях и повторяющиеся размеры
+    for number, (name, size) in enumerate([("b.txt", 30), ("a.txt", 10), ("ё.txt", 20),
+                                           ("a.txt", 20), ("c.txt", 0)]):
+        table.append(name, f"/data/dir{number}/{name}", size, BASE_TIME, BASE_TIME + number * 60)
+    return table
+
+
+@pytest.fixture
+def index(tmp_path):
+    index_path = str(tmp_path / "file_info.idx")
+    write_file_index(index_path, _table())
+    with FileIndex(index_path) as file_index:
+        yield file_index
+
+
+def test_records_match_table(index):
+    assert len(index) == 5
+    assert [fi.to_dict() for fi in index] == _table().to_dicts()
+
+
+def test_find(index):
+    assert sorted(fi.full_path for fi in index.find("a.txt")) == ["/data/dir1/a.txt", "/data/dir3/a.txt"]
+    assert [fi.full_path for fi in index.find("ё.txt")] == ["/data/dir2/ё.txt"]
+    assert index.find("missing.txt") == []
+
+
+def test_size_range(index):
+    assert [fi.file_size for fi in index.size_range(10, 20)] == [10, 20, 20]
+    assert [fi.file_size for fi in index.size_range(max_size=10)] == [0, 10]
+    assert [fi.file_size for fi in index.size_range(21)] == [30]
+
+
+def test_modified_since(index):
+    since = BASE_TIME + 120
+    assert [fi.filename for fi in index.modified_since(since)] == ["ё.txt", "a.txt", "c.txt"]
+    assert len(list(index.modified_since(format_timestamp(since)))) == 3
+
+
+def test_build_from_json(tmp_path):
+    json_path = str(tmp_path / "file_info.json")
+    index_path = str(tmp_path / "file_info.idx")
+    write_records(json_path, _table().to_dicts())
+    assert build_index_from_json(json_path, index_path) == 5
+    with FileIndex(index_path) as file_index:
+        assert [fi.to_dict() for fi in file_index] == _table().to_dicts()
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "file_info.idx"
+    path.write_bytes(b"NOPE" + b"\0" * 200)
+    with pytest.raises(ValueError):
+        FileIndex(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        FileIndex(str(path))
@@ -0,0 +1,47 @@
+import io
+import os
+import sys
+import stat
+import subprocess
+
+import pytest
+
+import files
+
+FILES_PY = os.path.abspath(files.__file__)
+
+
+def test_batch_reports_exit_code_per_command(capsys):
+    code = files.batch(io.StringIO("# комментарий\nunknown-command\nprocess --list-transforms\n"))
+    output = capsys.readouterr().out
+    assert code == 1
+    assert f"{files.EXIT_MARKER} 2\n" in output
+    assert "swap_case" in output and f"{files.EXIT_MARKER} 0\n" in output
+
+
+def test_server_socket_is_private_and_runs_commands(tmp_path):
+    # Сервер — отдельный процесс: перенаправление stdout в нём действует на весь процесс
+    socket_path = str(tmp_path / "files.sock")
+    server = subprocess.Popen([sys.executable, FILES_PY, "serve", "--socket", socket_path],
+                              cwd=str(tmp_path), stdout=subprocess.PIPE, text=True)
+    try:
+        # Файл сокета появляется при bind(), ещё до listen(): готовность —
+        # строка, которую сервер печатает, когда уже принимает подключения
+        assert socket_path in server.stdout.readline()
+
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        assert files.call(["unknown-command"], socket_path) == 2
+        assert files.call(["shutdown"], socket_path) == 0
+        server.communicate(timeout=10)
+        assert server.returncode == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.communicate()
+    assert not os.path.exists(socket_path)
+
+
+def test_tcp_port_mode_is_not_available():
+    with pytest.raises(SystemExit) as exit_info:
+        files.main(["serve", "--port", "8765"])
+    assert exit_info.value.code == 2
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from gather_file_info import FileInfo, FileInfoTable, format_timestamp, parse_timestamp, scan_files
+
+
+def _make_tree(root):
+    for rel_path in ("a.txt", "b.log", "sub/c.txt", "sub/deep/d.txt", "skip/e.txt", "other/f.txt"):
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(rel_path)
+
+
+def _scanned(root, **kwargs):
+    files = {}
+    for name, full_path, stats in scan_files(str(root), **kwargs):
+        assert os.path.basename(full_path) == name
+        assert stats.st_size == os.path.getsize(full_path)
+        files[os.path.relpath(full_path, root).replace(os.sep, "/")] = stats.st_size
+    return sorted(files)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_scan_is_recursive_by_default(tmp_path, workers):
+    _make_tree(tmp_path)
+    assert _scanned(tmp_path, workers=workers) == [
+        "a.txt", "b.log", "other/f.txt", "skip/e.txt", "sub/c.txt", "sub/deep/d.txt"]
+    assert _scanned(tmp_path, recursive=False, workers=workers) == ["a.txt", "b.log"]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_include_and_exclude_patterns(tmp_path, workers):
+    _make_tree(tmp_path)
+    assert _scanned(tmp_path, include=["*.txt"], exclude=["skip", "sub/deep"], workers=workers) == [
+        "a.txt", "other/f.txt", "sub/c.txt"]
+    # Шаблон сравнивается и с относительным путём
+    assert _scanned(tmp_path, include=["sub/d*/*"], workers=workers) == ["sub/deep/d.txt"]
+
+
+def test_several_directories(tmp_path):
+    _make_tree(tmp_path)
+    names = sorted(name for name, _, _ in scan_files([str(tmp_path / "sub"), str(tmp_path / "other")]))
+    assert names == ["c.txt", "d.txt", "f.txt"]
+
+
+def _file_infos():
+    return [FileInfo(f"file{number}.txt", f"/data/file{number}.txt", number * 100,
+                     format_timestamp(1_700_000_000 + number), format_timestamp(1_700_000_500 + number))
+            for number in range(5)]
+
+
+def test_file_info_has_no_instance_dict():
+    file_info = _file_infos()[0]
+    assert not hasattr(file_info, "__dict__")
+    assert FileInfo.from_dict(file_info.to_dict()).to_dict() == file_info.to_dict()
+
+
+def test_table_round_trip_matches_file_info():
+    file_infos = _file_infos()
+    dicts = [fi.to_dict() for fi in file_infos]
+    table = FileInfoTable.from_dicts(iter(dicts))
+    assert len(table) == len(file_infos)
+    assert table.to_dicts() == dicts
+    assert [fi.to_dict() for fi in table] == dicts
+    assert table[2].to_dict() == dicts[2]
+    assert FileInfoTable.from_file_infos(file_infos).to_dicts() == dicts
+
+
+def test_table_append_stat_matches_from_stat(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"12345")
+    stats = os.stat(path)
+    table = FileInfoTable()
+    table.append_stat("a.txt", str(path), stats)
+    assert table[0].to_dict() == FileInfo.from_stat("a.txt", str(path), stats).to_dict()
+    assert parse_timestamp(table.last_modified(0)) == int(stats.st_mtime)
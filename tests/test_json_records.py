@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+
+import json_records
+from json_records import RecordWriter, write_records, iter_records, records_path
+
+
+RECORDS = [
+    {"filename": "a.txt", "processed_text": "Привет, мир!\n\"кавычки\" и \\ слэш"},
+    {"filename": "b.txt", "size": 12345678901234567890, "ratio": 1.5e-7, "flags": [True, False, None]},
+    {"filename": "пустой.txt", "processed_text": ""},
+]
+
+
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_write_and_read_back(tmp_path, output_format):
+    path = records_path(str(tmp_path / "records.json"), output_format)
+    assert write_records(path, iter(RECORDS), output_format) == len(RECORDS)
+    assert list(iter_records(path)) == RECORDS
+
+
+def test_json_output_matches_json_dump(tmp_path):
+    path = str(tmp_path / "records.json")
+    write_records(path, RECORDS)
+    with open(path, "r", encoding="utf-8") as f:
+        assert f.read() == json.dumps(RECORDS, ensure_ascii=False, indent=4)
+
+
+@pytest.mark.parametrize("chunk_text", ["[]", "[ ]", "[\n    1,\n    2\n]"])
+def test_small_arrays(tmp_path, chunk_text):
+    path = tmp_path / "records.json"
+    path.write_text(chunk_text, encoding="utf-8")
+    assert list(iter_records(str(path))) == json.loads(chunk_text)
+
+
+def test_large_record_is_read_in_linear_time(tmp_path):
+    # Повторный разбор недочитанной записи не должен делать чтение квадратичным:
+    # запись в 16 млн символов читается не дольше нескольких json.load
+    size_chars = 16 * 1024 * 1024
+    records = [{"filename": "big.txt", "original_text": "Привет, мир! " * (size_chars // 13 + 1)},
+               {"filename": "small.txt"}]
+    path = str(tmp_path / "records.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=4)
+
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streamed = list(iter_records(path))
+    stream_seconds = time.perf_counter() - start
+
+    assert streamed == expected
+    assert stream_seconds <= max(5 * load_seconds, 0.5)
+
+
+def test_records_path():
+    assert records_path("output/file_info.json", "jsonl") == "output/file_info.jsonl"
+    assert records_path("output/file_info.jsonl") == "output/file_info.json"
+    with pytest.raises(ValueError):
+        records_path("output/file_info.json", "xml")
+
+
+def test_jsonl_has_one_record_per_line(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    write_records(path, RECORDS, "jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == RECORDS
+
+
+def test_array_is_read_in_tiny_chunks(tmp_path):
+    path = str(tmp_path / "records.json")
+    write_records(path, RECORDS)
+    with open(path, "r", encoding="utf-8") as f:
+        assert list(json_records._iter_json_array(f, chunk_size=1)) == RECORDS
+
+
+@pytest.mark.parametrize("text", ["", "{}", "[1, 2", "[1 2]"])
+def test_malformed_array_is_rejected(tmp_path, text):
+    path = tmp_path / "records.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_records(str(path)))
+
+
+def test_malformed_line_reports_line_number(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_text('{"a": 1}\n\n{"a": \n', encoding="utf-8")
+    with pytest.raises(ValueError, match="строке 3"):
+        list(iter_records(str(path)))
+
+
+def test_aborted_writer_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "records.json")
+    write_records(path, RECORDS[:1])
+    with pytest.raises(RuntimeError):
+        with RecordWriter(path) as writer:
+            writer.write(RECORDS[1])
+            raise RuntimeError("сбой посреди записи")
+    assert list(iter_records(path)) == RECORDS[:1]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["records.json"]
@@ -0,0 +1,160 @@
+import os
+
+import pytest
+
+import serialize_processed_data
+from json_records import iter_records
+from gather_file_info import gather_file_info
+from serialize_processed_data import RAW_DIR, PROCESSED_DIR, PROCESSED_DATA_PATH, FILE_INFO_PATH, process_files
+from setup_project_structure import generate_corpus
+
+
+def _write_raw(name, data):
+    with open(os.path.join(RAW_DIR, name), "wb") as f:
+        f.write(data)
+
+
+def _processed_files():
+    contents = {}
+    for name in sorted(os.listdir(PROCESSED_DIR)):
+        with open(os.path.join(PROCESSED_DIR, name), "rb") as f:
+            contents[name] = f.read()
+    return contents
+
+
+def _texts(records):
+    return sorted((record["filename"], record.get("original_text"), record.get("processed_text"))
+                  for record in records)
+
+
+def _clear_processed():
+    for name in os.listdir(PROCESSED_DIR):
+        os.remove(os.path.join(PROCESSED_DIR, name))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_corpus("project_root", file_count=24, mean_size=300, seed=1)
+    _write_raw("crlf.txt", "Line One\r\nline two\r\n".encode("ascii"))
+    _write_raw("bom.txt", "﻿Привет, Мир".encode("utf-8"))
+    _write_raw("cp1251.txt", "Съешь же ещё этих мягких французских булок".encode("cp1251"))
+    _write_raw("empty.txt", b"")
+    return tmp_path
+
+
+def test_parallel_matches_sequential(project):
+    sequential = process_files(workers=1)
+    sequential_files = _processed_files()
+    assert len(sequential) == len(os.listdir(RAW_DIR))
+
+    _clear_processed()
+    parallel = process_files(workers=2)
+    assert _texts(parallel) == _texts(sequential)
+    assert _processed_files() == sequential_files
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_streaming_matches_whole_file(project, workers, chunk_size):
+    process_files()
+    expected = _processed_files()
+
+    _clear_processed()
+    records = list(serialize_processed_data.iter_processed_files(workers=workers, streaming=True,
+                                                                 chunk_size=chunk_size))
+    assert sorted(record["filename"] for record in records) == sorted(expected)
+    assert all("processed_text" not in record for record in records)
+    assert _processed_files() == expected
+
+
+def _summary(capsys):
+    return capsys.readouterr().out.strip().splitlines()
+
+
+def test_incremental_run_reprocesses_only_changed_files(project, capsys):
+    serialize_processed_data.main()
+    raw_count = len(os.listdir(RAW_DIR))
+    assert f"Обработано файлов: {raw_count}, без изменений: 0, удалено устаревших: 0" in _summary(capsys)
+
+    serialize_processed_data.main()
+    assert any(line.startswith("Изменений нет") for line in _summary(capsys))
+
+    # Файл «потрогали» без изменения содержимого — он не обрабатывается заново
+    os.utime(os.path.join(RAW_DIR, "crlf.txt"), ns=(0, 0))
+    # Тот же размер, другое содержимое
+    _write_raw("cp1251.txt", "съешь же ещё этих мягких французских булок".encode("cp1251"))
+    _write_raw("new.txt", b"Brand New")
+    os.remove(os.path.join(RAW_DIR, "bom.txt"))
+    serialize_processed_data.main()
+    assert (f"Обработано файлов: 2, без изменений: {raw_count - 2}, удалено устаревших: 1"
+            in _summary(capsys))
+    assert not os.path.exists(os.path.join(PROCESSED_DIR, "bom_processed.txt"))
+
+    incremental = _texts(iter_records(PROCESSED_DATA_PATH))
+    incremental_files = _processed_files()
+    assert ("cp1251_processed.txt", "съешь же ещё этих мягких французских булок",
+            "СЪЕШЬ ЖЕ ЕЩЁ ЭТИХ МЯГКИХ ФРАНЦУЗСКИХ БУЛОК") in incremental
+
+    _clear_processed()
+    serialize_processed_data.main(full=True)
+    assert _texts(iter_records(PROCESSED_DATA_PATH)) == incremental
+    assert _processed_files() == incremental_files
+
+
+def test_changing_options_forces_full_rebuild(project, capsys):
+    serialize_processed_data.main()
+    capsys.readouterr()
+    serialize_processed_data.main(output_format="jsonl")
+    raw_count = len(os.listdir(RAW_DIR))
+    assert f"Обработано файлов: {raw_count}, без изменений: 0, удалено устаревших: 0" in _summary(capsys)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_dedup_links_identical_inputs(project, workers):
+    for number in range(3):
+        _write_raw(f"dup{number}.txt", "Одинаковое Содержимое".encode("utf-8"))
+    plain = process_files()
+    expected = _processed_files()
+
+    _clear_processed()
+    deduplicated = process_files(workers=workers, dedup=True)
+    assert _texts(deduplicated) == _texts(plain)
+    assert _processed_files() == expected
+    inodes = {os.stat(os.path.join(PROCESSED_DIR, f"dup{number}_processed.txt")).st_ino
+              for number in range(3)}
+    assert len(inodes) == 1
+
+
+def test_changed_duplicate_does_not_overwrite_shared_output(project):
+    for number in range(2):
+        _write_raw(f"dup{number}.txt", b"Same Text")
+    serialize_processed_data.main(dedup=True)
+    _write_raw("dup1.txt", b"Other Text")
+    serialize_processed_data.main(dedup=True)
+
+    outputs = _processed_files()
+    assert outputs["dup0_processed.txt"] == b"sAME tEXT"
+    assert outputs["dup1_processed.txt"] == b"oTHER tEXT"
+
+
+def _file_info():
+    return sorted(iter_records(FILE_INFO_PATH), key=lambda record: record["filename"])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_file_info_in_same_pass_matches_gather_file_info(project, workers):
+    serialize_processed_data.main(workers=workers, file_info=True)
+    single_pass = _file_info()
+    assert len(single_pass) == len(os.listdir(RAW_DIR))
+    gather_file_info()
+    assert _file_info() == single_pass
+
+    # Инкрементальный запуск: опись остаётся согласованной с data/processed/
+    _write_raw("new.txt", b"Brand New")
+    os.remove(os.path.join(RAW_DIR, "bom.txt"))
+    serialize_processed_data.main(workers=workers, file_info=True)
+    single_pass = _file_info()
+    gather_file_info()
+    assert _file_info() == single_pass
+    assert "new_processed.txt" in {record["filename"] for record in single_pass}
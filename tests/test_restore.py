@@ -0,0 +1,106 @@
+import os
+import zipfile
+
+import pytest
+
+from create_backup import create_backup
+from restore_backup import restore_backup
+
+DATA_DIR = os.path.join("project_root", "data")
+BACKUPS_DIR = os.path.join("project_root", "backups")
+
+
+def _write(rel_path, text):
+    path = os.path.join(DATA_DIR, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _read(rel_path):
+    with open(os.path.join(DATA_DIR, rel_path), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(BACKUPS_DIR)
+    return tmp_path
+
+
+def test_restore_replaces_file_without_touching_hard_links(project):
+    _write("raw/a.txt", "исходный текст")
+    os.link(os.path.join(DATA_DIR, "raw/a.txt"), os.path.join(DATA_DIR, "linked.txt"))
+    create_backup(full=True)
+    _write("raw/a.txt", "изменено на месте")
+
+    restore_backup(paths=["raw"], skip_identical=False)
+    assert _read("raw/a.txt") == "исходный текст"
+    # Вторая ссылка на прежний inode не переписана восстановлением
+    assert _read("linked.txt") == "изменено на месте"
+
+
+def test_invalid_path_is_rejected_before_anything_is_written(project):
+    _write("raw/ok.txt", "на диске")
+    with zipfile.ZipFile(os.path.join(BACKUPS_DIR, "backup_20240101.zip"), "w") as zf:
+        zf.writestr("raw/ok.txt", "из архива")
+        zf.writestr("../outside.txt", "за пределами data/")
+
+    with pytest.raises(ValueError):
+        restore_backup("backup_20240101.zip", skip_identical=False)
+    assert _read("raw/ok.txt") == "на диске"
+    assert not os.path.exists(os.path.join("project_root", "outside.txt"))
+
+
+def test_failed_member_keeps_old_file_and_restores_others(project):
+    _write("raw/a.txt", "aaa")
+    _write("raw/b.txt", "bbb")
+    backup = create_backup(full=True)
+    with zipfile.ZipFile(backup) as zf:
+        members = {name: zf.read(name) for name in zf.namelist()}
+    members["raw/a.txt"] = b"corrupted"
+    with zipfile.ZipFile(backup, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    _write("raw/a.txt", "текущий a")
+    _write("raw/b.txt", "текущий b")
+
+    with pytest.raises(ValueError):
+        restore_backup(skip_identical=False, workers=1)
+    assert _read("raw/a.txt") == "текущий a"
+    assert _read("raw/b.txt") == "bbb"
+    assert sorted(os.listdir(os.path.join(DATA_DIR, "raw"))) == ["a.txt", "b.txt"]
+
+
+def test_selective_restore_by_path_and_pattern(project):
+    for rel_path in ("raw/a.txt", "raw/b.log", "processed/a_processed.txt"):
+        _write(rel_path, "из бэкапа " + rel_path)
+    create_backup(full=True)
+    for rel_path in ("raw/a.txt", "raw/b.log", "processed/a_processed.txt"):
+        _write(rel_path, "изменено")
+
+    restore_backup(paths=["raw"], patterns=["*.txt"], workers=2)
+    assert _read("raw/a.txt") == "из бэкапа raw/a.txt"
+    assert _read("raw/b.log") == "изменено"
+    assert _read("processed/a_processed.txt") == "изменено"
+
+
+def test_identical_files_are_skipped(project, capsys):
+    _write("raw/a.txt", "aaa")
+    _write("raw/b.txt", "bbb")
+    create_backup(full=True)
+    _write("raw/b.txt", "ccc")
+    capsys.readouterr()
+
+    restore_backup()
+    assert "(восстановлено файлов: 1, без изменений: 1)" in capsys.readouterr().out
+    assert _read("raw/b.txt") == "bbb"
+
+
+def test_restore_archive_without_snapshot(project):
+    with zipfile.ZipFile(os.path.join(BACKUPS_DIR, "backup_20240101.zip"), "w") as zf:
+        zf.writestr("raw/old.txt", "старый формат")
+        zf.writestr("raw/sub/", "")
+    restore_backup()
+    assert _read("raw/old.txt") == "старый формат"
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import sharded_output
+import serialize_processed_data
+from sharded_output import ShardedWriter, iter_sharded_records, remove_sharded
+from serialize_processed_data import RAW_DIR, PROCESSED_DIR, OUTPUT_DIR, PROCESSED_DATA_PATH
+
+
+def _records(count):
+    return [{"filename": f"file{number}.txt", "processed_text": "x" * (number % 7),
+             "last_modified": f"2024-01-{number % 3 + 1:02d} 00:00:00"} for number in range(count)]
+
+
+def _read_shards(directory):
+    contents = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            contents[name] = f.read()
+    return contents
+
+
+@pytest.mark.parametrize("partition", ["hash", "date"])
+@pytest.mark.parametrize("output_format", ["json", "jsonl"])
+def test_parallel_writer_matches_sequential_with_bounded_buffers(tmp_path, monkeypatch,
+                                                                 partition, output_format):
+    monkeypatch.setattr(sharded_output, "SHARD_BUFFER_RECORDS", 7)
+    records = _records(100)
+
+    with ShardedWriter(str(tmp_path / "sequential"), partition, 4, output_format, workers=1) as writer:
+        for record in records:
+            writer.write(record)
+
+    with ShardedWriter(str(tmp_path / "parallel"), partition, 4, output_format, workers=2) as writer:
+        for record in records:
+            writer.write(record)
+            # В памяти не больше порога записей и 2 * workers пачек в работе
+            assert writer._buffered < 7
+            assert len(writer._encoding) <= 4
+
+    assert _read_shards(tmp_path / "parallel") == _read_shards(tmp_path / "sequential")
+    assert sorted(r["filename"] for r in iter_sharded_records(str(tmp_path / "parallel"))) == \
+        sorted(r["filename"] for r in records)
+
+
+def test_remove_sharded_keeps_directories_without_index(tmp_path):
+    directory = tmp_path / "processed_data"
+    directory.mkdir()
+    (directory / "notes.txt").write_text("не шарды")
+    assert not remove_sharded(str(directory))
+    assert directory.is_dir()
+
+
+def test_single_file_output_removes_previous_shards(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in (RAW_DIR, PROCESSED_DIR, OUTPUT_DIR):
+        os.makedirs(directory)
+    with open(os.path.join(RAW_DIR, "a.txt"), "w", encoding="utf-8") as f:
+        f.write("Text")
+
+    serialize_processed_data.main(file_info=True, partition="hash", shard_count=2)
+    assert os.path.isdir(os.path.join(OUTPUT_DIR, "processed_data"))
+    assert os.path.isdir(os.path.join(OUTPUT_DIR, "file_info"))
+
+    serialize_processed_data.main(file_info=True)
+    assert os.path.isfile(PROCESSED_DATA_PATH)
+    assert not os.path.exists(os.path.join(OUTPUT_DIR, "processed_data"))
+    assert not os.path.exists(os.path.join(OUTPUT_DIR, "file_info"))
@@ -0,0 +1,79 @@
+import os
+import json
+import pstats
+
+import pytest
+
+import stage_metrics
+from generate_final_report import generate_final_report
+from stage_metrics import METRICS_PATH, instrumented_run, load_metrics, measure, timed
+
+
+@timed("double", size=lambda result, data: len(data))
+def _double(data):
+    return data * 2
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    stage_metrics.disable()
+
+
+def test_nothing_is_recorded_while_disabled(project):
+    assert _double("ab") == "abab"
+    with measure("block"):
+        pass
+    assert stage_metrics._active is None
+
+
+def test_stages_are_measured(project):
+    metrics = stage_metrics.enable()
+    for _ in range(3):
+        _double("abcd")
+    with measure("block", 100):
+        pass
+    stages = metrics.summary()["stages"]
+    assert stages["double"]["calls"] == 3
+    assert stages["double"]["bytes"] == 12
+    assert stages["block"]["calls"] == 1 and stages["block"]["bytes"] == 100
+    assert stages["double"]["p50_ms"] <= stages["double"]["max_ms"]
+
+
+def test_reservoir_is_bounded(monkeypatch):
+    monkeypatch.setattr(stage_metrics, "RESERVOIR_SIZE", 10)
+    stats = stage_metrics._StageStats()
+    for number in range(1000):
+        stats.add(number / 1000, 1)
+    assert len(stats.samples) == 10
+    assert stats.summary()["calls"] == 1000
+    assert stats.summary()["max_ms"] == 999.0
+
+
+def test_instrumented_run_saves_metrics_for_report(project):
+    profile_path = str(project / "run.prof")
+    with instrumented_run("serialize_processed_data", enabled=True, profile_path=profile_path):
+        _double("x")
+    assert stage_metrics._active is None
+    pstats.Stats(profile_path)
+
+    with instrumented_run("create_backup", enabled=True):
+        pass
+    runs = load_metrics()
+    assert sorted(runs) == ["create_backup", "serialize_processed_data"]
+    assert runs["serialize_processed_data"]["stages"]["double"]["calls"] == 1
+
+    generate_final_report()
+    with open(os.path.join("project_root", "output", "final_report.json"), "r", encoding="utf-8") as f:
+        tasks = {task["task_name"]: task for task in json.load(f)["tasks"]}
+    processing = tasks["Обработка файлов и сериализация в JSON"]
+    assert processing["time_spent_seconds"] == round(runs["serialize_processed_data"]["wall_seconds"], 3)
+    assert tasks["Валидация JSON по схеме (jsonschema)"]["time_spent_seconds"] is None
+
+
+def test_corrupted_metrics_file_is_ignored(project):
+    os.makedirs(os.path.dirname(METRICS_PATH))
+    with open(METRICS_PATH, "w", encoding="utf-8") as f:
+        f.write("{не json")
+    assert load_metrics() == {}
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import serialize_processed_data
+from json_records import iter_records
+from serialize_processed_data import RAW_DIR, PROCESSED_DIR, iter_processed_files, process_files
+from setup_project_structure import generate_corpus
+from staged_pipeline import StagedPipeline
+
+
+def _processed_files():
+    contents = {}
+    for name in sorted(os.listdir(PROCESSED_DIR)):
+        with open(os.path.join(PROCESSED_DIR, name), "rb") as f:
+            contents[name] = f.read()
+        os.remove(os.path.join(PROCESSED_DIR, name))
+    return contents
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generate_corpus("project_root", file_count=30, mean_size=300, seed=2)
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers, queue_size", [(1, 1), (2, 8)])
+def test_pipeline_matches_plain_processing(project, workers, queue_size):
+    expected = process_files()
+    expected_files = _processed_files()
+
+    pipeline = StagedPipeline(workers=workers, concurrency={"read": 3, "write": 2}, queue_size=queue_size)
+    records = list(iter_processed_files(pipeline=pipeline))
+    # Порядок записей — как у списка файлов, несмотря на параллельные этапы
+    assert [record["filename"] for record in records] == [record["filename"] for record in expected]
+    assert ([(r["original_text"], r["processed_text"]) for r in records]
+            == [(r["original_text"], r["processed_text"]) for r in expected])
+    assert all("file_size_bytes" in record for record in records)
+    assert _processed_files() == expected_files
+
+
+def _output_records():
+    # Дата изменения результата зависит от момента записи — её не сравниваем
+    return [dict(record, last_modified=None)
+            for record in iter_records(serialize_processed_data.PROCESSED_DATA_PATH)]
+
+
+def test_main_with_pipeline_matches_plain(project):
+    serialize_processed_data.main(full=True)
+    expected = _output_records()
+    serialize_processed_data.main(full=True, pipeline=True, workers=2, queue_size=2)
+    assert _output_records() == expected
+
+
+def test_consumer_can_stop_early(project):
+    pipeline = StagedPipeline(queue_size=1)
+    results = pipeline.run(sorted(os.listdir(RAW_DIR)), [None] * 30)
+    assert next(results)[0] is not None
+    results.close()
+
+
+def test_bad_configuration_is_rejected():
+    with pytest.raises(ValueError):
+        StagedPipeline(concurrency={"compress": 2})
+    with pytest.raises(ValueError):
+        StagedPipeline(concurrency={"read": 0})
+    with pytest.raises(ValueError):
+        list(iter_processed_files(filenames=[], pipeline=StagedPipeline(), streaming=True))
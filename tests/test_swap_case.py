@@ -0,0 +1,29 @@
+import pytest
+
+from serialize_processed_data import swap_case, swap_case_bytes
+
+
+def _reference(text):
+    # Исходное посимвольное определение swap_case()
+    return "".join(char.lower() if char.isupper() else char.upper() for char in text)
+
+
+def test_swap_case_matches_per_character_definition_for_all_code_points():
+    text = "".join(map(chr, range(0x110000)))
+    assert swap_case(text) == _reference(text)
+
+
+@pytest.mark.parametrize("text", ["", "Hello, World!", "ΣΑΣ σας ς", "ǅemal ǈ ǋ", "Straße İstanbul ﬁ", "ÿ µ"])
+def test_swap_case_samples(text):
+    assert swap_case(text) == _reference(text)
+
+
+@pytest.mark.parametrize("text, encoding", [
+    ("Plain ASCII text 123", "ascii"),
+    ("Plain ASCII text 123", "cp1251"),
+    ("ÿ ß Éé µ", "iso-8859-1"),
+    ("Привет, Мир", "cp1251"),
+    ("Привет, Мир ΣΑΣ", "utf-8"),
+])
+def test_swap_case_bytes_returns_utf8(text, encoding):
+    assert swap_case_bytes(text.encode(encoding), encoding) == _reference(text).encode("utf-8")
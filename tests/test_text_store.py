@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import serialize_processed_data
+from json_records import iter_records
+from serialize_processed_data import RAW_DIR, PROCESSED_DIR, OUTPUT_DIR, PROCESSED_DATA_PATH, TEXT_STORE_DIR
+from text_store import TextStore, LazyTextRecord, blob_ids, iter_records_lazy
+
+
+def _blob_files(store_dir):
+    return sorted(name for _, _, names in os.walk(store_dir) for name in names)
+
+
+def test_externalize_and_lazy_read(tmp_path):
+    store = TextStore(str(tmp_path / "texts"), inline_threshold=5)
+    record = {"filename": "a.txt", "original_text": "длинный текст", "processed_text": "short"}
+    store.externalize(record)
+    assert "original_text" not in record and record["processed_text"] == "short"
+    assert blob_ids(record) == [record["original_text_blob"]]
+
+    lazy = LazyTextRecord(record, store)
+    assert "original_text" in lazy
+    assert lazy.get("original_text") == "длинный текст"
+    assert lazy["processed_text"] == "short"
+    assert lazy.get("missing", "нет") == "нет"
+    with pytest.raises(KeyError):
+        lazy["missing"]
+
+
+def test_identical_texts_are_stored_once_and_garbage_is_collected(tmp_path):
+    store = TextStore(str(tmp_path / "texts"))
+    first = store.put("один и тот же текст")
+    assert store.put("один и тот же текст") == first
+    second = store.put("другой текст")
+    assert len(_blob_files(store.store_dir)) == 2
+
+    assert store.collect_garbage({first}) == 1
+    assert store.get(first) == "один и тот же текст"
+    assert _blob_files(store.store_dir) == [first + ".z"]
+    with pytest.raises(FileNotFoundError):
+        store.get(second)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in (RAW_DIR, PROCESSED_DIR, OUTPUT_DIR):
+        os.makedirs(directory)
+    return tmp_path
+
+
+def _write_raw(name, text):
+    with open(os.path.join(RAW_DIR, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_main_with_blob_texts(project):
+    _write_raw("long.txt", "Long Text " * 100)
+    _write_raw("short.txt", "Short")
+    serialize_processed_data.main(texts="blob", inline_threshold=50)
+    expected = {"long_processed.txt": ("Long Text " * 100, "lONG tEXT " * 100),
+              "short_processed.txt": ("Short", "sHORT")}
+
+    records = {record["filename"]: record for record in iter_records(PROCESSED_DATA_PATH)}
+    assert "original_text" not in records["long_processed.txt"]
+    assert records["short_processed.txt"]["processed_text"] == "sHORT"
+    lazy = {record["filename"]: (record["original_text"], record["processed_text"])
+            for record in iter_records_lazy(PROCESSED_DATA_PATH, TEXT_STORE_DIR)}
+    assert lazy == expected
+    assert len(_blob_files(TEXT_STORE_DIR)) == 2
+
+    # Тексты изменившегося файла больше не нужны — они удаляются из хранилища
+    _write_raw("long.txt", "Other Text " * 100)
+    serialize_processed_data.main(texts="blob", inline_threshold=50)
+    lazy = {record["filename"]: record["processed_text"]
+            for record in iter_records_lazy(PROCESSED_DATA_PATH, TEXT_STORE_DIR)}
+    assert lazy["long_processed.txt"] == "oTHER tEXT " * 100
+    assert len(_blob_files(TEXT_STORE_DIR)) == 2
@@ -0,0 +1,65 @@
+import random
+import unicodedata
+
+import pytest
+
+# swap_case регистрируется в serialize_processed_data.py
+import serialize_processed_data  # noqa: F401
+from transforms import TransformChain, available_transforms, _composes_with_previous
+
+# Тексты для проверки преобразований порциями: разложенные (NFD) хангыль
+# и латиница с диакритикой, каннада и ория с составными гласными
+CHUNKED_TRANSFORM_SAMPLES = [
+    "\u1100\u1161\u11a8 \u1112\u1161\u11ab\u1100\u116e\u11a8\u110b\u1165",
+    "Cafe\u0301 e\u0323\u0301 A\u030a ǅ Σ ς\n  trailing  \n\nmail: user@example.com\n",
+    "\u0c95\u0cbf\u0cd5 \u0cc6\u0cc2\u0cd5 \u0b47\u0b3e \u0b47\u0b57",
+]
+
+
+def _stream(chain, text, chunk_size):
+    session = chain.start()
+    parts = [session.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    return "".join(parts) + session.flush()
+
+
+def _tricky_chars():
+    """
+    Символы, на которых NFC порциями ломается чаще всего: комбинирующие,
+    составляющиеся назад, не NFC сами по себе (U+0F73, U+0F81 и т.п.),
+    плюс обычные начальные символы и слоги хангыля.
+    """
+    composes = _composes_with_previous()
+    chars = [chr(code_point) for code_point in range(0x110000)
+             if unicodedata.combining(chr(code_point)) or chr(code_point) in composes
+             or not unicodedata.is_normalized("NFC", chr(code_point))]
+    chars += [chr(code_point) for code_point in range(0x1100, 0x1113)]
+    chars += [chr(code_point) for code_point in range(0xAC00, 0xAC40)]
+    return chars + list("Aa ಙྟ")
+
+
+@pytest.mark.parametrize("name", [name for name, _, _ in available_transforms()])
+def test_chunked_transform_matches_whole_text(name):
+    # Как в потоковом режиме с --chunk-size 1
+    chain = TransformChain([name])
+    for text in CHUNKED_TRANSFORM_SAMPLES:
+        assert _stream(chain, text, 1) == chain.apply(text)
+
+
+def test_normalize_nfc_reordering_across_chunks():
+    # U+0F81 раскладывается в U+0F71 U+0F80, которые переставляются
+    # с U+0326 U+0360 из предыдущей порции
+    text = "".join(map(chr, [0x300, 0xC99, 0x119D, 0x339, 0xF9F, 0x11B5, 0x326, 0x360,
+                             0xF81, 0xB74, 0x116A, 0xF25, 0x119A]))
+    chain = TransformChain(["normalize_nfc"])
+    assert _stream(chain, text, 1) == unicodedata.normalize("NFC", text)
+
+
+def test_normalize_nfc_random_chunks():
+    rng = random.Random(20)
+    chars = _tricky_chars()
+    chain = TransformChain(["normalize_nfc"])
+    for _ in range(3000):
+        text = "".join(rng.choice(chars) for _ in range(rng.randint(1, 24)))
+        expected = unicodedata.normalize("NFC", text)
+        for chunk_size in (1, 2, 3, 5):
+            assert _stream(chain, text, chunk_size) == expected, [hex(ord(c)) for c in text]
@@ -0,0 +1,78 @@
+import os
+import json
+
+import pytest
+
+import validate_file_info
+from json_records import write_records
+from validate_file_info import validate_records
+
+SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "filename": {"type": "string"},
+            "file_size": {"type": "integer", "minimum": 0},
+        },
+        "required": ["filename", "file_size"],
+    },
+}
+
+VALID = {"filename": "a.txt", "file_size": 10}
+INVALID = [{"filename": "b.txt"}, {"filename": 1, "file_size": 1}, {"filename": "c.txt", "file_size": -1},
+           {"filename": "d.txt", "file_size": True}, "не объект"]
+
+
+def _records():
+    records = []
+    for number in range(50):
+        records.append(dict(VALID, filename=f"file{number}.txt"))
+        if number % 10 == 0:
+            # 5.0 быстрый путь отвергает, но jsonschema считает целым — запись валидна
+            records.append({"filename": "e.txt", "file_size": 5.0})
+            records.extend(INVALID)
+    return records
+
+
+def _expected_errors():
+    from jsonschema import Draft7Validator
+    validator = Draft7Validator(SCHEMA["items"])
+    return [(index, error.message, list(error.path))
+            for index, record in enumerate(_records()) for error in validator.iter_errors(record)]
+
+
+@pytest.mark.parametrize("workers, batch_size", [(1, 1000), (1, 3), (2, 3)])
+def test_errors_match_plain_jsonschema(workers, batch_size):
+    errors = list(validate_records(iter(_records()), SCHEMA, workers=workers, batch_size=batch_size))
+    assert errors == _expected_errors()
+    assert len({index for index, _, _ in errors}) == 5 * len(INVALID)
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output_dir = os.path.join("project_root", "output")
+    os.makedirs(output_dir)
+    with open(os.path.join(output_dir, "file_info_schema.json"), "w", encoding="utf-8") as f:
+        json.dump(SCHEMA, f)
+    return output_dir
+
+
+@pytest.mark.parametrize("input_format", ["json", "jsonl"])
+def test_cli_exit_code(project, input_format):
+    data_path = os.path.join(project, f"file_info.{input_format}")
+    write_records(data_path, [VALID] * 3, input_format)
+    validate_file_info.cli(["--format", input_format])
+
+    write_records(data_path, [VALID] + INVALID, input_format)
+    with pytest.raises(SystemExit) as exc_info:
+        validate_file_info.cli(["--format", input_format, "--workers", "2", "--batch-size", "2"])
+    assert exc_info.value.code == 1
+
+
+def test_missing_file_is_an_error(project):
+    assert validate_file_info.validate_json_file() is None
+    with pytest.raises(SystemExit):
+        validate_file_info.cli([])
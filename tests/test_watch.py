@@ -0,0 +1,70 @@
+import os
+import json
+
+import pytest
+
+import serialize_processed_data
+import watch_raw
+from serialize_processed_data import RAW_DIR, PROCESSED_DIR, OUTPUT_DIR, PROCESSED_DATA_PATH
+
+
+def _write_raw(name, text):
+    with open(os.path.join(RAW_DIR, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _processed_data():
+    with open(PROCESSED_DATA_PATH, "r", encoding="utf-8") as f:
+        return {record["filename"]: record["processed_text"] for record in json.load(f)}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in (RAW_DIR, PROCESSED_DIR, OUTPUT_DIR):
+        os.makedirs(directory)
+    for number in range(5):
+        _write_raw(f"file{number}.txt", f"Text {number}")
+    return tmp_path
+
+
+def test_update_with_state_does_not_reload_output(project, monkeypatch):
+    state = {}
+    serialize_processed_data.main(file_info=True, state=state)
+    assert len(state["records"]) == 5
+
+    def reload(*args, **kwargs):
+        raise AssertionError("processed_data.json прочитан заново")
+
+    monkeypatch.setattr(serialize_processed_data, "_load_previous_records", reload)
+    _write_raw("file1.txt", "Changed")
+    _write_raw("new.txt", "New")
+    serialize_processed_data.main(file_info=True, changed_hint={"file1.txt", "new.txt"}, state=state)
+
+    records = _processed_data()
+    assert records["file1_processed.txt"] == "cHANGED"
+    assert records["new_processed.txt"] == "nEW"
+    assert records["file0_processed.txt"] == "tEXT 0"
+    assert len(records) == 6
+
+
+def test_failed_update_resets_state(project, monkeypatch):
+    state = {}
+    serialize_processed_data.main(state=state)
+
+    def fail(*args, **kwargs):
+        raise OSError("диск недоступен")
+
+    monkeypatch.setattr(serialize_processed_data, "write_records", fail)
+    _write_raw("file2.txt", "Changed")
+    assert not watch_raw._update({}, state, {"file2.txt"})
+    assert state == {}
+
+
+@pytest.mark.parametrize("argv", [["--shards", "4"], ["--partition", "hash", "--shards", "0"],
+                                  ["--partition", "date", "--shards", "2"]])
+def test_shards_requires_positive_hash_partition(argv, monkeypatch):
+    monkeypatch.setattr(watch_raw, "watch", lambda **kwargs: pytest.fail("наблюдение запущено"))
+    with pytest.raises(SystemExit) as exit_info:
+        watch_raw.main(argv)
+    assert exit_info.value.code == 2
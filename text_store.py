@@ -0,0 +1,135 @@
+import os
+import zlib
+import hashlib
+
+from json_records import iter_records
+
+# Поля записей processed_data.json, которые можно вынести в хранилище
+TEXT_FIELDS = ("original_text", "processed_text")
+
+# Суффикс поля со ссылкой на вынесенный текст: original_text -> original_text_blob
+BLOB_SUFFIX = "_blob"
+
+# Тексты не длиннее порога (в символах) остаются в JSON как есть
+DEFAULT_INLINE_THRESHOLD = 4096
+
+# Уровень сжатия zlib: быстрое сжатие, тексты всё равно сжимаются в разы
+COMPRESSION_LEVEL = 6
+
+
+class TextStore:
+    """
+    Хранилище текстов вне processed_data.json: каждый текст сжимается zlib
+    и сохраняется в отдельный файл, имя которого — хэш содержимого (BLAKE2b).
+    Одинаковые тексты хранятся один раз, а записи, перенесённые без изменений
+    при инкрементальном запуске, продолжают ссылаться на те же файлы.
+
+    Раскладка: <store_dir>/<первые 2 символа хэша>/<хэш>.z
+    """
+    def __init__(self, store_dir, inline_threshold=DEFAULT_INLINE_THRESHOLD):
+        self.store_dir = store_dir
+        self.inline_threshold = inline_threshold
+
+    def _blob_path(self, blob_id):
+        return os.path.join(self.store_dir, blob_id[:2], blob_id + ".z")
+
+    def put(self, text):
+        """
+        Сохраняет текст и возвращает его идентификатор (хэш).
+        Если такой текст уже есть, файл не перезаписывается.
+        """
+        data = text.encode("utf-8")
+        blob_id = hashlib.blake2b(data, digest_size=16).hexdigest()
+        blob_path = self._blob_path(blob_id)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = blob_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data, COMPRESSION_LEVEL))
+            os.replace(tmp_path, blob_path)
+        return blob_id
+
+    def get(self, blob_id):
+        """
+        Загружает текст по идентификатору.
+        """
+        with open(self._blob_path(blob_id), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def externalize(self, record):
+        """
+        Выносит длинные тексты записи в хранилище: поле original_text
+        заменяется на original_text_blob с идентификатором (то же для processed_text).
+        Тексты не длиннее inline_threshold символов остаются в записи.
+        """
+        for field in TEXT_FIELDS:
+            text = record.get(field)
+            if text is not None and len(text) > self.inline_threshold:
+                record[field + BLOB_SUFFIX] = self.put(text)
+                del record[field]
+        return record
+
+    def collect_garbage(self, referenced):
+        """
+        Удаляет из хранилища тексты, на которые не ссылается ни одна запись
+        (referenced — множество идентификаторов). Возвращает число удалённых файлов.
+        """
+        removed = 0
+        if not os.path.isdir(self.store_dir):
+            return removed
+        for prefix in os.listdir(self.store_dir):
+            prefix_dir = os.path.join(self.store_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                blob_id, extension = os.path.splitext(name)
+                if extension == ".z" and blob_id not in referenced:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed += 1
+        return removed
+
+
+def blob_ids(record):
+    """
+    Идентификаторы текстов, на которые ссылается запись.
+    """
+    return [record[field + BLOB_SUFFIX] for field in TEXT_FIELDS if field + BLOB_SUFFIX in record]
+
+
+class LazyTextRecord(dict):
+    """
+    Запись processed_data.json с ленивой загрузкой вынесенных текстов:
+    record["original_text"] читает текст из хранилища при первом обращении
+    (и запоминает его), остальные поля доступны как в обычном словаре.
+    get() и оператор in тоже учитывают вынесенные тексты.
+    """
+    def __init__(self, data, store):
+        super().__init__(data)
+        self._store = store
+
+    def __missing__(self, key):
+        blob_id = dict.get(self, key + BLOB_SUFFIX) if key in TEXT_FIELDS else None
+        if blob_id is None:
+            raise KeyError(key)
+        text = self[key] = self._store.get(blob_id)
+        return text
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        return key in TEXT_FIELDS and dict.__contains__(self, key + BLOB_SUFFIX)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+
+def iter_records_lazy(input_path, store_dir, input_format=None):
+    """
+    Потоковое чтение processed_data.json(l): записи — LazyTextRecord,
+    тексты из хранилища загружаются только при обращении к ним.
+    """
+    store = TextStore(store_dir)
+    for record in iter_records(input_path, input_format):
+        yield LazyTextRecord(record, store)
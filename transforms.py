@@ -0,0 +1,271 @@
+import re
+import time
+import functools
+import unicodedata
+
+# Реестр преобразований текста: имя -> Transform.
+# Преобразования регистрируются декоратором register() — встроенные ниже,
+# swap_case — в serialize_processed_data.py.
+_REGISTRY = {}
+
+# Цепочка по умолчанию: исходное поведение process_files()
+DEFAULT_TRANSFORMS = ("swap_case",)
+
+
+class Transform:
+    """
+    Описание зарегистрированного преобразования.
+
+    stateless=True — func(text) -> text можно применять к любой порции текста
+    независимо от остальных (порции одного файла могут обрабатываться отдельно).
+    stateless=False — func() создаёт состояние на один файл с методами
+    feed(chunk) -> text и flush() -> text: преобразование видит текст
+    последовательно и может придерживать хвост порции (например, незаконченную строку).
+    """
+    __slots__ = ("name", "func", "stateless", "description")
+
+    def __init__(self, name, func, stateless=True, description=""):
+        self.name = name
+        self.func = func
+        self.stateless = stateless
+        self.description = description
+
+
+def register(name, stateless=True, description=""):
+    """
+    Декоратор регистрации преобразования под именем name (см. Transform).
+    """
+    def decorator(func):
+        existing = _REGISTRY.get(name)
+        # Повторная регистрация той же функции — модуль импортирован ещё раз
+        # (например, как __main__ и по имени); другая функция с тем же именем — ошибка
+        if existing is not None and existing.func.__qualname__ != func.__qualname__:
+            raise ValueError(f"Преобразование уже зарегистрировано: {name}")
+        _REGISTRY[name] = Transform(name, func, stateless, description)
+        return func
+    return decorator
+
+
+def get_transform(name):
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Неизвестное преобразование: {name} "
+                         f"(доступны: {', '.join(sorted(_REGISTRY))})") from None
+
+
+def available_transforms():
+    """
+    Зарегистрированные преобразования: [(имя, stateless, описание), ...] по алфавиту.
+    """
+    return [(t.name, t.stateless, t.description) for _, t in sorted(_REGISTRY.items())]
+
+
+class TransformChain:
+    """
+    Цепочка преобразований, слитых в один проход: каждая порция текста
+    проходит все преобразования подряд в памяти, поэтому файл читается
+    и пишется один раз, сколько бы преобразований ни было.
+
+    Для каждого преобразования копится статистика: число вызовов,
+    время и число обработанных символов (см. report()).
+    """
+    def __init__(self, names):
+        self.names = tuple(names)
+        if not self.names:
+            raise ValueError("Цепочка преобразований пуста")
+        self.transforms = [get_transform(name) for name in self.names]
+        self.stateless = all(t.stateless for t in self.transforms)
+        self.stats = {name: [0, 0.0, 0] for name in self.names}
+
+    def start(self):
+        """
+        Новый проход по одному файлу (см. ChainSession).
+        """
+        return ChainSession(self)
+
+    def apply(self, text):
+        """
+        Применяет цепочку к тексту целиком.
+        """
+        session = self.start()
+        return session.feed(text) + session.flush()
+
+    def report(self):
+        """
+        Пропускная способность каждого преобразования:
+        [{"transform", "calls", "seconds", "chars", "mchars_per_second"}, ...].
+        """
+        result = []
+        for name in self.names:
+            calls, seconds, chars = self.stats[name]
+            result.append({
+                "transform": name,
+                "calls": calls,
+                "seconds": round(seconds, 6),
+                "chars": chars,
+                "mchars_per_second": round(chars / seconds / 1e6, 3) if seconds else None,
+            })
+        return result
+
+
+class ChainSession:
+    """
+    Проход цепочки по одному файлу: feed() для каждой порции, flush() в конце.
+    Хранит состояния stateful-преобразований этого файла.
+    """
+    def __init__(self, chain):
+        self.chain = chain
+        self.states = [None if t.stateless else t.func() for t in chain.transforms]
+
+    def _run(self, position, text):
+        transform = self.chain.transforms[position]
+        state = self.states[position]
+        start = time.perf_counter()
+        result = transform.func(text) if state is None else state.feed(text)
+        stats = self.chain.stats[transform.name]
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+        stats[2] += len(text)
+        return result
+
+    def feed(self, chunk):
+        for position in range(len(self.states)):
+            chunk = self._run(position, chunk)
+        return chunk
+
+    def flush(self):
+        # Хвост, придержанный преобразованием, проходит все следующие за ним
+        text = ""
+        for position, state in enumerate(self.states):
+            if text:
+                text = self._run(position, text)
+            if state is not None:
+                text += state.flush()
+        return text
+
+
+def transform_chain(names):
+    """
+    Общая цепочка для последовательности имён (кортеж, список): одна на процесс,
+    чтобы статистика копилась по всем файлам, обработанным в этом процессе.
+    """
+    return _shared_chain(tuple(names))
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_chain(names):
+    return TransformChain(names)
+
+
+# Сброс общих цепочек (и их статистики), например перед новым запуском в том же процессе
+transform_chain.cache_clear = _shared_chain.cache_clear
+
+
+###############################################################################
+# Встроенные преобразования
+###############################################################################
+class _LineBuffered:
+    """
+    Состояние для построчных преобразований: до line_func доходят
+    только целые строки, незаконченная строка ждёт следующей порции.
+    """
+    def __init__(self, line_func):
+        self.line_func = line_func
+        self.pending = ""
+
+    def feed(self, chunk):
+        text = self.pending + chunk
+        cut = text.rfind("\n") + 1
+        self.pending = text[cut:]
+        return self.line_func(text[:cut]) if cut else ""
+
+    def flush(self):
+        text, self.pending = self.pending, ""
+        return self.line_func(text) if text else ""
+
+
+_TRAILING_WHITESPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_EMPTY_LINE_RE = re.compile(r"^\n", re.MULTILINE)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+@register("strip_trailing_whitespace", stateless=False,
+          description="убирает пробелы и табуляции в конце строк")
+def _strip_trailing_whitespace():
+    return _LineBuffered(lambda lines: _TRAILING_WHITESPACE_RE.sub("", lines))
+
+
+@register("drop_empty_lines", stateless=False, description="удаляет пустые строки")
+def _drop_empty_lines():
+    return _LineBuffered(lambda lines: _EMPTY_LINE_RE.sub("", lines))
+
+
+@register("redact_emails", stateless=False, description="заменяет адреса e-mail на [email]")
+def _redact_emails():
+    return _LineBuffered(lambda lines: _EMAIL_RE.sub("[email]", lines))
+
+
+# Гласные и конечные согласные хангыля (чамо): с предыдущим слогом
+# составляются алгоритмически, в таблице разложений их нет
+_HANGUL_TRAILING_JAMO = range(0x1161, 0x11C3)
+
+
+@functools.lru_cache(maxsize=None)
+def _composes_with_previous():
+    """
+    Символы с нулевым классом сочетаемости, которые при NFC всё же
+    составляются с предыдущим символом: вторые части канонических
+    разложений (например, U+0CD5 в каннада) и чамо хангыля.
+    Таблица строится один раз по unicodedata текущей версии Python.
+    """
+    chars = {chr(code_point) for code_point in _HANGUL_TRAILING_JAMO}
+    for code_point in range(0x110000):
+        decomposition = unicodedata.decomposition(chr(code_point))
+        if decomposition and not decomposition.startswith("<"):
+            parts = decomposition.split()
+            if len(parts) == 2:
+                chars.add(chr(int(parts[1], 16)))
+    return frozenset(chars)
+
+
+def _is_stable_starter(char, composes_with_previous):
+    """
+    Можно ли резать текст перед символом при NFC: нулевой класс сочетаемости,
+    сам символ уже в NFC (его разложение не начинается с комбинирующих, как
+    у U+0F73 или U+0F81) и назад он ни с чем не составляется. Тогда
+    ни переупорядочивание, ни составление через такую границу не проходят.
+    """
+    return (not unicodedata.combining(char)
+            and char not in composes_with_previous
+            and unicodedata.is_normalized("NFC", char))
+
+
+class _NormalizeNFC:
+    """
+    Нормализация NFC порциями: хвост порции, начиная с последнего символа,
+    перед которым можно резать (см. _is_stable_starter()), придерживается —
+    к нему могут относиться комбинирующие символы и чамо из следующей порции.
+    Граница перед таким символом безопасна: результат совпадает
+    с нормализацией текста целиком.
+    """
+    def __init__(self):
+        self.pending = ""
+        self.composes_with_previous = _composes_with_previous()
+
+    def feed(self, chunk):
+        text = self.pending + chunk
+        cut = len(text)
+        while cut > 0 and not _is_stable_starter(text[cut - 1], self.composes_with_previous):
+            cut -= 1
+        cut = max(cut - 1, 0)
+        self.pending = text[cut:]
+        return unicodedata.normalize("NFC", text[:cut])
+
+    def flush(self):
+        text, self.pending = self.pending, ""
+        return unicodedata.normalize("NFC", text)
+
+
+register("normalize_nfc", stateless=False,
+         description="нормализация Unicode NFC (составные символы)")(_NormalizeNFC)
@@ -1,41 +1,226 @@
 import json
 import os
-from jsonschema import validate, ValidationError, SchemaError
+import sys
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def validate_json_file():
+from json_records import records_path, iter_records
+import stage_metrics
+from stage_metrics import timed
+
+# Сколько записей отправляется в процесс-валидатор за один раз
+VALIDATION_BATCH_SIZE = 1000
+
+# Типы JSON Schema, которые быстрый путь умеет проверять сам
+_FAST_PATH_TYPES = {"string": str, "integer": int}
+
+# Ключевые слова, не влияющие на результат проверки
+_ANNOTATION_KEYWORDS = {"title", "description", "$comment"}
+
+def _compile_fast_check(item_schema):
+    """
+    Строит быструю проверку для записей «фиксированной формы», как у FileInfo:
+    объект с обязательными полями-строками и целыми числами (с необязательным minimum).
+    Возвращает функцию record -> bool или None, если схема сложнее.
+
+    Быстрая проверка строже jsonschema (например, 5.0 не считается целым),
+    поэтому True гарантирует валидность, а при False запись перепроверяется
+    полноценным валидатором — он же формирует сообщения об ошибках.
+    """
+    if item_schema.get("type") != "object":
+        return None
+    if set(item_schema) - _ANNOTATION_KEYWORDS - {"type", "properties", "required"}:
+        return None
+
+    checks = []
+    for name, property_schema in item_schema.get("properties", {}).items():
+        if set(property_schema) - _ANNOTATION_KEYWORDS - {"type", "minimum"}:
+            return None
+        expected_type = _FAST_PATH_TYPES.get(property_schema.get("type"))
+        if expected_type is None:
+            return None
+        minimum = property_schema.get("minimum")
+        if minimum is not None and expected_type is not int:
+            return None
+        checks.append((name, expected_type, minimum))
+    required = tuple(item_schema.get("required", ()))
+
+    def check(record):
+        if type(record) is not dict:
+            return False
+        for name in required:
+            if name not in record:
+                return False
+        for name, expected_type, minimum in checks:
+            if name not in record:
+                continue
+            value = record[name]
+            # type() вместо isinstance(): bool не должен сойти за int
+            if type(value) is not expected_type:
+                return False
+            if minimum is not None and value < minimum:
+                return False
+        return True
+
+    return check
+
+class CompiledSchema:
+    """
+    Схема списка записей, скомпилированная один раз: проверка схемы,
+    выбор класса валидатора по $schema, валидатор для одной записи (items)
+    и, если возможно, быстрый путь для записей фиксированной формы.
+    """
+    def __init__(self, schema):
+        # Импорт по требованию: jsonschema загружается долго и нужен только для проверки
+        from jsonschema import validators
+        validator_class = validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        root_validator = validator_class(schema)
+        item_schema = schema["items"]
+        # evolve() сохраняет корневую схему для разрешения $ref внутри items
+        if hasattr(root_validator, "evolve"):
+            self.item_validator = root_validator.evolve(schema=item_schema)
+        else:
+            self.item_validator = validator_class(item_schema)
+        self.fast_check = _compile_fast_check(item_schema)
+
+    @timed("validate", size=lambda errors, self, start_index, records: len(records))
+    def validate_batch(self, start_index, records):
+        """
+        Проверяет записи, начиная с номера start_index.
+        Возвращает список ошибок [(номер записи, сообщение, путь внутри записи), ...].
+        """
+        errors = []
+        fast_check = self.fast_check
+        for offset, record in enumerate(records):
+            if fast_check is not None and fast_check(record):
+                continue
+            for error in self.item_validator.iter_errors(record):
+                errors.append((start_index + offset, error.message, list(error.path)))
+        return errors
+
+# Скомпилированная схема в процессе-валидаторе (заполняется инициализатором пула)
+_worker_schema = None
+
+def _init_worker(schema):
+    global _worker_schema
+    _worker_schema = CompiledSchema(schema)
+
+def _validate_batch_in_worker(start_index, records):
+    return _worker_schema.validate_batch(start_index, records)
+
+def _iter_batches(records, batch_size):
+    """
+    Разбивает поток записей на пачки: выдаёт (номер первой записи, список записей).
+    """
+    batch = []
+    start_index = 0
+    for index, record in enumerate(records):
+        if not batch:
+            start_index = index
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield start_index, batch
+            batch = []
+    if batch:
+        yield start_index, batch
+
+def validate_records(records, schema, workers=1, batch_size=VALIDATION_BATCH_SIZE):
+    """
+    Потоковая проверка записей по схеме списка (type: array, items: {...}).
+    Выдаёт все ошибки по мере обнаружения: (номер записи, сообщение, путь внутри записи).
+
+    При workers > 1 пачки по batch_size записей проверяются в пуле процессов;
+    в работе одновременно не больше 2 * workers пачек, поэтому чтение файла
+    не убегает вперёд проверки и память остаётся ограниченной.
+    """
+    if workers <= 1:
+        compiled = CompiledSchema(schema)
+        for start_index, batch in _iter_batches(records, batch_size):
+            yield from compiled.validate_batch(start_index, batch)
+        return
+
+    # Схема проверяется сразу, чтобы SchemaError возник в основном процессе
+    CompiledSchema(schema)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema,)) as pool:
+        pending = deque()
+        for start_index, batch in _iter_batches(records, batch_size):
+            pending.append(pool.submit(_validate_batch_in_worker, start_index, batch))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def validate_json_file(input_format="json", workers=1, batch_size=VALIDATION_BATCH_SIZE):
     """
     Валидирует файл file_info.json по схеме file_info_schema.json.
-    Выводит результаты валидации или ошибки.
+    При input_format="jsonl" проверяется file_info.jsonl (записи по строкам).
+    Записи читаются потоково и проверяются по одной (см. validate_records()),
+    выводятся все найденные ошибки с номерами записей.
+    Возвращает число найденных ошибок (None, если проверить не удалось).
     """
     project_root = "project_root"
-    json_path = os.path.join(project_root, "output", "file_info.json")
+    json_path = records_path(os.path.join(project_root, "output", "file_info.json"), input_format)
     schema_path = os.path.join(project_root, "output", "file_info_schema.json")
-    
-    # 1. Считываем JSON-файл с данными
+
+    # 1. Проверяем наличие JSON-файла с данными
     if not os.path.isfile(json_path):
         print(f"Не найден JSON-файл с данными: {json_path}")
-        return
-    
-    with open(json_path, "r", encoding="utf-8") as jf:
-        data = json.load(jf)
-    
+        return None
+
     # 2. Считываем JSON Schema
     if not os.path.isfile(schema_path):
         print(f"Не найдена схема: {schema_path}")
-        return
-    
+        return None
+
     with open(schema_path, "r", encoding="utf-8") as sf:
         schema = json.load(sf)
-    
-    # 3. Проверяем валидность
+
+    if schema.get("type") != "array" or not isinstance(schema.get("items"), dict):
+        print("Схема должна описывать список записей (type: array, items: {...})")
+        return None
+
+    # 3. Проверяем валидность (данные читаются потоково)
+    from jsonschema import SchemaError
+    error_count = 0
+    invalid_records = set()
     try:
-        validate(instance=data, schema=schema)
-        print("JSON-файл полностью соответствует схеме!")
-    except ValidationError as ve:
-        print("Обнаружена ошибка в данных JSON-файла:", ve.message)
-        print("Путь к ошибке:", list(ve.path))
+        for index, message, path in validate_records(iter_records(json_path, input_format), schema,
+                                                     workers=workers, batch_size=batch_size):
+            error_count += 1
+            invalid_records.add(index)
+            print(f"Ошибка в записи #{index}: {message}")
+            print("Путь к ошибке:", [index] + path)
     except SchemaError as se:
         print("Ошибка в самой JSON-схеме:", se)
+        return None
+    except ValueError as e:
+        print("Не удалось разобрать JSON-файл:", e)
+        return None
+
+    if error_count:
+        print(f"Обнаружено ошибок: {error_count} в {len(invalid_records)} записях")
+    else:
+        print("JSON-файл полностью соответствует схеме!")
+    return error_count
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Валидация file_info.json по схеме")
+    parser.add_argument("--format", choices=("json", "jsonl"), default="json",
+                        help="формат файла с данными")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="число процессов для проверки (по умолчанию 1)")
+    parser.add_argument("--batch-size", type=int, default=VALIDATION_BATCH_SIZE,
+                        help="число записей в одной пачке для процесса-валидатора")
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    with stage_metrics.instrumented_run("validate_file_info", args.metrics, args.profile):
+        error_count = validate_json_file(input_format=args.format, workers=args.workers,
+                                         batch_size=args.batch_size)
+    # Ненулевой код при ошибках в данных или невозможности проверки (None)
+    if error_count is None or error_count > 0:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    validate_json_file()
+    cli()
@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+import ctypes
+import ctypes.util
+
+import serialize_processed_data
+from serialize_processed_data import RAW_DIR, TEXT_MODES
+from json_records import OUTPUT_FORMATS
+
+# Сколько секунд файл должен не меняться, прежде чем его обработать:
+# за это время запись файла другим процессом, как правило, завершается
+DEFAULT_DEBOUNCE = 0.2
+
+# Период опроса директории, если inotify недоступен
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Через сколько секунд повторить обновление, если оно завершилось ошибкой
+RETRY_DELAY = 5.0
+
+# Маски событий inotify (см. <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Вместо имени файла: изменилось неизвестно что, нужна полная проверка
+RESCAN = None
+
+
+class InotifyWatcher:
+    """
+    Наблюдение за директорией через inotify (Linux) без сторонних пакетов:
+    функции libc вызываются через ctypes. wait() возвращает множество имён
+    файлов, о которых пришли события; RESCAN в множестве означает,
+    что события могли потеряться (переполнение очереди) и нужна полная проверка.
+    """
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError(errno.ENOSYS, "inotify недоступен на этой платформе")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify недоступен в libc")
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"inotify_add_watch: {directory}")
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        position = 0
+        while position + _EVENT_HEADER.size <= len(data):
+            _, mask, _, name_length = _EVENT_HEADER.unpack_from(data, position)
+            position += _EVENT_HEADER.size
+            name = os.fsdecode(data[position:position + name_length].rstrip(b"\0"))
+            position += name_length
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                names.add(RESCAN)
+            elif name and not mask & IN_ISDIR:
+                names.add(name)
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Запасной вариант без inotify: раз в interval секунд сравнивает
+    снимок директории (размер и mtime каждого файла) с предыдущим.
+    """
+    def __init__(self, directory, interval=DEFAULT_POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stats = entry.stat()
+                        snapshot[entry.name] = (stats.st_size, stats.st_mtime_ns)
+        except OSError as e:
+            print(f"Не удалось прочитать директорию {self.directory}: {e}")
+        return snapshot
+
+    def wait(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {name for name, state in snapshot.items() if self._snapshot.get(name) != state}
+        changed.update(name for name in self._snapshot if name not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(directory, polling=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    inotify, если он доступен (и не запрошен опрос), иначе PollingWatcher.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            print(f"inotify недоступен ({e}), используется опрос каждые {poll_interval} с")
+    return PollingWatcher(directory, poll_interval)
+
+
+def _update(main_options, state, changed_hint=None):
+    """
+    Один запуск main() с состоянием state, которое живёт между запусками.
+    Ошибка (файл удалён посреди обработки, вывод недоступен для записи и т.п.)
+    не останавливает наблюдение: она печатается, состояние сбрасывается
+    (следующий запуск прочитает всё с диска), а возвращается False —
+    вызывающий назначит повторную полную проверку.
+    """
+    try:
+        serialize_processed_data.main(changed_hint=changed_hint, state=state, **main_options)
+    except Exception as e:
+        state.clear()
+        print(f"Ошибка при обновлении: {e}; полная проверка через {RETRY_DELAY:.0f} с")
+        return False
+    return True
+
+
+def watch(debounce=DEFAULT_DEBOUNCE, polling=False, poll_interval=DEFAULT_POLL_INTERVAL, **main_options):
+    """
+    Режим наблюдения: обрабатывает файлы из data/raw/ по мере их появления
+    и изменения, поддерживая processed_data.json и file_info.json в актуальном
+    состоянии через инкрементальный main() (см. serialize_processed_data.py).
+
+    Файл обрабатывается, когда о нём не было событий debounce секунд —
+    так недописанный файл не попадёт в обработку посередине записи.
+    main() получает список изменившихся файлов (changed_hint) и не проверяет
+    остальные; при потере событий выполняется полная проверка.
+    Если обновление завершилось ошибкой, через RETRY_DELAY секунд
+    выполняется полная проверка (что успело записаться — неизвестно).
+    Манифест и записи держатся в памяти между обновлениями (параметр state
+    main()), поэтому processed_data.json не разбирается на каждое событие.
+    Сам файл при этом переписывается целиком; чтобы и запись не зависела
+    от размера корпуса, используйте --partition: тогда переписываются только
+    шарды с изменившимися записями. Вывод не должен одновременно обновляться
+    другим процессом — наблюдение считает своё состояние актуальным.
+    main_options передаются в main() (workers, output_format, texts и т.д.).
+    """
+    main_options.setdefault("file_info", True)
+    os.makedirs(RAW_DIR, exist_ok=True)
+
+    # Наблюдение включается до начальной проверки, чтобы не пропустить
+    # файлы, появившиеся во время неё
+    watcher = open_watcher(RAW_DIR, polling, poll_interval)
+    # Имя -> время последнего события. После ошибки RESCAN получает время
+    # в будущем, чтобы повторная проверка прошла не раньше, чем через RETRY_DELAY
+    pending = {}
+    state = {}
+    if not _update(main_options, state):
+        pending[RESCAN] = time.monotonic() + RETRY_DELAY - debounce
+    print(f"Наблюдение за {RAW_DIR} (Ctrl+C для выхода)")
+
+    try:
+        while True:
+            if pending:
+                now = time.monotonic()
+                timeout = max(0.0, min(pending.values()) + debounce - now)
+            else:
+                timeout = None
+            for name in watcher.wait(timeout):
+                pending[name] = time.monotonic()
+
+            now = time.monotonic()
+            ready = {name for name, last_event in pending.items() if now - last_event >= debounce}
+            if not ready:
+                continue
+            for name in ready:
+                del pending[name]
+
+            started = time.perf_counter()
+            if _update(main_options, state, None if RESCAN in ready else ready):
+                print(f"Обновлено за {time.perf_counter() - started:.3f} с")
+            else:
+                pending[RESCAN] = time.monotonic() + RETRY_DELAY - debounce
+    except KeyboardInterrupt:
+        print("Наблюдение остановлено")
+    finally:
+        watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Наблюдение за data/raw/: обработка новых и изменённых файлов по мере появления")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="сколько секунд файл должен не меняться перед обработкой")
+    parser.add_argument("--polling", action="store_true", help="опрашивать директорию вместо inotify")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="период опроса директории, секунды")
+    parser.add_argument("--workers", type=int, default=1, help="число процессов для обработки")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="формат вывода")
+    parser.add_argument("--texts", choices=TEXT_MODES, default="inline",
+                        help="где хранить тексты (см. serialize_processed_data.py --texts)")
+    parser.add_argument("--no-file-info", action="store_true", help="не обновлять file_info.json")
+    parser.add_argument("--partition", choices=("hash", "date"),
+                        help="писать вывод шардами (см. serialize_processed_data.py --partition)")
+    parser.add_argument("--shards", type=int, help="число шардов при --partition hash")
+    args = parser.parse_args(argv)
+    if args.shards is not None and (args.partition != "hash" or args.shards < 1):
+        parser.error("--shards задаётся положительным числом вместе с --partition hash")
+    watch(debounce=args.debounce, polling=args.polling, poll_interval=args.poll_interval,
+          workers=args.workers, output_format=args.format, texts=args.texts,
+          file_info=not args.no_file_info, partition=args.partition, shard_count=args.shards)
+
+
+if __name__ == "__main__":
+    main()